@@ -0,0 +1,79 @@
+"""Clock tick cost: full ``fleet.advance`` vs the incremental ``fleet.Lifecycle``.
+
+The fixture's departures span -12h..+6h around now. ``--history-hours``
+moves each flight back by a random offset of up to that many hours, the way
+the ``flights`` table keeps landed flights around, so fewer flights are in
+the air. Every tick moves the clock ``--step`` seconds forward; both
+variants are checked to produce the same columns.
+
+    python benchmarks/bench_advance.py --rows 1000000 --history-hours 0 24 168
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_fleet_memory import raw_flights  # noqa: E402
+from harness import DASHBOARD_DIR, percentile, run_isolated, use_path  # noqa: E402
+
+DERIVED = ["progress", "current_lat", "current_lon", "eta", "flight_phase"]
+
+
+def bench_case(rows, routes, history_hours, ticks, step):
+    use_path(DASHBOARD_DIR)
+    import numpy as np
+
+    from fleet import Fleet, Lifecycle, advance
+
+    raw = raw_flights(rows, routes)
+    shift = np.random.default_rng(1).integers(0, history_hours * 3600 + 1, rows)
+    raw["departure_time"] -= shift
+    raw["arrival_time"] -= shift
+    now = time.time()
+    full = Fleet.from_frame(raw).to_frame(now)
+    incremental = full.copy()
+
+    start = time.perf_counter()
+    lifecycle = Lifecycle(incremental)
+    lifecycle.advance(incremental, now)
+    build = time.perf_counter() - start
+
+    timings = {"full": [], "incremental": []}
+    recomputed = []
+    for tick in range(1, ticks + 1):
+        t = now + tick * step
+        start = time.perf_counter()
+        advance(full, t)
+        timings["full"].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        lifecycle.advance(incremental, t)
+        timings["incremental"].append(time.perf_counter() - start)
+        recomputed.append(lifecycle.recomputed)
+    assert all(full[c].equals(incremental[c]) for c in DERIVED)
+
+    p50 = {k: percentile(sorted(v), 50) * 1000 for k, v in timings.items()}
+    return {"history_h": history_hours, "airborne": f"{len(lifecycle.airborne) / rows:.1%}",
+            "recomputed": int(np.median(recomputed)), "build_ms": round(build * 1000, 1),
+            "full_p50_ms": round(p50["full"], 1), "incremental_p50_ms": round(p50["incremental"], 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--routes", type=int, default=500)
+    parser.add_argument("--history-hours", type=int, nargs="+", default=[0, 24, 168])
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--step", type=float, default=30)
+    args = parser.parse_args()
+
+    for history_hours in args.history_hours:
+        result = run_isolated(bench_case, rows=args.rows, routes=args.routes, history_hours=history_hours,
+                              ticks=args.ticks, step=args.step)
+        print("  ".join(f"{k}={v}" for k, v in result.items()))
+
+
+if __name__ == "__main__":
+    main()
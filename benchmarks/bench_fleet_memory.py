@@ -0,0 +1,113 @@
+"""Memory footprint of the processed fleet: row-wise frame vs ``Fleet``.
+
+The legacy path is the ``df.apply`` version of ``process_flight_data`` the
+dashboards used before ``fleet.py`` (coordinate lists per row, object strings
+for phases). Each variant runs in its own process so peak RSS is comparable.
+
+    python benchmarks/bench_fleet_memory.py --rows 1000000 --routes 500
+"""
+
+import argparse
+import ast
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from harness import DASHBOARD_DIR, run_isolated, use_path  # noqa: E402
+
+
+def legacy_process(df):
+    df["origin_coord"] = df["origin"].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) else x)
+    df["destination_coord"] = df["destination"].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) else x)
+    df["departure_datetime"] = pd.to_datetime(df["departure_time"], unit="s")
+    df["arrival_datetime"] = pd.to_datetime(df["arrival_time"], unit="s")
+    df["flight_duration"] = (df["arrival_datetime"] - df["departure_datetime"]).dt.total_seconds() / 3600
+    now = time.time()
+    df["progress"] = df.apply(lambda row: min(1.0, max(0.0, (now - row["departure_time"]) /
+                                                        max(1, row["arrival_time"] - row["departure_time"]))), axis=1)
+    df["current_lat"] = df.apply(lambda row: row["origin_coord"][0] + (
+        row["destination_coord"][0] - row["origin_coord"][0]) * row["progress"], axis=1)
+    df["current_lon"] = df.apply(lambda row: row["origin_coord"][1] + (
+        row["destination_coord"][1] - row["origin_coord"][1]) * row["progress"], axis=1)
+    df["eta"] = df.apply(lambda row: row["departure_datetime"] + (
+        row["arrival_datetime"] - row["departure_datetime"]) * row["progress"], axis=1)
+
+    def get_flight_phase(progress):
+        if progress < 0.1: return "Takeoff"
+        elif progress < 0.3: return "Climbing"
+        elif progress < 0.7: return "Cruising"
+        elif progress < 0.9: return "Descending"
+        else: return "Landing"
+
+    df["flight_phase"] = df["progress"].apply(get_flight_phase)
+    return df
+
+
+def raw_flights(rows, routes, seed=0):
+    """Synthetic ``flights`` rows; with ``routes`` > 0 coordinates repeat like real routes."""
+    import numpy as np
+    from fixtures import synthetic_flights
+
+    raw = synthetic_flights(rows, seed=seed)
+    if routes:
+        rng = np.random.default_rng(seed)
+        picks = rng.integers(0, routes, rows)
+        raw["origin"] = raw["origin"].to_numpy()[:routes][picks]
+        raw["destination"] = raw["destination"].to_numpy()[:routes][picks]
+    return raw
+
+
+def bench_variant(variant, rows, routes):
+    use_path(DASHBOARD_DIR)
+    import resource
+
+    from fleet import Fleet
+
+    raw = raw_flights(rows, routes)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    start = time.perf_counter()
+    if variant == "legacy":
+        frame = legacy_process(raw)
+        held = frame.memory_usage(deep=True).sum()
+        # memory_usage does not follow the coordinate lists inside object cells
+        held += sum(sys.getsizeof(c) + 2 * 24 for c in frame["origin_coord"])
+        held += sum(sys.getsizeof(c) + 2 * 24 for c in frame["destination_coord"])
+    else:
+        fleet = Fleet.from_frame(raw, arrow=variant == "fleet-arrow")
+        del raw
+        frame = fleet.to_frame()
+        # The frame shares most arrays with the fleet, so only the frame is counted
+        held = frame.memory_usage(deep=True).sum()
+    elapsed = time.perf_counter() - start
+    return {
+        "stage": "fleet",
+        "case": f"{variant} rows={rows} routes={routes}",
+        "seconds": round(elapsed, 3),
+        "held_mb": round(held / 2**20, 1),
+        "bytes_per_flight": round(held / rows, 1),
+        "rss_before_mb": round(rss_before, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--routes", type=int, default=500, help="distinct coordinate pairs (0 = all unique)")
+    parser.add_argument("--variants", nargs="+", default=["legacy", "fleet", "fleet-arrow"])
+    args = parser.parse_args()
+
+    for variant in args.variants:
+        result = run_isolated(bench_variant, variant=variant, rows=args.rows, routes=args.routes)
+        if "error" in result:
+            print(f"{variant:<12} ERROR {result['error']}")
+            continue
+        print(f"{variant:<12} {result['seconds']:>8.2f}s  held {result['held_mb']:>8.1f} MB "
+              f"({result['bytes_per_flight']:>6.0f} B/flight)  peak rss {result['peak_rss_mb']:>8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Per-event overhead of the lifecycle validation stage.
+
+Measures the bare state machine (``FlightLifecycle.check``) and the pandas
+group function Spark runs for each flight in a micro-batch. Synthetic events
+pick statuses at random, so most are rejected; ``--producer`` validates the
+events ``producer.py`` would send instead, which should all pass.
+
+    python benchmarks/bench_lifecycle.py --events 1000000 --flights 1000
+    python benchmarks/bench_lifecycle.py --events 100000 --producer
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from lifecycle import STATUSES, FlightLifecycle, _validate_group  # noqa: E402
+
+
+class _State:
+    """Minimal stand-in for Spark's GroupState."""
+
+    def __init__(self):
+        self.value = None
+
+    @property
+    def exists(self):
+        return self.value is not None
+
+    @property
+    def get(self):
+        return self.value
+
+    def update(self, value):
+        self.value = value
+
+
+def synthetic_events(n_events, n_flights, seed=42):
+    rng = random.Random(seed)
+    now = int(time.time())
+    departures = {f"FL{i:07d}": now + rng.randint(0, 86400) for i in range(n_flights)}
+    events = []
+    for _ in range(n_events):
+        flight_id = f"FL{rng.randrange(n_flights):07d}"
+        departure = departures[flight_id]
+        events.append({
+            "flight_id": flight_id,
+            "status": rng.choice(STATUSES),
+            "departure_time": departure,
+            "arrival_time": departure + rng.randint(-600, 7200),
+        })
+    return events
+
+
+def producer_events(n_events, seed=42):
+    from producer import initial_state, next_event
+
+    random.seed(seed)
+    flights_state = initial_state()
+    return [next_event(flights_state) for _ in range(n_events)]
+
+
+def bench_state_machine(events):
+    lifecycle = FlightLifecycle()
+    check = lifecycle.check
+    start = time.perf_counter_ns()
+    rejected = sum(check(event) is not None for event in events)
+    elapsed = time.perf_counter_ns() - start
+    return elapsed / len(events), rejected
+
+
+def bench_group_function(events, batch_size):
+    frame = pd.DataFrame(events)
+    frame["origin"] = "[0.0, 0.0]"
+    frame["destination"] = "[0.0, 0.0]"
+    frame["produced_at"] = frame["departure_time"] * 1000
+    frame["broker_time"] = frame["produced_at"]
+    frame["kafka_partition"] = 0
+    frame["kafka_offset"] = range(len(frame))
+
+    # Spark hands the function one group at a time; only time the function itself.
+    states = {}
+    elapsed = 0
+    for offset in range(0, len(frame), batch_size):
+        batch = frame.iloc[offset:offset + batch_size]
+        for flight_id, group in batch.groupby("flight_id", sort=False):
+            state = states.setdefault(flight_id, _State())
+            start = time.perf_counter_ns()
+            for _ in _validate_group((flight_id,), iter([group]), state):
+                pass
+            elapsed += time.perf_counter_ns() - start
+    return elapsed / len(frame)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--flights", type=int, default=1_000)
+    parser.add_argument("--batch-size", type=int, default=5_000,
+                        help="events per simulated micro-batch for the group function")
+    parser.add_argument("--producer", action="store_true",
+                        help="validate producer.py's events instead of random statuses")
+    args = parser.parse_args()
+
+    if args.producer:
+        events = producer_events(args.events)
+    else:
+        events = synthetic_events(args.events, args.flights)
+
+    per_event_ns, rejected = bench_state_machine(events)
+    print(f"state machine:  {per_event_ns / 1000:8.3f} us/event "
+          f"({rejected / len(events):.1%} rejected)")
+
+    group_events = events[:min(len(events), 50_000)]
+    per_event_ns = bench_group_function(group_events, args.batch_size)
+    print(f"group function: {per_event_ns / 1000:8.3f} us/event "
+          f"(batch of {args.batch_size}, {len(group_events)} events)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Load time and peak memory of the dashboard read paths against Postgres.
+
+Compares ``pd.read_sql`` with ``loader.read_frame`` (COPY into pyarrow) and
+``loader.iter_frames`` (named cursor, chunked) on a ``flights_bench`` table
+filled with synthetic rows. Each path runs in its own process, so peak RSS
+is per path.
+
+    python benchmarks/bench_loader.py --postgres-dsn "dbname=flights_project user=admin password=admin host=localhost" --rows 1000000
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from harness import DASHBOARD_DIR, run_isolated, use_path  # noqa: E402
+
+TABLE = "flights_bench"
+COLUMNS = ["flight_id", "origin", "destination", "status", "departure_time", "arrival_time",
+           "produced_at", "sunk_at"]
+QUERY = f"SELECT {', '.join(COLUMNS)} FROM {TABLE} ORDER BY departure_time DESC"
+PATHS = ["read_sql", "copy", "chunked"]
+
+
+def prepare(dsn, rows):
+    """(Re)create ``flights_bench`` with ``rows`` synthetic rows unless it already has them."""
+    import psycopg2
+
+    use_path(DASHBOARD_DIR)
+    from fixtures import synthetic_flights
+
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("SELECT to_regclass(%s)", (TABLE,))
+            if cur.fetchone()[0]:
+                cur.execute(f"SELECT count(*) FROM {TABLE}")
+                if cur.fetchone()[0] == rows:
+                    return
+            cur.execute(f"DROP TABLE IF EXISTS {TABLE}")
+            cur.execute(f"""
+                CREATE TABLE {TABLE} (
+                    flight_id TEXT PRIMARY KEY, origin TEXT, destination TEXT, status TEXT,
+                    departure_time BIGINT, arrival_time BIGINT, produced_at BIGINT, sunk_at BIGINT
+                )
+            """)
+            buffer = io.StringIO()
+            synthetic_flights(rows)[COLUMNS].to_csv(buffer, index=False, header=False)
+            buffer.seek(0)
+            cur.copy_expert(f"COPY {TABLE} FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        conn.close()
+
+
+def bench_path(path, dsn):
+    import pandas as pd
+    import psycopg2
+
+    use_path(DASHBOARD_DIR)
+    from loader import iter_frames, read_frame
+
+    conn = psycopg2.connect(dsn)
+    try:
+        start = time.perf_counter()
+        if path == "read_sql":
+            rows = len(pd.read_sql(QUERY, conn))
+        elif path == "copy":
+            rows = len(read_frame(conn, QUERY))
+        else:
+            rows = sum(len(chunk) for chunk in iter_frames(conn, QUERY))
+        return {"path": path, "rows": rows, "seconds": round(time.perf_counter() - start, 3)}
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--postgres-dsn", required=True)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--paths", nargs="+", choices=PATHS, default=PATHS)
+    args = parser.parse_args()
+
+    prepare(args.postgres_dsn, args.rows)
+    for path in args.paths:
+        result = run_isolated(bench_path, path=path, dsn=args.postgres_dsn)
+        print("  ".join(f"{k}={v}" for k, v in result.items()))
+
+
+if __name__ == "__main__":
+    main()
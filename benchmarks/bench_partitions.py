@@ -0,0 +1,137 @@
+"""Prediction consumer scaling as the ``flights`` topic goes from 1 to N partitions.
+
+Generated events are keyed by ``flight_id`` and spread over the partitions
+with the producer's murmur2 partitioner. A topic with P partitions is read
+by ``min(P, --max-workers)`` consumer processes of one group, each assigned
+a contiguous range of partitions the way Kafka's range assignor does, and
+running the prediction consumer's deserialize/score/serialize loop over its
+share. Like ``run.py`` the broker is a local stand-in, so this measures how
+far partitioning lets the group scale, not fetch latency.
+
+Each worker's share is cut and serialized in the parent before the clock
+starts. Workers import and warm up, wait on a barrier, then score their
+share ``--repeat`` times. Wall time runs from the barrier to the last worker
+finishing, on the shared wall clock, so process start-up is not measured.
+
+``bound`` is the speedup the key spread allows: all events over the busiest
+worker's events. ``skew`` is the busiest partition over the mean. ``cap`` is
+what the machine allows on top of that, ``min(bound, cores)``. On a single
+core the workers only take turns, so ``speedup`` stays near 1 whatever the
+partition count; run it where ``cores`` is at least the worker count.
+
+    python benchmarks/bench_partitions.py --flights 20000 --partitions 1 2 4 8 16
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from harness import SCRIPTS_DIR, use_path  # noqa: E402
+
+
+def keyed_messages(flights, seed):
+    """``(key, value)`` bytes of the events of ``flights`` generated flights."""
+    use_path(SCRIPTS_DIR)
+    import json
+
+    from fleet_generator import FleetGenerator, to_records
+
+    generator = FleetGenerator(seed=seed)
+    events = generator.events(generator.schedule(flights, start=0))
+    return [(record["flight_id"].encode("utf-8"), json.dumps(record).encode("utf-8"))
+            for record in to_records(events)]
+
+
+def partition_of(messages, partitions):
+    """Partition of every message, as the default partitioner picks it."""
+    from kafka.partitioner.default import murmur2
+
+    by_key = {}
+    return [by_key.setdefault(key, (murmur2(key) & 0x7fffffff) % partitions) for key, _ in messages]
+
+
+def assigned(partitions, workers):
+    """Partitions of each worker under the range assignor."""
+    per_worker, extra = divmod(partitions, workers)
+    ranges, start = [], 0
+    for slot in range(workers):
+        end = start + per_worker + (slot < extra)
+        ranges.append(set(range(start, end)))
+        start = end
+    return ranges
+
+
+def consume(mine, repeat, barrier, queue):
+    """One consumer process: score the ``mine`` messages ``repeat`` times."""
+    use_path(SCRIPTS_DIR)
+    import json
+
+    from prediction_consumer import build_prediction
+
+    # Imports and first-call costs stay outside the timed region
+    for key, value in mine[:100]:
+        build_prediction(json.loads(value.decode("utf-8")))
+    barrier.wait()
+    start = time.time()
+    for _ in range(repeat):
+        for key, value in mine:
+            prediction = build_prediction(json.loads(value.decode("utf-8")))
+            json.dumps(prediction).encode("utf-8")
+    queue.put((len(mine) * repeat, start, time.time()))
+
+
+def bench_case(messages, partitions, workers, repeat):
+    import multiprocessing
+    from collections import Counter
+
+    parts = partition_of(messages, partitions)
+    counts = Counter(parts)
+    ranges = assigned(partitions, workers)
+    shares = [[m for m, p in zip(messages, parts) if p in owned] for owned in ranges]
+
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(workers)
+    queue = context.Queue()
+    processes = [context.Process(target=consume, args=(share, repeat, barrier, queue)) for share in shares]
+    for process in processes:
+        process.start()
+    results = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    events = sum(n for n, _, _ in results)
+    wall = max(end for _, _, end in results) - min(start for _, start, _ in results)
+    bound = len(messages) / max(len(share) for share in shares)
+    return {"partitions": partitions, "workers": workers, "events": events,
+            "events_per_s": round(events / wall), "bound": round(bound, 2),
+            "cap": round(min(bound, float(os.cpu_count() or 1)), 2),
+            "skew": round(max(counts.values()) / (len(messages) / partitions), 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--flights", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--partitions", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--max-workers", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3, help="passes of each worker over its share")
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    print(f"cores={cores}")
+    if cores < min(max(args.partitions), args.max_workers):
+        print(f"note: more workers than cores, speedup cannot exceed {cores}")
+    messages = keyed_messages(args.flights, args.seed)
+    baseline = None
+    for partitions in args.partitions:
+        result = bench_case(messages, partitions, min(partitions, args.max_workers), args.repeat)
+        baseline = baseline or result["events_per_s"]
+        result["speedup"] = round(result["events_per_s"] / baseline, 2)
+        print("  ".join(f"{k}={v}" for k, v in result.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Dashboard figure builds per rerun: serial vs the render pool vs the render cache.
+
+``serial`` builds the flight map layers, the status/hour charts and the
+phase chart one after another on the script thread. ``pool`` submits the
+three to a ``render.FigureBuilder`` under a new key and waits for all of
+them; ``cached`` resubmits with an unchanged key, which is what a rerun
+without a clock tick, filter or viewport change costs; ``other_session``
+submits the same key from a second builder sharing the ``RenderCache``. The
+map is only built for the first ``--map-rows`` flights, as the viewport
+query keeps it small. ``map_page`` is building the folium map from cached
+layers and rendering it, which ``st_folium`` does on every rerun.
+
+    python benchmarks/bench_render.py --rows 100000 --workers 1 4
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_fleet_memory import raw_flights  # noqa: E402
+from harness import DASHBOARD_DIR, percentile, run_isolated, use_path  # noqa: E402
+
+
+def bench_case(rows, routes, map_rows, workers, reruns):
+    use_path(DASHBOARD_DIR)
+    import logging
+    import warnings
+    from concurrent.futures import ThreadPoolExecutor
+
+    # The dashboard calls st.* at import time; outside ``streamlit run``
+    # those are no-ops that log a warning each.
+    logging.disable(logging.WARNING)
+    warnings.filterwarnings("ignore", category=UserWarning)
+    import dashboard
+    from fleet import Fleet
+    from render import FigureBuilder, RenderCache
+
+    df = Fleet.from_frame(raw_flights(rows, routes)).to_frame(time.time())
+    visible = df.iloc[:map_rows]
+    builds = {
+        "map": (dashboard.map_layers, visible),
+        "charts": (dashboard.enhanced_chart_figures, df),
+        "phases": (dashboard.phase_figure, df),
+    }
+    # Warm the route cache so every variant pays the same geometry cost
+    dashboard.map_layers(visible)
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    cache = RenderCache(256 * 2**20)
+    builder, other = FigureBuilder(pool, cache), FigureBuilder(pool, cache)
+    timings = {"serial": [], "pool": [], "cached": [], "other_session": [], "map_page": []}
+    for rerun in range(reruns):
+        start = time.perf_counter()
+        for fn, frame in builds.values():
+            fn(frame)
+        timings["serial"].append(time.perf_counter() - start)
+
+        for variant, session in (("pool", builder), ("cached", builder), ("other_session", other)):
+            start = time.perf_counter()
+            for name, (fn, frame) in builds.items():
+                session.submit(name, rerun, fn, frame)
+            for name in builds:
+                session.result(name)
+            timings[variant].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        dashboard.create_interactive_flight_map(visible, layers=builder.result("map")).get_root().render()
+        timings["map_page"].append(time.perf_counter() - start)
+
+    p50 = {k: percentile(sorted(v), 50) * 1000 for k, v in timings.items()}
+    stats = cache.stats
+    return {"rows": rows, "workers": workers, **{f"{k}_p50_ms": round(v, 1) for k, v in p50.items()},
+            "cache_mb": round(stats["bytes"] / 2**20, 1), "hit_rate": f"{stats['hit_rate']:.0%}"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--routes", type=int, default=500)
+    parser.add_argument("--map-rows", type=int, default=2000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--reruns", type=int, default=5)
+    args = parser.parse_args()
+
+    for workers in args.workers:
+        result = run_isolated(bench_case, rows=args.rows, routes=args.routes, map_rows=args.map_rows,
+                              workers=workers, reruns=args.reruns)
+        print("  ".join(f"{k}={v}" for k, v in result.items()))
+
+
+if __name__ == "__main__":
+    main()
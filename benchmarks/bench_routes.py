@@ -0,0 +1,81 @@
+"""Route drawing on the folium maps: per-flight polylines vs the route cache.
+
+``per_flight`` draws what the maps used to: a polyline and two airport
+markers per flight. ``cached`` draws one ``FeatureLayer`` feature per route
+and status plus one marker per airport, from a ``RouteCache`` that is cold
+on the first refresh and warm afterwards. Aircraft markers are the same in
+both and are left out. Each refresh builds the elements and renders the
+page, which is what ``st_folium`` does.
+
+    python benchmarks/bench_routes.py --flights 2000 --routes 500 --refreshes 5
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_fleet_memory import raw_flights  # noqa: E402
+from harness import DASHBOARD_DIR, run_isolated, use_path  # noqa: E402
+
+COLORS = {"On Time": "#00b09b", "Delayed": "#ff9a00", "Cancelled": "#ff4757", "In Flight": "#5352ed"}
+
+
+def per_flight_map(df):
+    import folium
+
+    m = folium.Map()
+    for _, flight in df.iterrows():
+        origin = [flight["origin_lat"], flight["origin_lon"]]
+        destination = [flight["dest_lat"], flight["dest_lon"]]
+        folium.PolyLine(locations=[origin, destination], color=COLORS.get(flight["status"], "#5352ed"),
+                        weight=3, opacity=0.8, dash_array="10, 5" if flight["status"] == "Delayed" else None,
+                        popup=f"Flight {flight['flight_id']} - {flight['status']}").add_to(m)
+        for position, fill in ((origin, "#00b09b"), (destination, "#ff4757")):
+            folium.CircleMarker(location=position, radius=6, color="white", fill=True, fillColor=fill,
+                                fillOpacity=0.9, weight=2).add_to(m)
+    return m
+
+
+def bench_variant(variant, flights, routes, refreshes):
+    use_path(DASHBOARD_DIR)
+    import folium
+
+    from fleet import Fleet
+    from routes import RouteCache, route_layer
+
+    df = Fleet.from_frame(raw_flights(flights, routes)).to_frame(time.time())
+    cache = RouteCache()
+    seconds = []
+    for _ in range(refreshes):
+        start = time.perf_counter()
+        if variant == "per_flight":
+            m = per_flight_map(df)
+        else:
+            m = folium.Map()
+            route_layer(df, cache, COLORS).add_to(m)
+        html = m.get_root().render()
+        seconds.append(time.perf_counter() - start)
+    return {"variant": variant, "flights": flights, "elements": len(m._children),
+            "html_mb": round(len(html) / 2**20, 1), "first_s": round(seconds[0], 3),
+            "warm_s": round(min(seconds[1:] or seconds), 3), "cache": cache.stats if variant == "cached" else None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--flights", type=int, default=2000)
+    parser.add_argument("--routes", type=int, default=500)
+    parser.add_argument("--refreshes", type=int, default=5)
+    parser.add_argument("--variants", nargs="+", default=["per_flight", "cached"])
+    args = parser.parse_args()
+
+    for variant in args.variants:
+        result = run_isolated(bench_variant, variant=variant, flights=args.flights,
+                              routes=args.routes, refreshes=args.refreshes)
+        print("  ".join(f"{k}={v}" for k, v in result.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Dashboard cold start: full reload vs memory-mapped snapshot plus delta.
+
+The full path is what every new process did before ``snapshot.py``: parse
+the raw ``flights`` rows (the ``pd.read_sql`` time itself is not included)
+and build the render frame. The snapshot path maps the Arrow file, applies a
+delta of recently sunk rows and builds the same frame. Each path runs in its
+own process, so nothing is warm from the other.
+
+    python benchmarks/bench_snapshot.py --rows 1000000 --routes 500 --delta 0.01
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_fleet_memory import raw_flights  # noqa: E402
+from harness import DASHBOARD_DIR, run_isolated, use_path  # noqa: E402
+
+
+class DeltaConnection:
+    """Stand-in for a psycopg2 connection that answers the delta query from a frame."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params):
+        self.result = self.rows[self.rows["sunk_at"] > params[0]]
+
+    def fetchall(self):
+        return list(self.result.itertuples(index=False, name=None))
+
+
+def bench_path(path, rows, routes, delta, snapshot_file):
+    use_path(DASHBOARD_DIR)
+    from fleet import Fleet
+    from snapshot import FleetSnapshot, write_snapshot
+
+    raw = raw_flights(rows, routes)
+    if path == "write":
+        table = Fleet.from_frame(raw).to_arrow()
+        start = time.perf_counter()
+        write_snapshot(table, snapshot_file, int(raw["sunk_at"].max()), time.time())
+        return {"seconds": time.perf_counter() - start, "mb": os.path.getsize(snapshot_file) / 2**20}
+
+    changed = raw.sample(frac=delta, random_state=1).copy()
+    changed["status"] = "Arrived"
+    changed["sunk_at"] = raw["sunk_at"].max() + 1000
+    start = time.perf_counter()
+    if path == "full":
+        frame = Fleet.from_frame(raw).to_frame()
+    else:
+        snapshot = FleetSnapshot(snapshot_file, max_age=float("inf"))
+        frame = snapshot.frame(DeltaConnection(changed), load_full=lambda: raw)
+    return {"seconds": time.perf_counter() - start, "rows": len(frame)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--routes", type=int, default=500)
+    parser.add_argument("--delta", type=float, default=0.01, help="share of rows changed since the snapshot")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot_file = os.path.join(directory, "fleet.arrow")
+        for path in ("write", "full", "snapshot"):
+            result = run_isolated(bench_path, path=path, rows=args.rows, routes=args.routes,
+                                  delta=args.delta, snapshot_file=snapshot_file)
+            print(f"{path:<9} " + "  ".join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}"
+                                            for k, v in result.items()))
+
+
+if __name__ == "__main__":
+    main()
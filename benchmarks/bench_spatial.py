@@ -0,0 +1,79 @@
+"""Query latency of the dashboard grid index.
+
+Times a full build, a no-op update (no flight changed cell), viewport queries
+of a few sizes, k-nearest lookups, per-cell density and heatmap binning over
+random positions.
+
+    python benchmarks/bench_spatial.py --points 1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from harness import DASHBOARD_DIR, percentile, use_path  # noqa: E402
+
+use_path(DASHBOARD_DIR)
+
+from spatial import GridIndex, heat_bins  # noqa: E402
+
+VIEWPORTS = {
+    "city": (40.0, -75.0, 41.5, -73.0),
+    "region": (35.0, -10.0, 60.0, 30.0),
+    "antimeridian": (-30.0, 160.0, 10.0, -160.0),
+    "world": (-85.0, -180.0, 85.0, 180.0),
+}
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return result, percentile(samples, 50) * 1000, percentile(samples, 99) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    lat = rng.uniform(-60, 70, args.points)
+    lon = rng.uniform(-180, 180, args.points)
+
+    index = GridIndex()
+    cases = [
+        ("build", lambda: GridIndex().update(lat, lon)),
+        ("update (unchanged cells)", lambda: index.update(lat, lon)),
+    ]
+    index.update(lat, lon)
+    for name, box in VIEWPORTS.items():
+        cases.append((f"in_bounds {name}", lambda box=box: index.in_bounds(*box)))
+    clicks = rng.uniform((-50, -170), (60, 170), (args.repeat, 2))
+    cursor = iter(range(10**9))
+    cases.append((f"nearest k={args.k}",
+                  lambda: index.nearest(*clicks[next(cursor) % len(clicks)], k=args.k)))
+    cases.append(("density", lambda: index.density()))
+    cases.append(("density region", lambda: index.density(VIEWPORTS["region"])))
+    cases.append(("heat_bins world z=2", lambda: heat_bins(lat, lon)))
+    cases.append(("heat_bins region z=5", lambda: heat_bins(lat, lon, VIEWPORTS["region"], zoom=5)))
+
+    print(f"{args.points} points, {index.n_cells} cells of {index.cell_deg}°")
+    for name, func in cases:
+        result, p50, p99 = timed(func, args.repeat)
+        size = len(result[0]) if isinstance(result, tuple) else len(result)
+        print(f"{name:<26} p50 {p50:>8.2f} ms  p99 {p99:>8.2f} ms  ({size} results)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Peak memory of summarizing a large history: materialized vs streamed.
+
+``materialized`` builds the whole raw frame and the processed fleet the way
+``load_all_flights`` plus ``process_flight_data`` do, then aggregates.
+``streamed`` folds the same rows chunk by chunk into a ``FleetSummary``.
+Each runs in its own process; chunks are generated on the fly, standing in
+for a server-side cursor.
+
+    python benchmarks/bench_streaming.py --rows 5000000 --chunk-rows 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_fleet_memory import raw_flights  # noqa: E402
+from harness import DASHBOARD_DIR, run_isolated, use_path  # noqa: E402
+
+
+def chunks(rows, chunk_rows, routes):
+    base = raw_flights(min(rows, chunk_rows), routes)
+    for start in range(0, rows, chunk_rows):
+        chunk = base.iloc[:min(chunk_rows, rows - start)].copy()
+        chunk["flight_id"] = "FL" + (chunk.index + start).astype(str)
+        yield chunk
+
+
+def bench_variant(variant, rows, chunk_rows, routes):
+    use_path(DASHBOARD_DIR)
+    import pandas as pd
+
+    from fleet import Fleet
+    from streaming import summarize
+
+    now = time.time()
+    start = time.perf_counter()
+    if variant == "materialized":
+        frame = Fleet.from_frame(pd.concat(chunks(rows, chunk_rows, routes), ignore_index=True)).to_frame(now)
+        result = len(frame), frame["status"].value_counts().to_dict()
+    else:
+        summary = summarize(chunks(rows, chunk_rows, routes), now)
+        result = summary.rows, summary.status_counts().to_dict()
+    return {"variant": variant, "rows": result[0], "seconds": round(time.perf_counter() - start, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--chunk-rows", type=int, default=100_000)
+    parser.add_argument("--routes", type=int, default=500)
+    parser.add_argument("--variants", nargs="+", default=["materialized", "streamed"])
+    args = parser.parse_args()
+
+    for variant in args.variants:
+        result = run_isolated(bench_variant, variant=variant, rows=args.rows,
+                              chunk_rows=args.chunk_rows, routes=args.routes)
+        print("  ".join(f"{k}={v}" for k, v in result.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Measurement helpers for the benchmark suite.
+
+Every benchmark case runs in a freshly spawned process so its peak RSS is not
+polluted by earlier cases, and reports throughput and p50/p99 latency.
+"""
+
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SCRIPTS_DIR = os.path.join(ROOT, "scripts")
+DASHBOARD_DIR = os.path.join(ROOT, "streamlit-app")
+
+
+def use_path(directory):
+    """Put ``scripts/`` or ``streamlit-app/`` first on ``sys.path``.
+
+    Both directories have a ``metrics`` module, so a case only ever imports
+    from one of them.
+    """
+    if directory in sys.path:
+        sys.path.remove(directory)
+    sys.path.insert(0, directory)
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Recorder:
+    """Collect per-item latencies for one benchmark case."""
+
+    def __init__(self):
+        self.latencies = []
+        self.items = 0
+        self.started = time.perf_counter()
+
+    def time(self, items=1):
+        return _Timed(self, items)
+
+    def result(self, stage, case, **extra):
+        elapsed = time.perf_counter() - self.started
+        latencies = sorted(self.latencies)
+        return {
+            "stage": stage,
+            "case": case,
+            "items": self.items,
+            "elapsed_s": round(elapsed, 4),
+            "throughput_per_s": round(self.items / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 4),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 4),
+            **extra,
+        }
+
+
+class _Timed:
+    def __init__(self, recorder, items):
+        self.recorder = recorder
+        self.items = items
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.latencies.append(time.perf_counter() - self.start)
+        self.recorder.items += self.items
+        return False
+
+
+def _child(func, kwargs, queue):
+    try:
+        result = func(**kwargs)
+        result["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        queue.put(result)
+    except Exception as exc:  # reported in the results file rather than aborting the run
+        queue.put({
+            "stage": func.__name__.removeprefix("bench_"),
+            "case": " ".join(f"{k}={v}" for k, v in kwargs.items()),
+            "error": f"{type(exc).__name__}: {exc}",
+        })
+
+
+def run_isolated(func, **kwargs):
+    """Run ``func(**kwargs)`` in a spawned process and return its result dict."""
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_child, args=(func, kwargs, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def environment():
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                  capture_output=True, text=True).stdout.strip()
+    except OSError:
+        revision = ""
+    return {
+        "revision": revision,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def write_results(path, results):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+
+
+def compare(baseline_path, results, threshold=0.10):
+    """Return report lines for cases whose throughput or p99 regressed past ``threshold``."""
+    with open(baseline_path) as f:
+        baseline = {(r["stage"], r["case"]): r for r in json.load(f)["results"] if "error" not in r}
+
+    lines = []
+    for result in results:
+        old = baseline.get((result.get("stage"), result.get("case")))
+        if old is None or "error" in result:
+            continue
+        if old["throughput_per_s"] and result["throughput_per_s"] < old["throughput_per_s"] * (1 - threshold):
+            lines.append(f"{result['stage']}/{result['case']}: throughput "
+                         f"{old['throughput_per_s']} -> {result['throughput_per_s']}/s")
+        if old["p99_ms"] and result["p99_ms"] > old["p99_ms"] * (1 + threshold):
+            lines.append(f"{result['stage']}/{result['case']}: p99 "
+                         f"{old['p99_ms']} -> {result['p99_ms']} ms")
+    return lines
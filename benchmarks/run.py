@@ -0,0 +1,276 @@
+"""End-to-end benchmark suite.
+
+Runs on one box with local stand-ins for Kafka and (optionally) Postgres:
+
+* ``producer``  - event generation, stamping and serialization at a target rate
+* ``consumer``  - the prediction consumer's deserialize/score/serialize loop
+* ``sink``      - the Spark ``foreach_batch`` reduction and upsert
+  (``pipeline.sink_rows``, ``upsert_flights``) on batches with several
+  events per flight, against Postgres when ``--postgres-dsn`` is given,
+  otherwise an in-memory SQLite stand-in running the same statement
+* ``dashboard`` - ``process_flight_data`` and the map builders of both
+  Streamlit apps on synthetic frames
+
+Results (throughput, p50/p99 latency, peak RSS) go to a JSON file; pass
+``--baseline`` with an earlier file to flag regressions.
+
+    python benchmarks/run.py --stages producer consumer --output results.json
+    python benchmarks/run.py --stages dashboard --sizes 1000 10000 100000 1000000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from harness import (DASHBOARD_DIR, SCRIPTS_DIR, Recorder, compare, run_isolated,  # noqa: E402
+                     use_path, write_results)
+
+STAGES = ["producer", "consumer", "sink", "dashboard"]
+
+
+class MemoryProducer:
+    """Stand-in for ``KafkaProducer`` that serializes and keeps byte counts."""
+
+    def __init__(self, value_serializer):
+        self.value_serializer = value_serializer
+        self.bytes_sent = 0
+
+    def send(self, topic, value, headers=None):
+        self.bytes_sent += len(self.value_serializer(value))
+
+
+def bench_producer(events, rate, bootstrap=None):
+    use_path(SCRIPTS_DIR)
+    from producer import initial_state, next_event, serialize, stamp
+
+    if bootstrap:
+        from kafka import KafkaProducer
+        producer = KafkaProducer(bootstrap_servers=bootstrap, value_serializer=serialize)
+    else:
+        producer = MemoryProducer(serialize)
+
+    flights_state = initial_state()
+    recorder = Recorder()
+    interval = 1.0 / rate if rate else 0.0
+    next_send = time.perf_counter()
+    for _ in range(events):
+        if interval:
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            next_send += interval
+        with recorder.time():
+            flight, headers = stamp(next_event(flights_state))
+            producer.send("flights", flight, headers=headers)
+    if bootstrap:
+        producer.flush()
+    return recorder.result("producer", f"rate={rate or 'max'}", target_rate=rate,
+                           sink="kafka" if bootstrap else "memory")
+
+
+def bench_consumer(events):
+    use_path(SCRIPTS_DIR)
+    from producer import initial_state, next_event, serialize, stamp
+    from prediction_consumer import build_prediction
+
+    flights_state = initial_state()
+    messages = [serialize(stamp(next_event(flights_state))[0]) for _ in range(events)]
+    producer = MemoryProducer(lambda v: json.dumps(v).encode("utf-8"))
+
+    recorder = Recorder()
+    for message in messages:
+        with recorder.time():
+            event = json.loads(message.decode("utf-8"))
+            producer.send("predictions", build_prediction(event))
+    return recorder.result("consumer", f"events={events}")
+
+
+SQLITE_SCHEMA = """
+    CREATE TABLE flights (
+        flight_id TEXT PRIMARY KEY, origin TEXT, destination TEXT, status TEXT,
+        departure_time INTEGER, arrival_time INTEGER, produced_at INTEGER, sunk_at INTEGER
+    )
+"""
+
+POSTGRES_SCHEMA = """
+    CREATE TEMP TABLE flights (
+        flight_id TEXT PRIMARY KEY, origin TEXT, destination TEXT, status TEXT,
+        departure_time BIGINT, arrival_time BIGINT, produced_at BIGINT, sunk_at BIGINT
+    )
+"""
+
+
+def _sink_events(batch_size, fleet, rng):
+    """One micro-batch of accepted events: ``batch_size`` events of a random
+    flight each out of ``fleet``, as the producer picks them."""
+    from collections import namedtuple
+
+    Event = namedtuple("Event", "flight_id origin destination status departure_time arrival_time produced_at")
+    now = int(time.time())
+    return [
+        Event(f"FL{rng.randrange(fleet)}", [40.6413, -73.7781], [51.47, -0.4543],
+              rng.choice(["On Time", "Delayed", "Boarding"]), now, now + 7200, now * 1000 + i)
+        for i in range(batch_size)
+    ]
+
+
+def sqlite_upsert(conn, rows, page_size=1000):
+    """``upsert_flights`` on SQLite: ``UPSERT_SQL`` as one multi-row statement per page.
+
+    ``execute_values`` sends pages of ``page_size`` rows the same way.
+    Postgres refuses to update a row twice in one statement and SQLite does
+    not, so that rule is checked here.
+    """
+    import sqlite3
+
+    from pipeline import UPSERT_SQL
+
+    with conn:
+        for start in range(0, len(rows), page_size):
+            page = rows[start:start + page_size]
+            if len({row[0] for row in page}) < len(page):
+                raise sqlite3.IntegrityError("ON CONFLICT DO UPDATE command cannot affect row a second time")
+            values = ", ".join(["(" + ", ".join("?" * len(page[0])) + ")"] * len(page))
+            conn.execute(UPSERT_SQL.replace("%s", values), [value for row in page for value in row])
+
+
+def bench_sink(batch_size, batches, events_per_flight, postgres_dsn=None):
+    use_path(SCRIPTS_DIR)
+    import random
+
+    from pipeline import sink_rows, upsert_flights
+
+    rng = random.Random(0)
+    fleet = max(1, batch_size // events_per_flight)
+    recorder = Recorder()
+
+    if postgres_dsn:
+        # A temporary table shadows the real ``flights`` for this session only
+        import psycopg2
+
+        conn = psycopg2.connect(postgres_dsn)
+        with conn, conn.cursor() as cur:
+            cur.execute(POSTGRES_SCHEMA)
+        upsert, backend = upsert_flights, "postgres"
+    else:
+        import sqlite3
+
+        conn = sqlite3.connect(":memory:")
+        conn.execute(SQLITE_SCHEMA)
+        upsert, backend = sqlite_upsert, "sqlite-standin"
+
+    rows = 0
+    for _ in range(batches):
+        events = _sink_events(batch_size, fleet, rng)
+        # Events in, like foreach_batch: the per-flight reduction is part of the sink
+        with recorder.time(len(events)):
+            batch_rows = sink_rows(events, int(time.time() * 1000))
+            upsert(conn, batch_rows)
+        rows += len(batch_rows)
+    conn.close()
+
+    result = recorder.result("sink", f"{backend} batch={batch_size} events/flight={events_per_flight}",
+                             backend=backend, rows_per_batch=round(rows / batches))
+    result["latency_unit"] = "batch"
+    return result
+
+
+def bench_dashboard(app, function, rows, repeat):
+    use_path(DASHBOARD_DIR)
+    import importlib
+    import logging
+    import warnings
+
+    # The apps call st.* at import time; outside ``streamlit run`` those are
+    # no-ops that log a warning each.
+    logging.disable(logging.WARNING)
+    warnings.filterwarnings("ignore", category=UserWarning)
+    module = importlib.import_module(app)
+    from fixtures import synthetic_flights
+
+    raw = synthetic_flights(rows)
+    processed = module.process_flight_data(raw.copy())
+    target = getattr(module, function)
+
+    recorder = Recorder()
+    for _ in range(repeat):
+        frame = raw.copy() if function == "process_flight_data" else processed
+        with recorder.time(rows):
+            target(frame)
+    result = recorder.result("dashboard", f"{app}.{function} rows={rows}", rows=rows)
+    result["latency_unit"] = "call"
+    return result
+
+
+DASHBOARD_FUNCTIONS = {
+    "app": ["process_flight_data", "create_advanced_flight_map"],
+    "dashboard": ["process_flight_data", "create_interactive_flight_map"],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flights pipeline benchmark suite")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--output", default="benchmarks/results/latest.json")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--rates", type=int, nargs="+", default=[1000, 0],
+                        help="producer target events/sec (0 = as fast as possible)")
+    parser.add_argument("--bootstrap", help="send producer events to this Kafka instead of memory")
+    parser.add_argument("--postgres-dsn", help="benchmark the sink against this Postgres")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--events-per-flight", type=int, default=4,
+                        help="mean events of one flight in a sink micro-batch")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--map-max-rows", type=int, default=10000,
+                        help="skip the folium map builders above this frame size")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    cases = []
+    if "producer" in args.stages:
+        cases += [(bench_producer, dict(events=args.events, rate=rate, bootstrap=args.bootstrap))
+                  for rate in args.rates]
+    if "consumer" in args.stages:
+        cases.append((bench_consumer, dict(events=args.events)))
+    if "sink" in args.stages:
+        cases += [(bench_sink, dict(batch_size=size, batches=max(3, 50000 // size),
+                                    events_per_flight=args.events_per_flight,
+                                    postgres_dsn=args.postgres_dsn))
+                  for size in args.batch_sizes]
+    if "dashboard" in args.stages:
+        for app, functions in DASHBOARD_FUNCTIONS.items():
+            for function in functions:
+                for rows in args.sizes:
+                    if function != "process_flight_data" and rows > args.map_max_rows:
+                        continue
+                    cases.append((bench_dashboard, dict(app=app, function=function, rows=rows,
+                                                        repeat=args.repeat)))
+
+    results = []
+    for func, kwargs in cases:
+        result = run_isolated(func, **kwargs)
+        results.append(result)
+        if "error" in result:
+            print(f"{result['stage']:<10} {result['case']:<55} ERROR {result['error']}")
+        else:
+            print(f"{result['stage']:<10} {result['case']:<55} "
+                  f"{result['throughput_per_s']:>12.1f}/s  p50 {result['p50_ms']:>9.3f} ms  "
+                  f"p99 {result['p99_ms']:>9.3f} ms  rss {result['peak_rss_mb']:>7.1f} MB")
+
+    write_results(args.output, results)
+    print(f"results written to {args.output}")
+
+    if args.baseline:
+        regressions = compare(args.baseline, results)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
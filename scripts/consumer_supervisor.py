@@ -0,0 +1,250 @@
+"""Run the prediction consumer as a pool of processes scaled by consumer lag.
+
+Every worker is a ``prediction_consumer.run`` process in the same consumer
+group, so Kafka spreads the input topic's partitions over them. Every
+``--interval`` seconds the supervisor reads the group's committed offsets
+through the admin API and the partitions' end offsets, and derives:
+
+* lag: end minus committed offset, per partition and in total
+* throughput: committed offsets per second (events the group scored)
+* input rate: end offsets per second (events the producer wrote)
+
+The pool is sized to keep up with the input and clear the backlog within
+``--drain-seconds`` at the measured per-worker throughput, between
+``--min-workers`` and ``--max-workers``. It never exceeds the partition
+count, since extra group members would sit idle. Throughput only measures
+what the workers can do while they are behind, so the pool grows from it
+while lag is over ``--idle-lag``, and shrinks one worker at a time once
+lag has stayed under it for two samples. Every change rebalances the group
+and pauses consumption, so no change is made within ``--cooldown`` seconds
+of the last one. Workers that die are restarted.
+
+Lag, throughput and the worker count are served on port 1238; each worker
+serves its own consumer metrics on ``--worker-ports-from`` + its slot.
+
+    python consumer_supervisor.py --bootstrap broker:29092 --min-workers 1 --max-workers 6
+"""
+
+import argparse
+import logging
+import math
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from dataclasses import dataclass
+
+from kafka import KafkaConsumer, TopicPartition
+from kafka.admin import KafkaAdminClient
+
+from metrics import (CONSUMER_LAG, CONSUMER_PORT, CONSUMER_THROUGHPUT, CONSUMER_WORKERS, ERRORS,
+                     start_metrics_server)
+from prediction_consumer import BOOTSTRAP_SERVERS, GROUP_ID, INPUT_TOPIC, OUTPUT_TOPIC
+
+log = logging.getLogger("consumer_supervisor")
+
+WORKER_PORTS_FROM = 1250
+
+
+@dataclass
+class LagSample:
+    at: float
+    committed: dict
+    end: dict
+
+    @property
+    def lag(self):
+        return {p: max(0, end - self.committed.get(p, 0)) for p, end in self.end.items()}
+
+    @property
+    def total_lag(self):
+        return sum(self.lag.values())
+
+    def rates(self, previous):
+        """Committed (scored) and end (produced) offsets per second since ``previous``."""
+        elapsed = max(1e-9, self.at - previous.at)
+        return ((sum(self.committed.values()) - sum(previous.committed.values())) / elapsed,
+                (sum(self.end.values()) - sum(previous.end.values())) / elapsed)
+
+
+def committed_offsets(admin, group_id):
+    """Committed offset per ``TopicPartition`` of ``group_id``."""
+    # kafka-python 3 renamed list_consumer_group_offsets
+    if hasattr(admin, "list_group_offsets"):
+        offsets = admin.list_group_offsets({group_id: None})[group_id]
+    else:
+        offsets = admin.list_consumer_group_offsets(group_id)
+    return {tp: meta.offset for tp, meta in offsets.items() if meta.offset >= 0}
+
+
+class LagMonitor:
+    """Samples the lag of one consumer group on one topic."""
+
+    def __init__(self, bootstrap_servers, group_id, topic):
+        self.group_id = group_id
+        self.topic = topic
+        self.admin = KafkaAdminClient(bootstrap_servers=bootstrap_servers)
+        # Group-less, so reading end offsets never joins the workers' group
+        self.offsets = KafkaConsumer(bootstrap_servers=bootstrap_servers)
+
+    def partitions(self):
+        return [TopicPartition(self.topic, p) for p in sorted(self.offsets.partitions_for_topic(self.topic) or ())]
+
+    def sample(self):
+        partitions = self.partitions()
+        end = self.offsets.end_offsets(partitions)
+        committed = committed_offsets(self.admin, self.group_id)
+        sample = LagSample(time.time(), {tp: committed.get(tp, 0) for tp in partitions}, end)
+        for tp, lag in sample.lag.items():
+            CONSUMER_LAG.labels(group=self.group_id, topic=tp.topic, partition=str(tp.partition)).set(lag)
+        return sample
+
+    def close(self):
+        self.offsets.close()
+        self.admin.close()
+
+
+@dataclass
+class ScalingPolicy:
+    min_workers: int = 1
+    max_workers: int = 4
+    drain_seconds: float = 60.0
+    idle_lag: int = 1000
+    cooldown: float = 30.0
+
+    def desired(self, workers, partitions, previous, sample):
+        """Worker count for the group after ``sample``, given the one before it."""
+        upper = max(self.min_workers, min(self.max_workers, partitions or self.max_workers))
+        current = min(max(workers, self.min_workers), upper)
+        if sample.total_lag <= self.idle_lag:
+            # Caught up, so throughput only follows the input: shrink while it stays so
+            if previous.total_lag <= self.idle_lag:
+                return max(current - 1, self.min_workers)
+            return current
+
+        throughput, input_rate = sample.rates(previous)
+        if workers == 0 or throughput <= 0:
+            # Nothing measured yet (starting up or rebalancing)
+            return current
+        # Behind, so every worker is busy and throughput is what the pool can do
+        needed = max(0.0, input_rate) + sample.total_lag / self.drain_seconds
+        return max(current, min(math.ceil(needed / (throughput / workers)), upper))
+
+
+def _exit(signum, frame):
+    # SystemExit runs the consumer's cleanup, so it leaves the group at once
+    sys.exit(0)
+
+
+def worker(bootstrap_servers, group_id, input_topic, output_topic, metrics_port):
+    """Entry point of one worker process."""
+    import prediction_consumer
+
+    os.environ["METRICS_PORT"] = str(metrics_port)
+    signal.signal(signal.SIGTERM, _exit)
+    logging.basicConfig(level=logging.INFO, format=f"%(asctime)s %(name)s[{metrics_port}] %(message)s")
+    prediction_consumer.run(bootstrap_servers, input_topic, output_topic, group_id)
+
+
+class Supervisor:
+    """Keeps a pool of consumer processes at the size the policy asks for."""
+
+    def __init__(self, bootstrap_servers=BOOTSTRAP_SERVERS, group_id=GROUP_ID, input_topic=INPUT_TOPIC,
+                 output_topic=OUTPUT_TOPIC, policy=None, worker_ports_from=WORKER_PORTS_FROM):
+        self.bootstrap_servers = bootstrap_servers
+        self.group_id = group_id
+        self.input_topic = input_topic
+        self.output_topic = output_topic
+        self.policy = policy or ScalingPolicy()
+        self.worker_ports_from = worker_ports_from
+        self.context = multiprocessing.get_context("spawn")
+        self.workers = {}
+        self.changed_at = 0.0
+
+    def _start(self, slot):
+        process = self.context.Process(
+            target=worker, name=f"prediction-consumer-{slot}",
+            args=(self.bootstrap_servers, self.group_id, self.input_topic, self.output_topic,
+                  self.worker_ports_from + slot))
+        process.start()
+        self.workers[slot] = process
+
+    def _stop(self, slot, timeout=30):
+        process = self.workers.pop(slot)
+        process.terminate()
+        process.join(timeout)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+    def restart_dead(self):
+        for slot, process in list(self.workers.items()):
+            if not process.is_alive():
+                ERRORS.labels(component="consumer_supervisor").inc()
+                log.warning("worker %d exited with %s, restarting", slot, process.exitcode)
+                self._start(slot)
+
+    def scale_to(self, count):
+        """Start or stop workers (highest slots first) until ``count`` run."""
+        if count == len(self.workers):
+            return
+        log.info("scaling from %d to %d workers", len(self.workers), count)
+        for slot in range(count):
+            if slot not in self.workers:
+                self._start(slot)
+        for slot in sorted(self.workers, reverse=True):
+            if slot >= count:
+                self._stop(slot)
+        self.changed_at = time.monotonic()
+        CONSUMER_WORKERS.labels(group=self.group_id).set(count)
+
+    def run(self, interval=10.0):
+        start_metrics_server(CONSUMER_PORT)
+        monitor = LagMonitor(self.bootstrap_servers, self.group_id, self.input_topic)
+        self.scale_to(self.policy.min_workers)
+        previous = monitor.sample()
+        try:
+            while True:
+                time.sleep(interval)
+                self.restart_dead()
+                try:
+                    sample = monitor.sample()
+                except Exception:
+                    ERRORS.labels(component="consumer_supervisor").inc()
+                    log.exception("failed to read the lag of %s", self.group_id)
+                    continue
+
+                throughput, _ = sample.rates(previous)
+                CONSUMER_THROUGHPUT.labels(group=self.group_id).set(max(0.0, throughput))
+                workers = len(self.workers)
+                desired = self.policy.desired(workers, len(sample.end), previous, sample)
+                log.info("lag %d over %d partitions, %.0f events/s with %d workers",
+                         sample.total_lag, len(sample.end), throughput, workers)
+                if desired != workers and time.monotonic() - self.changed_at >= self.policy.cooldown:
+                    self.scale_to(desired)
+                previous = sample
+        finally:
+            self.scale_to(0)
+            monitor.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a lag-scaled pool of prediction consumers")
+    parser.add_argument("--bootstrap", default=BOOTSTRAP_SERVERS)
+    parser.add_argument("--group-id", default=GROUP_ID)
+    parser.add_argument("--input-topic", default=INPUT_TOPIC)
+    parser.add_argument("--output-topic", default=OUTPUT_TOPIC)
+    parser.add_argument("--min-workers", type=int, default=1)
+    parser.add_argument("--max-workers", type=int, default=4)
+    parser.add_argument("--interval", type=float, default=10.0, help="seconds between lag samples")
+    parser.add_argument("--drain-seconds", type=float, default=60.0, help="clear the backlog within this long")
+    parser.add_argument("--idle-lag", type=int, default=1000, help="only shrink the pool below this total lag")
+    parser.add_argument("--cooldown", type=float, default=30.0, help="seconds between pool size changes")
+    parser.add_argument("--worker-ports-from", type=int, default=WORKER_PORTS_FROM)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    policy = ScalingPolicy(args.min_workers, args.max_workers, args.drain_seconds, args.idle_lag, args.cooldown)
+    Supervisor(args.bootstrap, args.group_id, args.input_topic, args.output_topic, policy,
+               args.worker_ports_from).run(args.interval)
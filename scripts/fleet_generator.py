@@ -0,0 +1,290 @@
+"""Seedable, vectorized generator for large synthetic flight schedules.
+
+Unlike ``producer.py``'s eight fixed routes, flights here come from:
+
+* an airport catalogue of major hubs with relative traffic weights
+* a gravity-model route network (traffic ~ weight_a * weight_b / distance^k)
+* departure waves by local hour of day
+* status sequences that follow ``lifecycle.TRANSITIONS``
+  (On Time -> [Delayed] -> Boarding -> In Air -> Arrived, or Cancelled)
+  with a long-tailed delay distribution
+
+Every step is NumPy over whole arrays, so a million flights (~5M events)
+take seconds. Events have the same fields as the producer's and can be
+written to Parquet/JSON lines or sent to Kafka.
+
+    python fleet_generator.py --flights 1000000 --output flights.parquet
+    python fleet_generator.py --flights 50000 --bootstrap localhost:9092
+"""
+
+import argparse
+import json
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger("fleet_generator")
+
+# IATA code, latitude, longitude, relative traffic weight
+AIRPORTS = [
+    ("ATL", 33.6407, -84.4277, 104), ("DFW", 32.8998, -97.0403, 82), ("DEN", 39.8561, -104.6737, 78),
+    ("ORD", 41.9742, -87.9073, 74), ("LAX", 33.9416, -118.4085, 75), ("JFK", 40.6413, -73.7781, 62),
+    ("LAS", 36.0840, -115.1537, 57), ("MCO", 28.4312, -81.3081, 57), ("MIA", 25.7959, -80.2870, 52),
+    ("SFO", 37.6213, -122.3790, 50), ("SEA", 47.4502, -122.3088, 50), ("YYZ", 43.6777, -79.6248, 45),
+    ("MEX", 19.4361, -99.0719, 48), ("GRU", -23.4356, -46.4731, 41), ("BOG", 4.7016, -74.1469, 38),
+    ("SCL", -33.3930, -70.7858, 24), ("EZE", -34.8222, -58.5358, 13), ("LIM", -12.0241, -77.1120, 24),
+    ("LHR", 51.4700, -0.4543, 79), ("CDG", 49.0097, 2.5479, 67), ("AMS", 52.3105, 4.7683, 62),
+    ("FRA", 50.0379, 8.5622, 59), ("MAD", 40.4983, -3.5676, 60), ("BCN", 41.2974, 2.0833, 50),
+    ("IST", 41.2753, 28.7519, 76), ("FCO", 41.8003, 12.2389, 40), ("MUC", 48.3537, 11.7750, 37),
+    ("ZRH", 47.4582, 8.5555, 29), ("CPH", 55.6180, 12.6508, 27), ("SVO", 55.9726, 37.4146, 40),
+    ("DXB", 25.2532, 55.3657, 87), ("DOH", 25.2731, 51.6080, 46), ("JED", 21.6796, 39.1565, 42),
+    ("CAI", 30.1219, 31.4056, 28), ("JNB", -26.1367, 28.2411, 21), ("ADD", 8.9779, 38.7993, 13),
+    ("NBO", -1.3192, 36.9278, 9), ("LOS", 6.5774, 3.3212, 8), ("DEL", 28.5562, 77.1000, 73),
+    ("BOM", 19.0896, 72.8656, 52), ("BLR", 13.1986, 77.7066, 37), ("SIN", 1.3644, 103.9915, 59),
+    ("BKK", 13.6900, 100.7501, 52), ("KUL", 2.7456, 101.7099, 47), ("CGK", -6.1256, 106.6559, 53),
+    ("MNL", 14.5086, 121.0194, 45), ("HKG", 22.3080, 113.9185, 40), ("PEK", 40.0799, 116.6031, 53),
+    ("PVG", 31.1443, 121.8083, 54), ("CAN", 23.3924, 113.2988, 63), ("SZX", 22.6393, 113.8107, 52),
+    ("CTU", 30.5785, 103.9471, 45), ("ICN", 37.4602, 126.4407, 56), ("HND", 35.5494, 139.7798, 78),
+    ("NRT", 35.7720, 140.3929, 33), ("TPE", 25.0797, 121.2342, 35), ("SYD", -33.9399, 151.1753, 41),
+    ("MEL", -37.6690, 144.8410, 35), ("AKL", -37.0082, 174.7850, 19), ("HNL", 21.3245, -157.9251, 21),
+]
+
+AIRLINES = ["SK", "AE", "BW", "NB", "CX", "QF", "LH", "AF", "UA", "EK"]
+
+# Relative departures per local hour: morning and evening banks, quiet nights
+HOURLY_WAVES = np.array([
+    0.3, 0.2, 0.1, 0.1, 0.2, 0.8, 2.2, 3.0, 2.8, 2.3, 2.0, 2.0,
+    2.1, 2.0, 1.9, 2.0, 2.3, 2.7, 2.9, 2.5, 1.9, 1.4, 0.9, 0.5,
+])
+
+CRUISE_KMH = 820.0
+TAXI_AND_CLIMB_S = 1800
+CANCEL_RATE = 0.015
+DELAY_RATE = 0.22           # share of flights with a noticeable (>15 min) delay
+DELAY_MEAN_S = 45 * 60      # mean of the exponential tail of those delays
+
+STATUS_ORDER = ["On Time", "Delayed", "Boarding", "In Air", "Arrived", "Cancelled"]
+EVENT_COLUMNS = ["event_time", "flight_id", "origin_lat", "origin_lon", "dest_lat", "dest_lon",
+                 "status", "departure_time", "arrival_time"]
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = (np.radians(v) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0 * np.arcsin(np.sqrt(a))
+
+
+class FleetGenerator:
+    """Route network plus vectorized schedule and event generation."""
+
+    def __init__(self, seed=0, airports=AIRPORTS, routes=1500, gravity_exponent=1.2, min_km=300):
+        self.rng = np.random.default_rng(seed)
+        self.codes = np.array([a[0] for a in airports])
+        self.lat = np.array([a[1] for a in airports])
+        self.lon = np.array([a[2] for a in airports])
+        weight = np.array([a[3] for a in airports], dtype=np.float64)
+
+        # Gravity model over every ordered airport pair, keep the strongest routes
+        origin, destination = np.meshgrid(np.arange(len(airports)), np.arange(len(airports)), indexing="ij")
+        origin, destination = origin.ravel(), destination.ravel()
+        distance = haversine_km(self.lat[origin], self.lon[origin], self.lat[destination], self.lon[destination])
+        usable = (origin != destination) & (distance >= min_km)
+        gravity = np.where(usable, weight[origin] * weight[destination] / np.maximum(distance, 1) ** gravity_exponent, 0)
+        keep = np.argsort(gravity)[::-1][:routes]
+        keep = keep[gravity[keep] > 0]
+
+        self.route_origin = origin[keep]
+        self.route_destination = destination[keep]
+        self.route_km = distance[keep]
+        self.route_p = gravity[keep] / gravity[keep].sum()
+
+    def schedule(self, flights, start=None, hours=24, first_id=0):
+        """One row per flight departing in ``[start, start + hours)``."""
+        rng = self.rng
+        start = int(time.time() if start is None else start)
+        route = rng.choice(len(self.route_p), flights, p=self.route_p)
+        origin, destination = self.route_origin[route], self.route_destination[route]
+
+        # Departure hour follows the waves in the origin's (solar) local time
+        day = rng.integers(0, max(1, -(-hours // 24)), flights)
+        local_hour = rng.choice(24, flights, p=HOURLY_WAVES / HOURLY_WAVES.sum())
+        utc_offset = np.round(self.lon[origin] / 15).astype(np.int64)
+        seconds = (day * 24 + local_hour - utc_offset) * 3600 + rng.integers(0, 3600, flights)
+        departure = start + np.mod(seconds, hours * 3600)
+
+        block = self.route_km[route] / CRUISE_KMH * 3600 + TAXI_AND_CLIMB_S
+        block = (block * (1 + rng.normal(0, 0.04, flights))).astype(np.int64)
+
+        # Most flights leave within a few minutes; a minority has a long-tailed delay
+        delayed = rng.random(flights) < DELAY_RATE
+        delay = np.where(delayed, 15 * 60 + rng.exponential(DELAY_MEAN_S, flights), rng.exponential(240, flights))
+        delay = delay.astype(np.int64)
+        cancelled = rng.random(flights) < CANCEL_RATE * (1 + delayed)
+
+        airline = rng.choice(len(AIRLINES), flights)
+        ids = np.char.add(np.array(AIRLINES)[airline], np.char.zfill((first_id + np.arange(flights)).astype(str), 6))
+
+        return pd.DataFrame({
+            "flight_id": ids,
+            "origin": self.codes[origin],
+            "destination": self.codes[destination],
+            "origin_lat": self.lat[origin],
+            "origin_lon": self.lon[origin],
+            "dest_lat": self.lat[destination],
+            "dest_lon": self.lon[destination],
+            "departure_time": departure,
+            "arrival_time": departure + block + delay,
+            "delay_s": delay,
+            "delayed": delayed,
+            "cancelled": cancelled,
+        })
+
+    def events(self, schedule):
+        """Status events for every flight in ``schedule``, ordered by ``event_time``.
+
+        ``departure_time`` stays the scheduled departure for every event of a
+        flight (the lifecycle validator rejects changes); delays show up as a
+        later ``arrival_time`` and later event times.
+        """
+        rng = self.rng
+        n = len(schedule)
+        departure = schedule["departure_time"].to_numpy()
+        delay = schedule["delay_s"].to_numpy()
+        delayed = schedule["delayed"].to_numpy()
+        cancelled = schedule["cancelled"].to_numpy()
+        arrival = schedule["arrival_time"].to_numpy()
+        scheduled_arrival = arrival - delay
+        actual_departure = departure + delay
+
+        parts = [
+            # Announced 2-6 hours ahead with the scheduled times
+            (np.arange(n), departure - rng.integers(2 * 3600, 6 * 3600, n), "On Time", scheduled_arrival),
+        ]
+        flown = np.flatnonzero(~cancelled)
+        late = np.flatnonzero(delayed & ~cancelled)
+        gone = np.flatnonzero(cancelled)
+        parts += [
+            (late, departure[late] - rng.integers(15 * 60, 90 * 60, len(late)), "Delayed", arrival[late]),
+            (gone, departure[gone] - rng.integers(0, 2 * 3600, len(gone)), "Cancelled", scheduled_arrival[gone]),
+            (flown, actual_departure[flown] - 1800, "Boarding", arrival[flown]),
+            (flown, actual_departure[flown], "In Air", arrival[flown]),
+            (flown, arrival[flown], "Arrived", arrival[flown]),
+        ]
+
+        rows = np.concatenate([p[0] for p in parts])
+        event_time = np.concatenate([p[1] for p in parts])
+        status_code = np.concatenate([np.full(len(p[0]), STATUS_ORDER.index(p[2]), np.int8) for p in parts])
+        event_arrival = np.concatenate([p[3] for p in parts])
+
+        order = np.lexsort((status_code, event_time))
+        rows, event_time, status_code, event_arrival = (a[order] for a in (rows, event_time, status_code, event_arrival))
+        return pd.DataFrame({
+            "event_time": event_time,
+            "flight_id": schedule["flight_id"].to_numpy()[rows],
+            "origin_lat": schedule["origin_lat"].to_numpy()[rows],
+            "origin_lon": schedule["origin_lon"].to_numpy()[rows],
+            "dest_lat": schedule["dest_lat"].to_numpy()[rows],
+            "dest_lon": schedule["dest_lon"].to_numpy()[rows],
+            "status": pd.Categorical.from_codes(status_code, STATUS_ORDER),
+            "departure_time": departure[rows],
+            "arrival_time": event_arrival,
+        })
+
+    def batches(self, flights, start=None, hours=24, batch_size=250000):
+        """Yield event frames for ``flights`` flights, ``batch_size`` flights at a time."""
+        for first in range(0, flights, batch_size):
+            schedule = self.schedule(min(batch_size, flights - first), start, hours, first_id=first)
+            yield self.events(schedule)
+
+
+def to_records(events):
+    """Producer-shaped dicts (origin/destination as ``[lat, lon]``) for ``events``."""
+    columns = {c: events[c].tolist() for c in EVENT_COLUMNS[1:]}
+    return [
+        {
+            "flight_id": flight_id,
+            "origin": [olat, olon],
+            "destination": [dlat, dlon],
+            "status": status,
+            "departure_time": departure,
+            "arrival_time": arrival,
+        }
+        for flight_id, olat, olon, dlat, dlon, status, departure, arrival in zip(*columns.values())
+    ]
+
+
+def write_events(events, path):
+    """Write events to Parquet (``.parquet``) or JSON lines (anything else)."""
+    if path.endswith(".parquet"):
+        events.to_parquet(path, index=False)
+    else:
+        with open(path, "a") as f:
+            for record in to_records(events):
+                f.write(json.dumps(record) + "\n")
+
+
+def send_events(events, producer, topic="flights"):
+    """Send events through a ``KafkaProducer`` keyed by flight id."""
+    for record in to_records(events):
+        produced_at = int(time.time() * 1000)
+        record["produced_at"] = produced_at
+        producer.send(topic, key=record["flight_id"].encode("utf-8"), value=record,
+                      headers=[("produced_at", str(produced_at).encode("utf-8"))])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic flight schedule")
+    parser.add_argument("--flights", type=int, default=100000)
+    parser.add_argument("--hours", type=int, default=24)
+    parser.add_argument("--start", type=int, help="epoch seconds of the first departure window (default: now)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--routes", type=int, default=1500)
+    parser.add_argument("--batch-size", type=int, default=250000, help="flights generated per batch")
+    parser.add_argument("--output", help="write events to this .parquet or .jsonl file")
+    parser.add_argument("--bootstrap", help="send events to this Kafka instead of a file")
+    parser.add_argument("--topic", default="flights")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    if not args.output and not args.bootstrap:
+        parser.error("one of --output or --bootstrap is required")
+
+    generator = FleetGenerator(seed=args.seed, routes=args.routes)
+    producer = None
+    if args.bootstrap:
+        from kafka import KafkaProducer
+        producer = KafkaProducer(bootstrap_servers=args.bootstrap, linger_ms=20, batch_size=256 * 1024,
+                                 value_serializer=lambda v: json.dumps(v).encode("utf-8"))
+
+    started = time.perf_counter()
+    total = 0
+    writer = None
+    for events in generator.batches(args.flights, args.start, args.hours, args.batch_size):
+        if producer:
+            send_events(events, producer, args.topic)
+        elif args.output.endswith(".parquet"):
+            # Stream batches into one file instead of holding every event in memory
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(events, preserve_index=False)
+            writer = writer or pq.ParquetWriter(args.output, table.schema)
+            writer.write_table(table)
+        else:
+            write_events(events, args.output)
+        total += len(events)
+        log.info("generated %d events", total)
+    if writer:
+        writer.close()
+    if producer:
+        producer.flush()
+
+    elapsed = time.perf_counter() - started
+    log.info("%d flights, %d events in %.1fs (%.0f flights/min)",
+             args.flights, total, elapsed, args.flights / elapsed * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Per-flight delay risk from the ``predictions`` topic.
+
+``prediction_consumer.py`` scores every flight event into ``predictions``,
+and nothing read them back. This query reads the predictions and writes the
+latest score of every flight into ``flights.delay_risk`` with one bulk
+``UPDATE`` per micro-batch, so the dashboards get the risk with the rows they
+already load.
+
+A score belongs to the event it was computed from, named by ``flight_id``
+and the event's ``produced_at``. The ``UPDATE`` only applies it while that
+event is the flight's row in Postgres. Those rows are what the sink wrote
+from the validated stream, so the risk follows the sink's view of which
+events were accepted without a second validator: dead-lettered events, and
+events the sink replaced with a newer one of the same micro-batch, never get
+a risk, and neither does a late score for an event the flight has moved
+past.
+
+The consumer can score an event before the sink has written it. Scores
+without a matching row wait in the driver and are retried with the next
+micro-batches, newest per flight, for up to ``wait`` seconds after the
+prediction; then they are dropped. Waiting scores are lost on a restart,
+and the flight's next event gets a new one. Predictions without
+``produced_at``, written by consumers older than this query, are dropped.
+
+Updated rows get a new ``sunk_at``, so dashboard snapshots pick them up as
+deltas.
+"""
+
+import logging
+import time
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from metrics import EVENTS, observe_latencies
+
+log = logging.getLogger("flight_risk")
+
+PREDICTIONS_TOPIC = "predictions"
+CHECKPOINT_DIR = "/data/checkpoints/flights-risk-scores"
+
+RISK_SQL = """
+    UPDATE flights
+    SET delay_risk = v.delay_risk, risk_at = v.risk_at, sunk_at = v.sunk_at
+    FROM (VALUES %s) AS v (flight_id, delay_risk, produced_at, risk_at, sunk_at)
+    WHERE flights.flight_id = v.flight_id AND flights.produced_at = v.produced_at
+    RETURNING flights.flight_id
+"""
+
+
+def prediction_schema():
+    """Schema of the JSON predictions on the ``predictions`` topic."""
+    from pyspark.sql.types import DoubleType, LongType, StringType, StructType
+
+    return StructType() \
+        .add("flight_id", StringType()) \
+        .add("prediction", DoubleType()) \
+        .add("produced_at", LongType()) \
+        .add("timestamp", LongType())
+
+
+def parse_predictions(raw):
+    """Predictions that name the event they scored, with their time in epoch ms."""
+    from pyspark.sql.functions import col, from_json
+
+    return raw.select(from_json(col("value").cast("string"), prediction_schema()).alias("p")).select(
+        col("p.flight_id").alias("flight_id"),
+        col("p.produced_at").alias("produced_at"),
+        col("p.prediction").alias("delay_risk"),
+        (col("p.timestamp") * 1000).alias("risk_at"),
+    ).where(col("flight_id").isNotNull() & col("produced_at").isNotNull()
+            & col("delay_risk").isNotNull() & col("risk_at").isNotNull())
+
+
+def latest_risk(batch_df):
+    """The score of the newest event of every flight in a micro-batch of predictions."""
+    from pyspark.sql.functions import max as max_, struct
+
+    return batch_df.groupBy("flight_id") \
+        .agg(max_(struct("produced_at", "risk_at", "delay_risk")).alias("latest")) \
+        .select("flight_id", "latest.delay_risk", "latest.produced_at", "latest.risk_at")
+
+
+class PendingScores:
+    """Scores not yet applied, newest event per flight, until ``wait`` seconds old."""
+
+    def __init__(self, wait=600.0):
+        self.wait = wait
+        self.scores = {}
+
+    def __len__(self):
+        return len(self.scores)
+
+    def add(self, scores):
+        """Add ``(flight_id, delay_risk, produced_at, risk_at)`` scores."""
+        for score in scores:
+            held = self.scores.get(score[0])
+            if held is None or held[2] <= score[2]:
+                self.scores[score[0]] = tuple(score)
+
+    def expire(self, now):
+        """Drop scores older than ``wait`` at ``now`` (epoch seconds); return how many."""
+        cutoff = (now - self.wait) * 1000
+        expired = [flight_id for flight_id, score in self.scores.items() if score[3] < cutoff]
+        for flight_id in expired:
+            del self.scores[flight_id]
+        return len(expired)
+
+    def rows(self, sunk_at):
+        """``RISK_SQL`` rows of every waiting score."""
+        return [(*score, sunk_at) for score in self.scores.values()]
+
+    def settle(self, flight_ids):
+        """Forget the scores of ``flight_ids`` and return them."""
+        return [self.scores.pop(flight_id) for flight_id in flight_ids if flight_id in self.scores]
+
+
+def update_risk(conn, rows):
+    """Write ``(flight_id, delay_risk, produced_at, risk_at, sunk_at)`` rows in one
+    transaction and return the ids of the flights whose row held the scored event."""
+    with conn, conn.cursor() as cur:
+        return {row[0] for row in execute_values(cur, RISK_SQL, rows, page_size=1000, fetch=True)}
+
+
+def make_risk_batch(postgres_dsn, wait=600.0):
+    """Build the micro-batch sink of the risk query."""
+    pending = PendingScores(wait)
+
+    def foreach_batch(df, epoch_id):
+        received = time.time()
+        pending.add(latest_risk(df).collect())
+        expired = pending.expire(received)
+        if expired:
+            log.info("dropped %d scores whose event was never sunk", expired)
+        if not pending:
+            return
+        rows = pending.rows(int(time.time() * 1000))
+        conn = psycopg2.connect(postgres_dsn)
+        try:
+            applied = pending.settle(update_risk(conn, rows))
+        finally:
+            conn.close()
+        EVENTS.labels(component="spark_risk").inc(len(applied))
+        observe_latencies("prediction_to_postgres", (received - score[3] / 1000 for score in applied))
+
+    return foreach_batch
+
+
+def start_risk_query(spark, bootstrap_servers, postgres_dsn, topic=PREDICTIONS_TOPIC,
+                     starting_offsets="latest", wait=600.0, trigger_interval="2 seconds",
+                     checkpoint_dir=CHECKPOINT_DIR):
+    """Start the streaming query that keeps ``flights.delay_risk`` current."""
+    raw = spark.readStream \
+        .format("kafka") \
+        .option("kafka.bootstrap.servers", bootstrap_servers) \
+        .option("subscribe", topic) \
+        .option("startingOffsets", starting_offsets) \
+        .option("failOnDataLoss", "false") \
+        .load()
+
+    return parse_predictions(raw).writeStream \
+        .foreachBatch(make_risk_batch(postgres_dsn, wait)) \
+        .option("checkpointLocation", checkpoint_dir) \
+        .trigger(processingTime=trigger_interval) \
+        .queryName("flights-risk") \
+        .start()
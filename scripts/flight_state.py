@@ -0,0 +1,210 @@
+"""Compacted per-flight state topic.
+
+The producer re-emits the full flight record on every status change, so the
+``flights`` topic is mostly repeated origin/destination payloads. This module
+keeps the latest record per ``flight_id`` in a stateful Spark stage and only
+forwards a record to ``flights-state`` when something actually changed. The
+state topic is log-compacted, so a new consumer can bootstrap the current
+fleet by reading one record per flight instead of replaying ``flights``.
+
+Run standalone from the Jupyter container::
+
+    python flight_state.py --bootstrap broker:29092
+"""
+
+import argparse
+import json
+
+import pandas as pd
+
+BOOTSTRAP_SERVERS = "broker:29092"
+SOURCE_TOPIC = "flights"
+STATE_TOPIC = "flights-state"
+CHECKPOINT_DIR = "/data/checkpoints/flights-state"
+
+# Fields that define a flight's state. A record whose values match the stored
+# state is a re-emission and is dropped.
+STATE_FIELDS = ["origin", "destination", "status", "departure_time", "arrival_time"]
+
+
+def flight_schema():
+    """Schema of the JSON events on the ``flights`` topic."""
+    from pyspark.sql.types import StructType, StringType, LongType
+
+    return StructType() \
+        .add("flight_id", StringType()) \
+        .add("origin", StringType()) \
+        .add("destination", StringType()) \
+        .add("status", StringType()) \
+        .add("departure_time", LongType()) \
+        .add("arrival_time", LongType()) \
+        .add("produced_at", LongType())
+
+
+def ensure_state_topic(bootstrap_servers=BOOTSTRAP_SERVERS, topic=STATE_TOPIC):
+    """Create the compacted state topic if it does not exist yet (see ``topics.py``)."""
+    from topics import ensure_topics, topic_spec
+
+    ensure_topics(bootstrap_servers, [topic_spec(topic, like=STATE_TOPIC)])
+
+
+def parse_flight_events(raw):
+    """Parse the raw Kafka frame into flight columns plus partition/offset.
+
+    The partition and offset are kept so stateful stages can apply the events
+    of one flight in the order they were produced. ``produced_at`` comes from
+    the Kafka header (falling back to the JSON body) and ``broker_time`` is the
+    record timestamp, both in epoch milliseconds. Read the topic with
+    ``includeHeaders`` enabled to get the header.
+    """
+    from pyspark.sql.functions import coalesce, col, expr, from_json
+
+    columns = set(raw.columns)
+    header_time = expr("filter(headers, h -> h.key = 'produced_at')[0].value") \
+        .cast("string").cast("long") if "headers" in columns else None
+
+    parsed = raw.select(
+        from_json(col("value").cast("string"), flight_schema()).alias("data"),
+        col("partition").alias("kafka_partition"),
+        col("offset").alias("kafka_offset"),
+        (col("timestamp").cast("double") * 1000).cast("long").alias("broker_time"),
+        *([header_time.alias("header_produced_at")] if header_time is not None else []),
+    )
+    produced_at = coalesce(col("header_produced_at"), col("data.produced_at")) \
+        if header_time is not None else col("data.produced_at")
+
+    return parsed.select(
+        "data.flight_id", "data.origin", "data.destination", "data.status",
+        "data.departure_time", "data.arrival_time",
+        produced_at.alias("produced_at"), "broker_time", "kafka_partition", "kafka_offset",
+    ).where(col("flight_id").isNotNull())
+
+
+def _plain(value):
+    """Convert a pandas/numpy scalar to the Python value GroupState accepts."""
+    if pd.isna(value):
+        return None
+    return value.item() if hasattr(value, "item") else value
+
+
+def _dedupe_group(key, batches, state):
+    """Emit the latest record for one flight if it differs from the stored state."""
+    events = pd.concat(list(batches)).sort_values(["kafka_partition", "kafka_offset"])
+    latest = events.iloc[-1]
+    current = tuple(_plain(latest[field]) for field in STATE_FIELDS)
+
+    if state.exists and tuple(state.get) == current:
+        return
+
+    state.update(current)
+    yield pd.DataFrame([{
+        "key": key[0],
+        "value": json.dumps({"flight_id": key[0], **dict(zip(STATE_FIELDS, current))}),
+    }])
+
+
+def fleet_state_stream(raw):
+    """Turn the raw Kafka ``flights`` stream into deduplicated state updates.
+
+    ``raw`` is the DataFrame returned by ``spark.readStream.format("kafka")``.
+    The result has the ``key``/``value`` string columns the Kafka sink expects.
+    """
+    from pyspark.sql.streaming.state import GroupStateTimeout
+    from pyspark.sql.types import StructType, StringType, LongType
+
+    events = parse_flight_events(raw)
+    output_schema = StructType().add("key", StringType()).add("value", StringType())
+    state_schema = StructType() \
+        .add("origin", StringType()) \
+        .add("destination", StringType()) \
+        .add("status", StringType()) \
+        .add("departure_time", LongType()) \
+        .add("arrival_time", LongType())
+
+    return events.groupBy("flight_id").applyInPandasWithState(
+        _dedupe_group,
+        outputStructType=output_schema,
+        stateStructType=state_schema,
+        outputMode="Append",
+        timeoutConf=GroupStateTimeout.NoTimeout,
+    )
+
+
+def start_state_query(spark, bootstrap_servers=BOOTSTRAP_SERVERS, source_topic=SOURCE_TOPIC,
+                      state_topic=STATE_TOPIC, checkpoint_dir=CHECKPOINT_DIR):
+    """Start the streaming query that maintains ``flights-state``."""
+    ensure_state_topic(bootstrap_servers, state_topic)
+
+    raw = spark.readStream \
+        .format("kafka") \
+        .option("kafka.bootstrap.servers", bootstrap_servers) \
+        .option("subscribe", source_topic) \
+        .option("startingOffsets", "earliest") \
+        .option("includeHeaders", "true") \
+        .load()
+
+    return fleet_state_stream(raw).writeStream \
+        .format("kafka") \
+        .option("kafka.bootstrap.servers", bootstrap_servers) \
+        .option("topic", state_topic) \
+        .option("checkpointLocation", checkpoint_dir) \
+        .outputMode("append") \
+        .queryName("flights-state") \
+        .start()
+
+
+def load_fleet_state(bootstrap_servers=BOOTSTRAP_SERVERS, topic=STATE_TOPIC, timeout_ms=1000):
+    """Read the compacted state topic once and return ``{flight_id: record}``.
+
+    Reads every partition from the beginning up to the end offsets seen at call
+    time, so the cost is proportional to the number of flights, not the length
+    of the ``flights`` history.
+    """
+    from kafka import KafkaConsumer, TopicPartition
+
+    consumer = KafkaConsumer(
+        bootstrap_servers=bootstrap_servers,
+        enable_auto_commit=False,
+        key_deserializer=lambda k: k.decode("utf-8") if k is not None else None,
+        value_deserializer=lambda v: json.loads(v.decode("utf-8")) if v is not None else None,
+    )
+    try:
+        partitions = [TopicPartition(topic, p) for p in consumer.partitions_for_topic(topic) or ()]
+        if not partitions:
+            return {}
+        consumer.assign(partitions)
+        consumer.seek_to_beginning(*partitions)
+        end_offsets = consumer.end_offsets(partitions)
+        remaining = {tp for tp in partitions if end_offsets[tp] > 0}
+
+        fleet = {}
+        while remaining:
+            polled = consumer.poll(timeout_ms=timeout_ms)
+            if not polled:
+                break
+            for tp, records in polled.items():
+                for record in records:
+                    if record.value is None:
+                        fleet.pop(record.key, None)
+                    else:
+                        fleet[record.key] = record.value
+                if consumer.position(tp) >= end_offsets[tp]:
+                    remaining.discard(tp)
+        return fleet
+    finally:
+        consumer.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the compacted flights-state topic")
+    parser.add_argument("--bootstrap", default=BOOTSTRAP_SERVERS)
+    parser.add_argument("--source-topic", default=SOURCE_TOPIC)
+    parser.add_argument("--state-topic", default=STATE_TOPIC)
+    parser.add_argument("--checkpoint", default=CHECKPOINT_DIR)
+    args = parser.parse_args()
+
+    from pyspark.sql import SparkSession
+
+    spark = SparkSession.builder.appName("FlightState").getOrCreate()
+    query = start_state_query(spark, args.bootstrap, args.source_topic, args.state_topic, args.checkpoint)
+    query.awaitTermination()
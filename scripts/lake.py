@@ -0,0 +1,101 @@
+"""Parquet lake of validated flight events for analytical scans.
+
+The sink appends every valid micro-batch to ``LAKE_DIR`` partitioned by the
+flight's departure ``date=YYYY-MM-DD/hour=H`` (UTC). A flight's departure
+time never changes, so all of its events land in one partition and the
+latest state of a flight can be resolved partition by partition.
+
+Streaming appends leave many small files behind. ``compact`` rewrites a
+partition into one file holding only the latest event per flight, sorted by
+departure time so row-group statistics prune time filters well. Only the
+files it read are removed, so it is safe to run while the sink keeps
+appending; readers deduplicate by flight anyway.
+
+    python lake.py compact --every 600
+"""
+
+import argparse
+import glob
+import logging
+import os
+import time
+import uuid
+
+log = logging.getLogger("lake")
+
+LAKE_DIR = "/app/shared_data/lake/flights"
+LAKE_COLUMNS = ["flight_id", "origin", "destination", "status", "departure_time", "arrival_time",
+                "produced_at", "sunk_at"]
+
+
+def write_lake(valid, root, sunk_at):
+    """Append the valid rows of a micro-batch to the lake (one file per partition)."""
+    from pyspark.sql.functions import col, date_format, hour, lit, timestamp_seconds
+
+    departure = timestamp_seconds(col("departure_time"))
+    valid.select(*LAKE_COLUMNS[:-1], lit(sunk_at).alias("sunk_at")) \
+        .withColumn("date", date_format(departure, "yyyy-MM-dd")) \
+        .withColumn("hour", hour(departure)) \
+        .repartition("date", "hour") \
+        .write \
+        .mode("append") \
+        .partitionBy("date", "hour") \
+        .parquet(root)
+
+
+def latest_events(table):
+    """Keep the newest event per flight of a pyarrow table (by produced_at, then sunk_at)."""
+    frame = table.to_pandas()
+    frame = frame.sort_values(["produced_at", "sunk_at"], kind="stable", na_position="first")
+    return frame.drop_duplicates("flight_id", keep="last")
+
+
+def compact_partition(directory, min_files=2):
+    """Rewrite ``directory`` as one deduplicated file; returns the number of files replaced."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    files = sorted(glob.glob(os.path.join(directory, "*.parquet")))
+    if len(files) < min_files:
+        return 0
+    latest = latest_events(pq.read_table(files, columns=LAKE_COLUMNS)).sort_values("departure_time")
+
+    name = f"part-compacted-{uuid.uuid4().hex}.parquet"
+    tmp = os.path.join(directory, f"_{name}.tmp")
+    pq.write_table(pa.Table.from_pandas(latest, preserve_index=False), tmp, row_group_size=128 * 1024)
+    os.replace(tmp, os.path.join(directory, name))
+    for path in files:
+        os.remove(path)
+    log.info("compacted %s: %d files -> 1 (%d flights)", directory, len(files), len(latest))
+    return len(files)
+
+
+def compact(root=LAKE_DIR, min_files=2):
+    """Compact every partition of the lake with at least ``min_files`` files."""
+    replaced = 0
+    for directory in sorted(glob.glob(os.path.join(root, "date=*", "hour=*"))):
+        replaced += compact_partition(directory, min_files)
+    return replaced
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the flights Parquet lake")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("compact", help="merge small files and drop superseded events")
+    run.add_argument("--path", default=LAKE_DIR)
+    run.add_argument("--min-files", type=int, default=2)
+    run.add_argument("--every", type=float, default=0, help="repeat every N seconds (0 = once)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    while True:
+        started = time.perf_counter()
+        replaced = compact(args.path, args.min_files)
+        log.info("replaced %d files in %.1fs", replaced, time.perf_counter() - started)
+        if not args.every:
+            break
+        time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    main()
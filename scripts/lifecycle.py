@@ -0,0 +1,174 @@
+"""Flight lifecycle validation.
+
+Replayed recordings and older producers picked the next status at random and
+random-walked the arrival time, so the raw stream can contain flights that go
+"Arrived" -> "Boarding" or land before they take off. This module enforces
+legal status transitions per ``flight_id`` and routes everything else to a
+dead-letter topic, so the sink only stores events the dashboards' phase and
+progress math can trust.
+
+The state kept per flight is a single int: the departure time shifted left by
+three bits with the status code in the low bits.
+"""
+
+import time
+
+import pandas as pd
+
+DEAD_LETTER_TOPIC = "flights-dlq"
+
+STATUSES = ["On Time", "Delayed", "Boarding", "In Air", "Arrived", "Cancelled"]
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+ON_TIME, DELAYED, BOARDING, IN_AIR, ARRIVED, CANCELLED = range(len(STATUSES))
+
+# Allowed next statuses for each status. Repeating the current status is
+# always legal because the producer re-emits unchanged flights.
+TRANSITIONS = {
+    ON_TIME: {ON_TIME, DELAYED, BOARDING, CANCELLED},
+    DELAYED: {DELAYED, ON_TIME, BOARDING, CANCELLED},
+    BOARDING: {BOARDING, DELAYED, IN_AIR, CANCELLED},
+    IN_AIR: {IN_AIR, ARRIVED},
+    ARRIVED: {ARRIVED},
+    CANCELLED: {CANCELLED},
+}
+
+# TRANSITIONS as one bitmask per status, indexed by status code.
+_ALLOWED = [sum(1 << nxt for nxt in TRANSITIONS[code]) for code in range(len(STATUSES))]
+
+OUTPUT_COLUMNS = ["flight_id", "origin", "destination", "status", "departure_time",
+                  "arrival_time", "produced_at", "broker_time", "violation"]
+
+_STATUS_BITS = 3
+_STATUS_MASK = (1 << _STATUS_BITS) - 1
+
+
+def advance(packed, status, departure_time, arrival_time):
+    """Apply one event to a flight's packed state.
+
+    ``packed`` is ``None`` for a flight seen for the first time. Returns
+    ``(new_packed, violation)``; on a violation the state is left unchanged
+    and ``violation`` names the rule that was broken.
+    """
+    code = STATUS_CODES.get(status)
+    if code is None:
+        return packed, "unknown_status"
+    if departure_time is None or arrival_time is None:
+        return packed, "missing_time"
+    if arrival_time < departure_time:
+        return packed, "arrival_before_departure"
+
+    if packed is not None:
+        previous = packed & _STATUS_MASK
+        if not _ALLOWED[previous] >> code & 1:
+            return packed, f"illegal_transition:{STATUSES[previous]}->{status}"
+        if packed >> _STATUS_BITS != departure_time:
+            return packed, "departure_changed"
+
+    return departure_time << _STATUS_BITS | code, None
+
+
+class FlightLifecycle:
+    """In-memory lifecycle state for every flight seen so far."""
+
+    def __init__(self):
+        self.state = {}
+
+    def check(self, event):
+        """Validate ``event`` and update its flight's state; return the violation or ``None``."""
+        flight_id = event.get("flight_id")
+        if flight_id is None:
+            return "missing_flight_id"
+        packed, violation = advance(
+            self.state.get(flight_id),
+            event.get("status"),
+            event.get("departure_time"),
+            event.get("arrival_time"),
+        )
+        if violation is None:
+            self.state[flight_id] = packed
+        return violation
+
+    def status(self, flight_id):
+        packed = self.state.get(flight_id)
+        return None if packed is None else STATUSES[packed & _STATUS_MASK]
+
+
+def _validate_group(key, batches, state):
+    """applyInPandasWithState function: tag each event of one flight with its violation.
+
+    Works on plain lists rather than pandas operations: the function runs once
+    per flight per micro-batch, so fixed pandas overhead dominates otherwise.
+    """
+    batches = list(batches)
+    events = batches[0] if len(batches) == 1 else pd.concat(batches, ignore_index=True)
+    columns = {name: events[name].tolist() for name in OUTPUT_COLUMNS[:-1]}
+
+    order = range(len(events))
+    if len(events) > 1:
+        offsets = list(zip(events["kafka_partition"].tolist(), events["kafka_offset"].tolist()))
+        order = sorted(order, key=offsets.__getitem__)
+        columns = {name: [values[i] for i in order] for name, values in columns.items()}
+
+    packed = state.get[0] if state.exists else None
+    violations = []
+    for status, departure_time, arrival_time in zip(
+            columns["status"], columns["departure_time"], columns["arrival_time"]):
+        packed, violation = advance(
+            packed,
+            status,
+            None if departure_time != departure_time else int(departure_time),
+            None if arrival_time != arrival_time else int(arrival_time),
+        )
+        violations.append(violation)
+
+    if packed is not None:
+        state.update((packed,))
+    columns["violation"] = violations
+    yield pd.DataFrame(columns)
+
+
+def validate_lifecycle(events):
+    """Add a ``violation`` column to a parsed flight stream.
+
+    ``events`` is the output of ``flight_state.parse_flight_events``. Rows with
+    a null ``violation`` are legal; the rest belong in the dead-letter topic.
+    """
+    from pyspark.sql.streaming.state import GroupStateTimeout
+    from pyspark.sql.types import StructType, StringType, LongType
+
+    output_schema = StructType() \
+        .add("flight_id", StringType()) \
+        .add("origin", StringType()) \
+        .add("destination", StringType()) \
+        .add("status", StringType()) \
+        .add("departure_time", LongType()) \
+        .add("arrival_time", LongType()) \
+        .add("produced_at", LongType()) \
+        .add("broker_time", LongType()) \
+        .add("violation", StringType())
+    state_schema = StructType().add("packed", LongType())
+
+    return events.groupBy("flight_id").applyInPandasWithState(
+        _validate_group,
+        outputStructType=output_schema,
+        stateStructType=state_schema,
+        outputMode="Append",
+        timeoutConf=GroupStateTimeout.NoTimeout,
+    )
+
+
+def write_dead_letters(batch_df, bootstrap_servers, topic=DEAD_LETTER_TOPIC):
+    """Write the rejected rows of a micro-batch to the dead-letter topic."""
+    from pyspark.sql.functions import col, lit, struct, to_json
+
+    rejected = batch_df.where(col("violation").isNotNull())
+    rejected.select(
+        col("flight_id").alias("key"),
+        to_json(struct(*batch_df.columns, lit(int(time.time())).alias("rejected_at"))).alias("value"),
+    ).write \
+        .format("kafka") \
+        .option("kafka.bootstrap.servers", bootstrap_servers) \
+        .option("topic", topic) \
+        .save()
+
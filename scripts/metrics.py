@@ -0,0 +1,90 @@
+"""Prometheus metrics for the Python pipeline components.
+
+The JVM services export through ``jmx-exporter``; the Python processes serve
+their own ``/metrics`` endpoint on the ports below, next to the JMX ones
+(broker 1234, connect 1235).
+"""
+
+import os
+
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+PRODUCER_PORT = 1236
+PIPELINE_PORT = 1237
+CONSUMER_PORT = 1238
+
+# Latency buckets span sub-second hops up to flights that sat unchanged in
+# Postgres for an hour.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+                   30, 60, 120, 300, 600, 1800, 3600)
+
+STAGE_LATENCY = Histogram(
+    "flights_stage_latency_seconds",
+    "Latency of flight events per pipeline stage",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+
+EVENTS = Counter("flights_events", "Events handled", ["component"])
+ERRORS = Counter("flights_errors", "Errors raised while handling events", ["component"])
+
+# Per-event operations (serialize, send, score, ...) take microseconds to a
+# few milliseconds; a blocked send can take seconds.
+OPERATION_SECONDS = Histogram(
+    "flights_operation_seconds",
+    "Time spent per operation",
+    ["component", "operation"],
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+             0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+CONSUMER_LAG = Gauge(
+    "flights_consumer_lag",
+    "Messages between the consumer position and the partition high watermark",
+    ["group", "topic", "partition"],
+)
+
+CONSUMER_WORKERS = Gauge(
+    "flights_consumer_workers",
+    "Prediction consumer processes run by the supervisor",
+    ["group"],
+)
+
+CONSUMER_THROUGHPUT = Gauge(
+    "flights_consumer_throughput",
+    "Events per second committed by the consumer group",
+    ["group"],
+)
+
+_started_ports = set()
+
+
+def start_metrics_server(default_port):
+    """Serve ``/metrics`` on ``$METRICS_PORT`` or ``default_port`` (once per process)."""
+    port = int(os.environ.get("METRICS_PORT", default_port))
+    if port not in _started_ports:
+        start_http_server(port)
+        _started_ports.add(port)
+    return port
+
+
+def observe_latencies(stage, seconds, limit=1000):
+    """Record a batch of latencies, sampling evenly when the batch is large."""
+    seconds = list(seconds)
+    step = max(1, len(seconds) // limit)
+    histogram = STAGE_LATENCY.labels(stage=stage)
+    for value in seconds[::step]:
+        histogram.observe(max(0.0, value))
+
+
+def update_consumer_lag(consumer, group):
+    """Set the lag gauge for every partition assigned to ``consumer``."""
+    total = 0
+    for tp in consumer.assignment():
+        highwater = consumer.highwater(tp)
+        if highwater is None:
+            continue
+        lag = max(0, highwater - consumer.position(tp))
+        CONSUMER_LAG.labels(group=group, topic=tp.topic, partition=str(tp.partition)).set(lag)
+        total += lag
+    return total
@@ -0,0 +1,283 @@
+"""Configurable entry point for the flights streaming job.
+
+Replaces the inline job in ``spark.ipynb``. All micro-batch tuning knobs are
+command line options, and per-batch progress from ``query.lastProgress`` is
+logged so the trigger interval and batch size can be tuned against end-to-end
+latency and throughput.
+
+    python pipeline.py --trigger "1 second" --max-offsets-per-trigger 5000
+
+Valid events are also appended to the Parquet lake (see ``lake.py``) for
+the dashboards' analytical scans; ``--lake-dir ""`` turns that off.
+
+With ``--with-risk`` a second query applies the ``predictions`` topic to
+the rows this sink wrote and keeps ``flights.delay_risk`` current (see
+``flight_risk.py``).
+
+With ``--source parquet`` the job reads a recording made by ``replay.py``
+as a file stream instead of the Kafka topic, for repeatable load tests.
+
+Note that Spark stores the shuffle partition count in the checkpoint of a
+stateful query. Changing ``--shuffle-partitions`` needs a fresh
+``--checkpoint`` directory.
+"""
+
+import argparse
+import logging
+import os
+import time
+from dataclasses import dataclass, fields
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from flight_risk import start_risk_query
+from flight_state import parse_flight_events, start_state_query
+from lake import LAKE_DIR, write_lake
+from lifecycle import DEAD_LETTER_TOPIC, validate_lifecycle, write_dead_letters
+from metrics import EVENTS, PIPELINE_PORT, STAGE_LATENCY, observe_latencies, start_metrics_server
+from replay import REPLAY_DIR, replay_stream
+from topics import ensure_topics, topic_spec
+
+log = logging.getLogger("pipeline")
+
+SCHEMA_SQL = """
+    ALTER TABLE flights
+        ADD COLUMN IF NOT EXISTS produced_at BIGINT,
+        ADD COLUMN IF NOT EXISTS sunk_at BIGINT,
+        ADD COLUMN IF NOT EXISTS delay_risk REAL,
+        ADD COLUMN IF NOT EXISTS risk_at BIGINT;
+    CREATE INDEX IF NOT EXISTS flights_sunk_at_idx ON flights (sunk_at)
+"""
+
+UPSERT_SQL = """
+    INSERT INTO flights (flight_id, origin, destination, status, departure_time, arrival_time,
+                         produced_at, sunk_at)
+    VALUES %s
+    ON CONFLICT (flight_id) DO UPDATE
+    SET status = EXCLUDED.status, arrival_time = EXCLUDED.arrival_time,
+        produced_at = EXCLUDED.produced_at, sunk_at = EXCLUDED.sunk_at
+"""
+
+
+@dataclass
+class PipelineConfig:
+    bootstrap_servers: str = "broker:29092"
+    topic: str = "flights"
+    starting_offsets: str = "latest"
+    checkpoint_dir: str = "/data/checkpoints/flights-sink"
+    postgres_dsn: str = "dbname=flights_project user=admin password=admin host=postgres_general"
+
+    # "kafka" or "parquet" (a replay.py recording read as a file stream)
+    source: str = "kafka"
+    replay_path: str = REPLAY_DIR
+    max_files_per_trigger: int = 0
+
+    lake_dir: str = LAKE_DIR  # "" disables the Parquet lake
+
+    # Micro-batch tuning
+    trigger_interval: str = "2 seconds"
+    max_offsets_per_trigger: int = 10000
+    shuffle_partitions: int = 0  # 0 = one per executor core
+    min_partitions: int = 0  # 0 = one Spark partition per Kafka partition
+
+    with_state_topic: bool = False
+
+    # Apply predictions to the sunk rows and write flights.delay_risk
+    with_risk: bool = False
+    predictions_topic: str = "predictions"
+    risk_wait: float = 600.0  # seconds a score waits for its event to be sunk
+    risk_checkpoint_dir: str = "/data/checkpoints/flights-risk-scores"
+
+    progress_interval: float = 5.0
+
+    @classmethod
+    def from_args(cls, argv=None):
+        parser = argparse.ArgumentParser(description="Flights streaming job")
+        for field in fields(cls):
+            flag = "--" + field.name.replace("_", "-")
+            if field.type is bool:
+                parser.add_argument(flag, action="store_true", default=field.default)
+            else:
+                parser.add_argument(flag, type=field.type, default=field.default)
+        return cls(**vars(parser.parse_args(argv)))
+
+
+def build_session(config):
+    """Create the Spark session with shuffle partitions sized to the cluster."""
+    from pyspark.sql import SparkSession
+
+    spark = SparkSession.builder.appName("FlightStream").getOrCreate()
+    # Lake partitions are UTC dates and hours
+    spark.conf.set("spark.sql.session.timeZone", "UTC")
+    partitions = config.shuffle_partitions or spark.sparkContext.defaultParallelism
+    spark.conf.set("spark.sql.shuffle.partitions", str(partitions))
+    log.info("shuffle partitions: %s", partitions)
+    return spark
+
+
+def read_flights(spark, config):
+    reader = spark.readStream \
+        .format("kafka") \
+        .option("kafka.bootstrap.servers", config.bootstrap_servers) \
+        .option("subscribe", config.topic) \
+        .option("startingOffsets", config.starting_offsets) \
+        .option("failOnDataLoss", "false") \
+        .option("includeHeaders", "true")
+    if config.max_offsets_per_trigger:
+        reader = reader.option("maxOffsetsPerTrigger", config.max_offsets_per_trigger)
+    if config.min_partitions:
+        reader = reader.option("minPartitions", config.min_partitions)
+    return reader.load()
+
+
+def read_events(spark, config):
+    """Parsed flight events from the configured source."""
+    if config.source == "parquet":
+        return replay_stream(spark, config.replay_path, config.max_files_per_trigger)
+    return parse_flight_events(read_flights(spark, config))
+
+
+def sink_rows(events, sunk_at):
+    """Upsert rows (``UPSERT_SQL`` column order) of the newest event of each flight.
+
+    One ``INSERT ... ON CONFLICT DO UPDATE`` may not update a row twice, so a
+    flight with several events in a micro-batch only contributes its last
+    one. ``validate_lifecycle`` emits each flight's events in offset order,
+    so the last one seen is the newest.
+    """
+    latest = {row.flight_id: row for row in events}
+    return [
+        (row.flight_id, str(row.origin), str(row.destination), row.status,
+         row.departure_time, row.arrival_time, row.produced_at, sunk_at)
+        for row in latest.values()
+    ]
+
+
+def upsert_flights(conn, rows):
+    """Upsert sink rows (tuples in ``UPSERT_SQL`` column order) in one transaction.
+
+    Flight ids must be unique within ``rows``; ``sink_rows`` makes them so.
+    """
+    with conn, conn.cursor() as cur:
+        execute_values(cur, UPSERT_SQL, rows, page_size=1000)
+
+
+def make_foreach_batch(config):
+    """Build the micro-batch sink: dead letters to Kafka, valid rows to Postgres and the lake."""
+    from pyspark.sql.functions import col
+
+    def foreach_batch(df, epoch_id):
+        received = time.time()
+        df.persist()
+        write_dead_letters(df, config.bootstrap_servers)
+
+        valid_df = df.where(col("violation").isNull())
+        valid = valid_df.collect()
+        if valid:
+            sunk_at = int(time.time() * 1000)
+            rows = sink_rows(valid, sunk_at)
+            conn = psycopg2.connect(config.postgres_dsn)
+            try:
+                # One observation per batch: the upsert and its commit, not
+                # the dead-letter write or the collect before it
+                upserted = time.time()
+                upsert_flights(conn, rows)
+                STAGE_LATENCY.labels(stage="spark_to_postgres").observe(time.time() - upserted)
+            finally:
+                conn.close()
+
+            EVENTS.labels(component="spark_sink").inc(len(valid))
+            observe_latencies("broker_to_spark",
+                              (received - row.broker_time / 1000 for row in valid if row.broker_time))
+
+            if config.lake_dir:
+                write_lake(valid_df, config.lake_dir, sunk_at)
+        df.unpersist()
+
+    return foreach_batch
+
+
+def ensure_schema(config):
+    """Add the latency tracing and risk columns (and the ``sunk_at`` index for delta loads) if missing."""
+    conn = psycopg2.connect(config.postgres_dsn)
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute(SCHEMA_SQL)
+    finally:
+        conn.close()
+
+
+def start(spark, config):
+    """Start the sink query (and optionally the flights-state and risk queries)."""
+    ensure_schema(config)
+    topics = [topic_spec(config.topic, like="flights"), topic_spec(DEAD_LETTER_TOPIC)]
+    if config.with_risk:
+        topics.append(topic_spec(config.predictions_topic, like="predictions"))
+    ensure_topics(config.bootstrap_servers, topics)
+    flights = validate_lifecycle(read_events(spark, config))
+
+    query = flights.writeStream \
+        .foreachBatch(make_foreach_batch(config)) \
+        .option("checkpointLocation", config.checkpoint_dir) \
+        .trigger(processingTime=config.trigger_interval) \
+        .queryName("flights-sink") \
+        .start()
+
+    queries = [query]
+    if config.with_state_topic:
+        queries.append(start_state_query(spark, config.bootstrap_servers, config.topic))
+    if config.with_risk:
+        queries.append(start_risk_query(
+            spark, config.bootstrap_servers, config.postgres_dsn,
+            topic=config.predictions_topic, starting_offsets=config.starting_offsets,
+            wait=config.risk_wait, trigger_interval=config.trigger_interval,
+            checkpoint_dir=config.risk_checkpoint_dir))
+    return queries
+
+
+def batch_metrics(progress):
+    """Flatten the interesting parts of a ``StreamingQueryProgress`` dict."""
+    durations = progress.get("durationMs", {})
+    return {
+        "batch_id": progress.get("batchId"),
+        "input_rows": progress.get("numInputRows", 0),
+        "input_rows_per_sec": round(progress.get("inputRowsPerSecond") or 0.0, 1),
+        "processed_rows_per_sec": round(progress.get("processedRowsPerSecond") or 0.0, 1),
+        "trigger_ms": durations.get("triggerExecution", 0),
+        "get_batch_ms": durations.get("getBatch", 0),
+        "add_batch_ms": durations.get("addBatch", 0),
+        "wal_commit_ms": durations.get("walCommit", 0),
+    }
+
+
+def report_progress(queries, interval):
+    """Log per-batch metrics of every query until they all stop."""
+    last_batch = {}
+    while any(q.isActive for q in queries):
+        for query in queries:
+            progress = query.lastProgress
+            if not progress or last_batch.get(query.name) == progress["batchId"]:
+                continue
+            last_batch[query.name] = progress["batchId"]
+            metrics = batch_metrics(progress)
+            log.info("%s %s", query.name, " ".join(f"{k}={v}" for k, v in metrics.items()))
+        time.sleep(interval)
+
+    for query in queries:
+        if query.exception():
+            raise query.exception()
+
+
+def run(config=None):
+    config = config or PipelineConfig()
+    start_metrics_server(PIPELINE_PORT)
+    spark = build_session(config)
+    queries = start(spark, config)
+    report_progress(queries, config.progress_interval)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"),
+                        format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    run(PipelineConfig.from_args())
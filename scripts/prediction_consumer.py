@@ -0,0 +1,104 @@
+"""Delay prediction consumer.
+
+Reads flight events from ``flights`` and writes a delay prediction per event to
+``predictions``, keyed by ``flight_id`` like the input. A prediction carries
+the ``produced_at`` of the event it scored, which ``flight_risk.py`` matches
+against the flight's stored row. Metrics (events, errors, score/send time, consumer lag) are
+served on port 1238.
+
+    python prediction_consumer.py --bootstrap broker:29092
+"""
+
+import argparse
+import json
+import logging
+import random
+import time
+
+from kafka import KafkaConsumer, KafkaProducer
+
+from metrics import (CONSUMER_PORT, ERRORS, EVENTS, OPERATION_SECONDS, start_metrics_server,
+                     update_consumer_lag)
+from topics import ensure_topics, topic_spec
+
+log = logging.getLogger("prediction_consumer")
+
+BOOTSTRAP_SERVERS = "broker:29092"
+INPUT_TOPIC = "flights"
+OUTPUT_TOPIC = "predictions"
+GROUP_ID = "jupyter-model"
+
+SCORE_SECONDS = OPERATION_SECONDS.labels(component="prediction_consumer", operation="score")
+SEND_SECONDS = OPERATION_SECONDS.labels(component="prediction_consumer", operation="send")
+
+
+def score(event):
+    """Delay probability for one flight event (placeholder model)."""
+    return random.random()
+
+
+def build_prediction(event):
+    with SCORE_SECONDS.time():
+        prediction = score(event)
+    return {
+        "flight_id": event.get("flight_id"),
+        "prediction": prediction,
+        "produced_at": event.get("produced_at"),
+        "timestamp": int(time.time()),
+    }
+
+
+def run(bootstrap_servers=BOOTSTRAP_SERVERS, input_topic=INPUT_TOPIC, output_topic=OUTPUT_TOPIC,
+        group_id=GROUP_ID, lag_interval=5.0):
+    start_metrics_server(CONSUMER_PORT)
+    ensure_topics(bootstrap_servers, [topic_spec(input_topic, like="flights"),
+                                      topic_spec(output_topic, like="predictions")])
+    consumer = KafkaConsumer(
+        input_topic,
+        bootstrap_servers=bootstrap_servers,
+        value_deserializer=lambda x: json.loads(x.decode("utf-8")),
+        auto_offset_reset="earliest",
+        enable_auto_commit=True,
+        group_id=group_id,
+    )
+    producer = KafkaProducer(
+        bootstrap_servers=bootstrap_servers,
+        value_serializer=lambda v: json.dumps(v).encode("utf-8"),
+        key_serializer=lambda k: k.encode("utf-8") if k is not None else None,
+    )
+    events = EVENTS.labels(component="prediction_consumer")
+    errors = ERRORS.labels(component="prediction_consumer")
+
+    log.info("consuming %s, producing predictions to %s", input_topic, output_topic)
+    consumed = 0
+    next_report = time.monotonic() + lag_interval
+    try:
+        for message in consumer:
+            try:
+                result = build_prediction(message.value)
+                with SEND_SECONDS.time():
+                    producer.send(output_topic, key=result["flight_id"], value=result)
+                events.inc()
+                consumed += 1
+            except Exception:
+                errors.inc()
+                log.exception("failed to score event at offset %s", message.offset)
+
+            if time.monotonic() >= next_report:
+                lag = update_consumer_lag(consumer, group_id)
+                log.info("consumed %d events, lag %d", consumed, lag)
+                next_report = time.monotonic() + lag_interval
+    finally:
+        producer.flush()
+        producer.close()
+        consumer.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score flight events into the predictions topic")
+    parser.add_argument("--bootstrap", default=BOOTSTRAP_SERVERS)
+    parser.add_argument("--group-id", default=GROUP_ID)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    run(args.bootstrap, group_id=args.group_id)
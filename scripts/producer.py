@@ -0,0 +1,151 @@
+"""Synthetic flight event producer.
+
+Each event is stamped with its produce time (epoch milliseconds), both in the
+JSON body and in a ``produced_at`` Kafka header, so downstream stages can
+measure how stale a flight is. Events are keyed by ``flight_id``, so every
+event of a flight lands on the same partition of ``flights`` and is consumed
+in order; the topic is created with the partitions planned in ``topics.py``.
+
+Statuses follow ``lifecycle.TRANSITIONS`` and a flight keeps its departure
+time, so the validator passes the producer's events through to the sink.
+
+    python producer.py --bootstrap localhost:9092
+
+With ``--record DIR`` every produced event is also written to a Parquet
+recording that ``replay.py`` can play back later.
+"""
+
+import argparse
+import json
+import logging
+import random
+import time
+
+from kafka import KafkaProducer
+
+from lifecycle import CANCELLED, STATUSES, TRANSITIONS
+from metrics import (ERRORS, EVENTS, OPERATION_SECONDS, PRODUCER_PORT, STAGE_LATENCY,
+                     start_metrics_server)
+from topics import ensure_topics, topic_spec
+
+log = logging.getLogger("producer")
+
+SERIALIZE_SECONDS = OPERATION_SECONDS.labels(component="producer", operation="serialize")
+SEND_SECONDS = OPERATION_SECONDS.labels(component="producer", operation="send")
+
+flights_info = {
+    "FL1000": {"origin": (40.6413, -73.7781), "destination": (51.4700, -0.4543)},  # JFK -> LHR
+    "FL1001": {"origin": (34.0522, -118.2437), "destination": (48.8566, 2.3522)},  # LAX -> CDG
+    "FL1002": {"origin": (25.2048, 55.2708), "destination": (1.3521, 103.8198)},   # DXB -> SIN
+    "FL1003": {"origin": (35.6895, 139.6917), "destination": (37.7749, -122.4194)},# Tokyo -> San Francisco
+    "FL1004": {"origin": (55.7558, 37.6173), "destination": (41.9028, 12.4964)},    # Moscow -> Rome
+    "FL1005": {"origin": (39.9042, 116.4074), "destination": (19.0760, 72.8777)},   # Beijing -> Mumbai
+    "FL1006": {"origin": (52.5200, 13.4050), "destination": (40.7128, -74.0060)},   # Berlin -> New York
+    "FL1007": {"origin": (51.5074, -0.1278), "destination": (35.6895, 139.6917)},   # London -> Tokyo
+}
+
+# Legal next statuses of each status; flights are never cancelled here
+next_statuses = {STATUSES[code]: sorted(STATUSES[nxt] for nxt in allowed - {CANCELLED})
+                 for code, allowed in TRANSITIONS.items() if code != CANCELLED}
+
+
+def initial_state():
+    now = int(time.time())
+    return {
+        flight_id: {
+            "status": "On Time",
+            "departure_time": now,
+            "arrival_time": now + random.randint(3600, 7200),
+        }
+        for flight_id in flights_info
+    }
+
+
+def next_event(flights_state):
+    """Advance one random flight and return its full record."""
+    flight_id = random.choice(list(flights_info.keys()))
+    state = flights_state[flight_id]
+
+    state["status"] = random.choice(next_statuses[state["status"]])
+    state["arrival_time"] = max(state["departure_time"],
+                                state["arrival_time"] + random.randint(-600, 900))
+
+    return {
+        "flight_id": flight_id,
+        "origin": flights_info[flight_id]["origin"],
+        "destination": flights_info[flight_id]["destination"],
+        "status": state["status"],
+        "departure_time": state["departure_time"],
+        "arrival_time": state["arrival_time"],
+    }
+
+
+def stamp(event):
+    """Add the produce timestamp to ``event`` and return it with the matching headers."""
+    produced_at = int(time.time() * 1000)
+    event["produced_at"] = produced_at
+    return event, [("produced_at", str(produced_at).encode("utf-8"))]
+
+
+@SERIALIZE_SECONDS.time()
+def serialize(value):
+    return json.dumps(value).encode("utf-8")
+
+
+def _record_ack(produced_at):
+    def on_ack(record_metadata):
+        STAGE_LATENCY.labels(stage="producer_to_broker").observe(time.time() - produced_at / 1000)
+    return on_ack
+
+
+def _record_error(exc):
+    ERRORS.labels(component="producer").inc()
+    log.warning("send failed: %s", exc)
+
+
+def run(bootstrap_servers="localhost:9092", topic="flights", interval=3.0, log_every=100, record=None):
+    start_metrics_server(PRODUCER_PORT)
+    ensure_topics(bootstrap_servers, [topic_spec(topic, like="flights")])
+    producer = KafkaProducer(bootstrap_servers=bootstrap_servers, value_serializer=serialize,
+                             key_serializer=str.encode)
+    flights_state = initial_state()
+    events = EVENTS.labels(component="producer")
+    recorder = None
+    if record:
+        from replay import EventRecorder
+        recorder = EventRecorder(record, flush_every=1000)
+
+    produced = 0
+    try:
+        while True:
+            flight, headers = stamp(next_event(flights_state))
+
+            # Produce and flush to ensure it reaches the broker immediately
+            with SEND_SECONDS.time():
+                producer.send(topic, flight, key=flight["flight_id"], headers=headers) \
+                    .add_callback(_record_ack(flight["produced_at"])) \
+                    .add_errback(_record_error)
+                producer.flush()
+            events.inc()
+            if recorder:
+                recorder.add(flight)
+
+            produced += 1
+            if produced % log_every == 0:
+                log.info("produced %d events, last: %s", produced, flight)
+            time.sleep(interval)
+    finally:
+        if recorder:
+            recorder.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Produce synthetic flight events")
+    parser.add_argument("--bootstrap", default="localhost:9092")
+    parser.add_argument("--topic", default="flights")
+    parser.add_argument("--interval", type=float, default=3.0)
+    parser.add_argument("--record", help="also record events as Parquet under this directory")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    run(args.bootstrap, args.topic, args.interval, record=args.record)
@@ -0,0 +1,271 @@
+"""Record flight event streams to partitioned Parquet and replay them.
+
+A recording is a directory of Hive-style ``date=YYYY-MM-DD/hour=HH``
+partitions holding Parquet files with ``fleet_generator.EVENT_COLUMNS``.
+Recordings come from the generator (``record`` below) or from a live
+``producer.py --record DIR``. Files are written under a temporary name and
+renamed, so a Spark file stream never sees a half-written file.
+
+Replay reads one hour partition at a time in ``event_time`` order and sends
+it into the ``flights`` topic at original speed (``--speed 1``), N times
+faster (``--speed N``) or as fast as Kafka accepts it (``--speed 0``). The
+same directory is also a Spark file stream source, so the pipeline can read
+a recording without Kafka at all::
+
+    python replay.py record --flights 1000000 --path /app/shared_data/replay
+    python replay.py replay --path /app/shared_data/replay --speed 60 --bootstrap broker:29092
+    python pipeline.py --source parquet --replay-path /app/shared_data/replay
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from fleet_generator import EVENT_COLUMNS, STATUS_ORDER, FleetGenerator, send_events
+from metrics import EVENTS
+
+log = logging.getLogger("replay")
+
+REPLAY_DIR = "/app/shared_data/replay"
+
+
+def event_frame(records):
+    """Producer records (origin/destination as ``[lat, lon]``) as an event frame.
+
+    ``event_time`` is the record's ``produced_at`` in seconds, or now.
+    """
+    now = int(time.time())
+    origin = np.array([r["origin"] for r in records], dtype=np.float64).reshape(-1, 2)
+    destination = np.array([r["destination"] for r in records], dtype=np.float64).reshape(-1, 2)
+    return pd.DataFrame({
+        "event_time": [r["produced_at"] // 1000 if r.get("produced_at") else now for r in records],
+        "flight_id": [r["flight_id"] for r in records],
+        "origin_lat": origin[:, 0],
+        "origin_lon": origin[:, 1],
+        "dest_lat": destination[:, 0],
+        "dest_lon": destination[:, 1],
+        "status": pd.Categorical([r["status"] for r in records], STATUS_ORDER),
+        "departure_time": [r["departure_time"] for r in records],
+        "arrival_time": [r["arrival_time"] for r in records],
+    }, columns=EVENT_COLUMNS)
+
+
+def partition_dir(root, hour):
+    """Directory of the partition holding events of epoch hour ``hour``."""
+    stamp = datetime.fromtimestamp(hour * 3600, tz=timezone.utc)
+    return os.path.join(root, f"date={stamp:%Y-%m-%d}", f"hour={stamp:%H}")
+
+
+class EventRecorder:
+    """Buffer events and write them to ``root`` as date/hour partitioned Parquet."""
+
+    def __init__(self, root=REPLAY_DIR, flush_every=50000):
+        self.root = root
+        self.flush_every = flush_every
+        self.buffer = []
+        self.files = 0
+        self.events = 0
+
+    def add(self, record):
+        """Buffer one producer record; flushes every ``flush_every`` records."""
+        self.buffer.append(record)
+        if len(self.buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.write(event_frame(self.buffer))
+            self.buffer = []
+
+    def write(self, events):
+        """Write an event frame, one file per hour it spans."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        hours = events["event_time"].to_numpy() // 3600
+        for hour in np.unique(hours):
+            part = events[hours == hour]
+            part = part.iloc[np.lexsort((part["status"].cat.codes, part["event_time"]))]
+            directory = partition_dir(self.root, int(hour))
+            os.makedirs(directory, exist_ok=True)
+            name = f"part-{uuid.uuid4().hex}.parquet"
+            # Spark's file source lists "_"/"."-prefixed files as hidden
+            tmp = os.path.join(directory, f"_{name}.tmp")
+            pq.write_table(pa.Table.from_pandas(part, preserve_index=False), tmp)
+            os.replace(tmp, os.path.join(directory, name))
+            self.files += 1
+        self.events += len(events)
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_hours(root=REPLAY_DIR, start=None, end=None):
+    """Yield the events of each hour partition in ``[start, end)``, in event order."""
+    import pyarrow.parquet as pq
+
+    for directory in sorted(glob.glob(os.path.join(root, "date=*", "hour=*"))):
+        day = os.path.basename(os.path.dirname(directory)).split("=", 1)[1]
+        hour = int(os.path.basename(directory).split("=", 1)[1])
+        first = int(datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()) + hour * 3600
+        if (start is not None and first + 3600 <= start) or (end is not None and first >= end):
+            continue
+
+        files = sorted(glob.glob(os.path.join(directory, "*.parquet")))
+        if not files:
+            continue
+        events = pq.read_table(files, columns=EVENT_COLUMNS).to_pandas()
+        events["status"] = pd.Categorical(events["status"], STATUS_ORDER)
+        times = events["event_time"].to_numpy()
+        keep = np.ones(len(events), dtype=bool)
+        if start is not None:
+            keep &= times >= start
+        if end is not None:
+            keep &= times < end
+        events = events[keep]
+        # Files of one hour overlap in time; ties keep the lifecycle order
+        yield events.iloc[np.lexsort((events["status"].cat.codes, events["event_time"]))].reset_index(drop=True)
+
+
+def replay(producer, root=REPLAY_DIR, topic="flights", speed=1.0, start=None, end=None, rebase=False):
+    """Send a recording into ``topic``, paced by ``event_time``.
+
+    ``speed`` is simulated seconds per wall second; 0 sends without pausing.
+    With ``rebase`` every timestamp is shifted so the first event happens
+    now, which keeps progress and ETAs in the dashboards meaningful.
+    Returns the number of events sent.
+    """
+    events_sent = EVENTS.labels(component="replay")
+    first_event = offset = None
+    wall_start = time.monotonic()
+    sent = 0
+    for events in read_hours(root, start, end):
+        if events.empty:
+            continue
+        times = events["event_time"].to_numpy().copy()
+        if first_event is None:
+            first_event = int(times[0])
+            offset = int(time.time()) - first_event if rebase else 0
+        if offset:
+            for column in ("event_time", "departure_time", "arrival_time"):
+                events[column] += offset
+
+        # One group per distinct second, sent when the replay clock reaches it
+        bounds = np.flatnonzero(np.diff(times)) + 1 if speed else np.empty(0, np.intp)
+        for group in np.split(np.arange(len(events)), bounds):
+            if speed:
+                delay = wall_start + (times[group[0]] - first_event) / speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            batch = events.iloc[group[0]:group[-1] + 1]
+            send_events(batch, producer, topic)
+            events_sent.inc(len(batch))
+            sent += len(batch)
+        log.info("replayed %d events, up to %s", sent,
+                 datetime.fromtimestamp(int(times[-1]), tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S"))
+    producer.flush()
+    return sent
+
+
+def replay_stream(spark, root=REPLAY_DIR, max_files_per_trigger=0):
+    """Read a recording as a Spark file stream shaped like ``parse_flight_events``.
+
+    Coordinates become the ``"[lat,lon]"`` strings the Kafka JSON carries.
+    ``kafka_offset`` orders a flight's events by event time and lifecycle
+    status, ``produced_at`` is the event time and ``broker_time`` is null, so
+    the broker latency metric ignores replayed rows.
+    """
+    from pyspark.sql.functions import array, array_position, col, concat, lit
+    from pyspark.sql.types import DoubleType, IntegerType, LongType, StringType, StructType
+
+    schema = StructType() \
+        .add("event_time", LongType()) \
+        .add("flight_id", StringType()) \
+        .add("origin_lat", DoubleType()) \
+        .add("origin_lon", DoubleType()) \
+        .add("dest_lat", DoubleType()) \
+        .add("dest_lon", DoubleType()) \
+        .add("status", StringType()) \
+        .add("departure_time", LongType()) \
+        .add("arrival_time", LongType()) \
+        .add("date", StringType()) \
+        .add("hour", IntegerType())
+
+    reader = spark.readStream.schema(schema)
+    if max_files_per_trigger:
+        reader = reader.option("maxFilesPerTrigger", max_files_per_trigger)
+    events = reader.parquet(root)
+
+    def point(lat, lon):
+        return concat(lit("["), col(lat).cast("string"), lit(","), col(lon).cast("string"), lit("]"))
+
+    status_code = array_position(array(*[lit(s) for s in STATUS_ORDER]), col("status"))
+    return events.select(
+        "flight_id",
+        point("origin_lat", "origin_lon").alias("origin"),
+        point("dest_lat", "dest_lon").alias("destination"),
+        "status", "departure_time", "arrival_time",
+        (col("event_time") * 1000).alias("produced_at"),
+        lit(None).cast("long").alias("broker_time"),
+        lit(0).alias("kafka_partition"),
+        (col("event_time") * 8 + status_code).alias("kafka_offset"),
+    ).where(col("flight_id").isNotNull())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay flight event streams")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="record a generated schedule")
+    record.add_argument("--path", default=REPLAY_DIR)
+    record.add_argument("--flights", type=int, default=100000)
+    record.add_argument("--hours", type=int, default=24)
+    record.add_argument("--start", type=int, help="epoch seconds of the first departure window (default: now)")
+    record.add_argument("--seed", type=int, default=0)
+    record.add_argument("--batch-size", type=int, default=250000)
+
+    play = commands.add_parser("replay", help="replay a recording into Kafka")
+    play.add_argument("--path", default=REPLAY_DIR)
+    play.add_argument("--bootstrap", default="localhost:9092")
+    play.add_argument("--topic", default="flights")
+    play.add_argument("--speed", type=float, default=1.0, help="simulated seconds per second, 0 = flat out")
+    play.add_argument("--start", type=int, help="first event time to replay (epoch seconds)")
+    play.add_argument("--end", type=int, help="replay events before this time (epoch seconds)")
+    play.add_argument("--rebase", action="store_true", help="shift timestamps so the first event is now")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    started = time.perf_counter()
+    if args.command == "record":
+        generator = FleetGenerator(seed=args.seed)
+        with EventRecorder(args.path) as recorder:
+            for events in generator.batches(args.flights, args.start, args.hours, args.batch_size):
+                recorder.write(events)
+        log.info("recorded %d events in %d files in %.1fs",
+                 recorder.events, recorder.files, time.perf_counter() - started)
+    else:
+        from kafka import KafkaProducer
+
+        producer = KafkaProducer(bootstrap_servers=args.bootstrap, linger_ms=20, batch_size=256 * 1024,
+                                 value_serializer=lambda v: json.dumps(v).encode("utf-8"))
+        sent = replay(producer, args.path, args.topic, args.speed, args.start, args.end, args.rebase)
+        elapsed = time.perf_counter() - started
+        log.info("replayed %d events in %.1fs (%.0f events/s)", sent, elapsed, sent / elapsed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Kafka topic layout of the pipeline.
+
+Topics auto-created by the broker get one partition, which caps Spark's
+read parallelism and the prediction consumer group at a single reader. This
+module declares every topic with its partition count and configs, and
+creates the missing ones:
+
+* ``flights``: the event stream. Sized for the target throughput, and at
+  least one partition per prediction worker the supervisor may run.
+  Retained for a week, so the sink, the state topic and new consumer
+  groups can be rebuilt by replaying it. Records are stamped when the broker
+  appends them (``LogAppendTime``), which is what ``broker_time`` measures.
+* ``predictions``: one prediction per event, partitioned like ``flights``
+  so a flight's events and predictions land on the same partition number.
+  Retained for a day.
+* ``flights-state``: latest record per flight, compacted (``flight_state.py``).
+* ``flights-dlq``: rejected events, kept for two weeks for inspection.
+
+Every keyed topic is keyed by ``flight_id``, so all events of a flight go to
+one partition and are consumed in order. Adding partitions later moves keys
+to other partitions, which breaks that order and leaves stale state records
+behind in a compacted topic. ``ensure_topics`` therefore only grows a keyed
+topic with ``allow_repartition``; size it for the peak up front instead.
+
+    python topics.py --bootstrap broker:29092 --events-per-second 20000
+    python topics.py --bootstrap broker:29092 --describe
+"""
+
+import argparse
+import logging
+import math
+from dataclasses import dataclass, field, replace
+
+log = logging.getLogger("topics")
+
+BOOTSTRAP_SERVERS = "broker:29092"
+
+# Events per second one prediction consumer keeps up with, including the
+# fetch and the produce of its prediction, with headroom for rebalances
+PARTITION_EVENTS_PER_SECOND = 2000
+TARGET_EVENTS_PER_SECOND = 10000
+# consumer_supervisor.py serves worker metrics on 8 ports
+MAX_CONSUMERS = 8
+
+DAY_MS = 24 * 3600 * 1000
+
+
+@dataclass
+class TopicSpec:
+    name: str
+    partitions: int
+    configs: dict = field(default_factory=dict)
+    keyed: bool = True
+    replication_factor: int = 1
+
+
+def partitions_for(events_per_second, per_partition=PARTITION_EVENTS_PER_SECOND, consumers=MAX_CONSUMERS):
+    """Partitions for a topic taking ``events_per_second``, read by up to ``consumers``."""
+    return max(1, consumers, math.ceil(events_per_second / per_partition))
+
+
+def topic_plan(events_per_second=TARGET_EVENTS_PER_SECOND, per_partition=PARTITION_EVENTS_PER_SECOND,
+               consumers=MAX_CONSUMERS):
+    """Every topic of the pipeline, by name."""
+    partitions = partitions_for(events_per_second, per_partition, consumers)
+    specs = [
+        TopicSpec("flights", partitions, {
+            "cleanup.policy": "delete",
+            "retention.ms": str(7 * DAY_MS),
+            "message.timestamp.type": "LogAppendTime",
+        }),
+        TopicSpec("predictions", partitions, {
+            "cleanup.policy": "delete",
+            "retention.ms": str(DAY_MS),
+        }),
+        TopicSpec("flights-state", partitions, {
+            "cleanup.policy": "compact",
+            "min.cleanable.dirty.ratio": "0.1",
+            "segment.ms": "600000",
+        }),
+        TopicSpec("flights-dlq", 1, {
+            "cleanup.policy": "delete",
+            "retention.ms": str(14 * DAY_MS),
+        }),
+    ]
+    return {spec.name: spec for spec in specs}
+
+
+def topic_spec(name, like=None):
+    """The planned spec of ``name``, or of ``like`` under the name ``name``."""
+    plan = topic_plan()
+    return plan[name] if name in plan else replace(plan[like], name=name)
+
+
+def existing_partitions(admin, names):
+    """Partition count of each topic in ``names`` that exists."""
+    counts = {}
+    for topic in admin.describe_topics(list(names)):
+        if not topic.get("error_code") and topic.get("partitions"):
+            # kafka-python 3 names the field after the protocol's "name"
+            counts[topic.get("name", topic.get("topic"))] = len(topic["partitions"])
+    return counts
+
+
+def ensure_topics(bootstrap_servers=BOOTSTRAP_SERVERS, specs=None, allow_repartition=False):
+    """Create the topics of ``specs`` (default: the whole plan) that do not exist yet.
+
+    Existing topics keep their configs. One with fewer partitions than its
+    spec is grown only if it is not keyed or ``allow_repartition`` is set,
+    and is logged otherwise. Returns the names of the created topics.
+    """
+    from kafka.admin import KafkaAdminClient, NewPartitions, NewTopic
+    from kafka.errors import TopicAlreadyExistsError
+
+    specs = topic_plan() if specs is None else specs
+    if isinstance(specs, dict):
+        specs = list(specs.values())
+    admin = KafkaAdminClient(bootstrap_servers=bootstrap_servers)
+    created = []
+    try:
+        existing = existing_partitions(admin, [spec.name for spec in specs])
+        for spec in specs:
+            current = existing.get(spec.name)
+            if current is None:
+                try:
+                    admin.create_topics([NewTopic(name=spec.name, num_partitions=spec.partitions,
+                                                  replication_factor=spec.replication_factor,
+                                                  topic_configs=spec.configs)])
+                    created.append(spec.name)
+                    log.info("created %s with %d partitions", spec.name, spec.partitions)
+                except TopicAlreadyExistsError:
+                    pass
+            elif current < spec.partitions:
+                if spec.keyed and not allow_repartition:
+                    log.warning("%s has %d partitions, %d planned; growing it remaps flight ids to "
+                                "partitions, rerun with --allow-repartition to do it anyway",
+                                spec.name, current, spec.partitions)
+                    continue
+                admin.create_partitions({spec.name: NewPartitions(total_count=spec.partitions)})
+                log.info("grew %s from %d to %d partitions", spec.name, current, spec.partitions)
+    finally:
+        admin.close()
+    return created
+
+
+def describe(bootstrap_servers=BOOTSTRAP_SERVERS, names=None):
+    """``{topic: partitions}`` of the planned topics as they exist on the broker."""
+    from kafka.admin import KafkaAdminClient
+
+    admin = KafkaAdminClient(bootstrap_servers=bootstrap_servers)
+    try:
+        return existing_partitions(admin, names or list(topic_plan()))
+    finally:
+        admin.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create the pipeline's Kafka topics")
+    parser.add_argument("--bootstrap", default=BOOTSTRAP_SERVERS)
+    parser.add_argument("--events-per-second", type=int, default=TARGET_EVENTS_PER_SECOND,
+                        help="peak rate the flights topic is sized for")
+    parser.add_argument("--per-partition", type=int, default=PARTITION_EVENTS_PER_SECOND,
+                        help="events per second one consumer handles")
+    parser.add_argument("--consumers", type=int, default=MAX_CONSUMERS,
+                        help="most prediction workers that should each get a partition")
+    parser.add_argument("--allow-repartition", action="store_true",
+                        help="grow keyed topics that have fewer partitions than planned")
+    parser.add_argument("--describe", action="store_true", help="only print the existing topics")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    plan = topic_plan(args.events_per_second, args.per_partition, args.consumers)
+    if not args.describe:
+        ensure_topics(args.bootstrap, plan, args.allow_repartition)
+    existing = describe(args.bootstrap, list(plan))
+    for name, spec in plan.items():
+        print(f"{name:15} {existing.get(name, 0):>4} partitions ({spec.partitions} planned)  "
+              + ", ".join(f"{k}={v}" for k, v in spec.configs.items()))
@@ -3,12 +3,24 @@ import pandas as pd
 import psycopg2
 import folium
 from streamlit_folium import st_folium
-import ast
 from datetime import datetime, timedelta
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
 from streamlit_autorefresh import st_autorefresh
+from loader import read_frame
+from metrics import CACHED_ROWS, ERRORS, QUERY_SECONDS, observe_load_latency, start_metrics_server
+from clock import clock_controls, show_time_lapse
+from fleet import Fleet, Lifecycle
+from lake import departure_summary, frame_summary
+from profiling import Profiler, profiling_requested
+from render import cache_caption, figure_builder
+from risk import (RISK_COLORS, RISK_COLUMN, UNSCORED_COLOR, has_risk, risk_band_colors, risk_mask, risk_summary,
+                  risk_values)
+from routes import FeatureLayer, RouteCache, feature, feature_collection, point_geojson, route_features
+from snapshot import FleetSnapshot, snapshot_path
+from table import show_flight_table
+from spatial import GridIndex, bounds_from_folium, center_from_folium, heat_bins
 
 # 🎨 Modern Page Configuration
 st.set_page_config(
@@ -153,6 +165,8 @@ def get_database_connection():
             host="postgres_general",
             connect_timeout=10
         )
+        # Shared across reruns and read-only, so never leave a transaction open
+        conn.autocommit = True
         return conn
     except Exception as e:
         st.error(f"🚨 Database connection failed: {str(e)}")
@@ -177,69 +191,62 @@ def load_all_flights():
                 airline,
                 aircraft_type,
                 speed,
-                altitude
+                altitude,
+                produced_at,
+                sunk_at,
+                delay_risk
             FROM flights 
             ORDER BY departure_time DESC
             """
-            df = pd.read_sql(query, conn)
-            conn.close()
+            with QUERY_SECONDS.time():
+                # COPY into pyarrow instead of read_sql's per-cell conversion
+                df = read_frame(conn, query)
             
             if not df.empty:
                 st.sidebar.success(f"🎯 Loaded {len(df)} flights")
+                data_age = observe_load_latency(df)
+                if data_age is not None:
+                    st.sidebar.caption(f"⏱️ Median data age: {data_age:.0f}s since produced")
             return df
         return pd.DataFrame()
     except Exception as e:
+        ERRORS.labels(component="dashboard").inc()
         st.error(f"🚨 Database error: {str(e)}")
         return pd.DataFrame()
 
 # 🎯 Advanced Data Processing
-def process_flight_data(df):
+def process_flight_data(df, now=None):
+    """Vectorized coordinates, progress, position, ETA and phase via ``Fleet``."""
     if df.empty:
         return df
     
     try:
-        # Convert coordinates
-        df["origin_coord"] = df["origin"].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) else x)
-        df["destination_coord"] = df["destination"].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) else x)
-        
-        # Enhanced timestamp processing
-        df["departure_datetime"] = pd.to_datetime(df["departure_time"], unit='s')
-        df["arrival_datetime"] = pd.to_datetime(df["arrival_time"], unit='s')
-        
-        # Calculate advanced metrics
-        df["flight_duration"] = (df["arrival_datetime"] - df["departure_datetime"]).dt.total_seconds() / 3600
-        
-        # Real-time progress calculation
-        now = datetime.now()
-        df["progress"] = df.apply(lambda row: min(1.0, max(0.0, 
-            (now - row["departure_datetime"]).total_seconds() / 
-            max(1, (row["arrival_datetime"] - row["departure_datetime"]).total_seconds()))), axis=1)
-        
-        # 3D flight path interpolation
-        df["current_lat"] = df.apply(lambda row: 
-            row["origin_coord"][0] + (row["destination_coord"][0] - row["origin_coord"][0]) * row["progress"], axis=1)
-        df["current_lon"] = df.apply(lambda row: 
-            row["origin_coord"][1] + (row["destination_coord"][1] - row["origin_coord"][1]) * row["progress"], axis=1)
-        
-        # Estimated time of arrival
-        df["eta"] = df.apply(lambda row: 
-            row["departure_datetime"] + (row["arrival_datetime"] - row["departure_datetime"]) * row["progress"], axis=1)
-        
-        # Flight phase detection
-        def get_flight_phase(progress):
-            if progress < 0.1: return "Takeoff"
-            elif progress < 0.3: return "Climbing"
-            elif progress < 0.7: return "Cruising"
-            elif progress < 0.9: return "Descending"
-            else: return "Landing"
-        
-        df["flight_phase"] = df["progress"].apply(get_flight_phase)
-        
-        return df
+        return Fleet.from_frame(df).to_frame(now)
     except Exception as e:
+        ERRORS.labels(component="dashboard").inc()
         st.error(f"🚨 Data processing error: {str(e)}")
         return df
 
+# 🎯 Snapshot-backed Fleet Loading
+@st.cache_resource
+def get_fleet_snapshot():
+    """One fleet snapshot per server process, shared by every session"""
+    return FleetSnapshot(snapshot_path("app"))
+
+def load_fleet(now=None, force=False):
+    """Processed fleet from the memory-mapped snapshot plus rows sunk since it"""
+    try:
+        snapshot = get_fleet_snapshot()
+        df = snapshot.frame(get_database_connection(), load_all_flights, now=now, force=force)
+        if snapshot.stats:
+            stats = snapshot.stats
+            st.sidebar.caption(f"💾 {stats['source']} • {stats['changed']} changed rows • {stats['seconds']:.2f}s")
+        return df
+    except Exception as e:
+        ERRORS.labels(component="dashboard").inc()
+        st.error(f"🚨 Data loading error: {str(e)}")
+        return pd.DataFrame()
+
 # 🎯 Create 3D Interactive Globe
 def create_3d_globe(df):
     """Create an interactive 3D globe visualization"""
@@ -248,8 +255,8 @@ def create_3d_globe(df):
     # Add flight paths
     for _, flight in df.iterrows():
         fig.add_trace(go.Scatter3d(
-            x=[flight["origin_coord"][1], flight["destination_coord"][1]],
-            y=[flight["origin_coord"][0], flight["destination_coord"][0]],
+            x=[flight["origin_lon"], flight["dest_lon"]],
+            y=[flight["origin_lat"], flight["dest_lat"]],
             z=[10000, 10000],  # Altitude
             mode='lines',
             line=dict(
@@ -290,9 +297,148 @@ def create_3d_globe(df):
     
     return fig
 
+# 🎯 Incremental Clock Ticks
+def advance_fleet(df, now):
+    """Move the session's fleet to ``now``, recomputing only flights in the air"""
+    lifecycle = st.session_state.get("lifecycle")
+    if lifecycle is None or not lifecycle.tracks(df):
+        lifecycle = st.session_state.lifecycle = Lifecycle(df)
+    return lifecycle.advance(df, now)
+
+# Clock resolution of figure keys in simulated seconds. A figure is reused
+# within its bucket, so what it shows lags the clock by up to one bucket;
+# phase counts move much slower than positions.
+POSITION_BUCKET_SECONDS = 30
+PHASE_BUCKET_SECONDS = 300
+
+def fleet_version(df, every=POSITION_BUCKET_SECONDS):
+    """Data version of the session's fleet frame (snapshot content and the
+    clock of its last change, in buckets of ``every`` seconds), or None
+    before its first clock tick"""
+    lifecycle = st.session_state.get("lifecycle")
+    snapshot = df.attrs.get("snapshot_version")
+    if lifecycle is None or not lifecycle.tracks(df) or snapshot is None or lifecycle.version is None:
+        return None
+    return snapshot, int(lifecycle.version // every)
+
+def figure_key(df, *parts, every=POSITION_BUCKET_SECONDS):
+    """Key of a figure built from ``df`` and ``parts`` (None: always rebuild)"""
+    version = fleet_version(df, every)
+    return None if version is None else (version, *parts)
+
+# 🎯 Viewport Queries
+def update_spatial_index(df):
+    """Keep a grid index over current positions in the session, updated in place."""
+    if "spatial_index" not in st.session_state:
+        st.session_state.spatial_index = GridIndex()
+    return st.session_state.spatial_index.update(df["current_lat"], df["current_lon"])
+
+def show_nearest_flights(df, index, map_data, k=5):
+    """List the flights closest to the last map click."""
+    clicked = (map_data or {}).get("last_clicked")
+    if not clicked:
+        return
+    rows, distances = index.nearest(clicked["lat"], clicked["lng"], k=k)
+    if not len(rows):
+        return
+    nearest = df.iloc[rows][["flight_id", "status", "flight_phase", "progress"]].copy()
+    nearest["distance_km"] = distances.round(0)
+    st.markdown(f"**📍 Nearest flights to {clicked['lat']:.2f}, {clicked['lng']:.2f}**")
+    st.dataframe(nearest, use_container_width=True, hide_index=True)
+
+# 🎯 Route Geometry Cache
+@st.cache_resource
+def get_route_cache():
+    """Route geometry shared by every session; rebuilt only for new routes"""
+    return RouteCache()
+
 # 🎯 Create Advanced Flight Map
-def create_advanced_flight_map(df):
-    """Create an advanced interactive flight map"""
+# Enhanced status colors with gradients
+STATUS_COLORS = {
+    "On Time": "#00b09b",
+    "Delayed": "#ff9a00",
+    "Cancelled": "#ff4757",
+    "In Flight": "#5352ed",
+    "Boarding": "#3742fa",
+    "Landed": "#2ed573"
+}
+
+# Aircraft popup, filled in the browser from each marker's fields
+AIRCRAFT_POPUP = """
+    <div style="width: 280px; font-family: Arial; color: #2c3e50;">
+        <div style="background: linear-gradient(135deg, {color}, #2c3e50); padding: 15px; border-radius: 10px; color: white;">
+            <h3 style="margin: 0;">✈️ {flight_id}</h3>
+        </div>
+        <div style="padding: 15px;">
+            <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 10px;">
+                <div><strong>🛫 Origin:</strong><br>{origin}</div>
+                <div><strong>🛬 Destination:</strong><br>{destination}</div>
+                <div><strong>📊 Status:</strong><br><span style="color: {color};">{status}</span></div>
+                <div><strong>🎯 Phase:</strong><br>{phase}</div>
+                <div><strong>⏱️ Progress:</strong><br>{progress}</div>
+                <div><strong>🕒 ETA:</strong><br>{eta}</div>
+                <div><strong>⚠️ Delay Risk:</strong><br>{risk}</div>
+            </div>
+        </div>
+    </div>
+"""
+
+def aircraft_icons(status_colors):
+    """Smart aircraft marker with rotation, per status and risk band colour"""
+    return {color: {"className": "empty", "html": f"""
+                <div style="background: {color}; 
+                           width: 20px; 
+                           height: 20px; 
+                           border-radius: 50%; 
+                           border: 3px solid white;
+                           box-shadow: 0 2px 10px rgba(0,0,0,0.3);
+                           transform: rotate(45deg);">
+                </div>
+            """} for color in dict.fromkeys([*status_colors.values(), *RISK_COLORS.values(), UNSCORED_COLOR, "#5352ed"])}
+
+def aircraft_features(df, status_colors, color_by="status"):
+    """One marker feature per flight at its current position, coloured by
+    status or by delay risk band"""
+    features = []
+    columns = ["flight_id", "origin", "destination", "status", "flight_phase", "progress", "current_lat", "current_lon"]
+    etas = df["eta"].dt.strftime("%H:%M").fillna("N/A")
+    risks = risk_values(df)
+    if color_by == "risk":
+        colors = risk_band_colors(risks)
+    else:
+        colors = df["status"].map(status_colors).astype(object).fillna("#5352ed")
+    rows = zip(zip(*(df[c] for c in columns)), etas, risks, colors)
+    for (flight_id, origin, destination, status, phase, progress, lat, lon), eta, risk, color in rows:
+        if not (np.isfinite(lat) and np.isfinite(lon)):
+            continue
+        features.append(feature(point_geojson((lat, lon)), {
+            "icon": color,
+            "template": "aircraft",
+            "fields": {"flight_id": str(flight_id), "origin": str(origin), "destination": str(destination),
+                       "status": str(status), "phase": str(phase), "color": color,
+                       "progress": f"{progress:.1%}", "eta": eta,
+                       "risk": "N/A" if np.isnan(risk) else f"{risk:.0%}"},
+            "popupOptions": {"maxWidth": 300},
+        }))
+    return features
+
+def map_layers(df, bounds=None, zoom=2, color_by="status"):
+    """Heat bins of the viewport, plus routes, airports and aircraft of ``df``
+    as one GeoJSON string; built in the render pool and cached"""
+    heat = heat_bins(df["current_lat"], df["current_lon"], bounds, zoom)
+    # Flight paths: one feature per route and status from the route cache
+    features = route_features(df, get_route_cache(), STATUS_COLORS) + aircraft_features(df, STATUS_COLORS, color_by)
+    return heat, feature_collection(features)
+
+def create_advanced_flight_map(df, layers=None):
+    """Create an advanced interactive flight map
+
+    ``layers`` is ``map_layers`` of ``df``, possibly from the render cache;
+    by default ``df`` is binned at world zoom. The map itself is rebuilt on
+    every call: ``st_folium`` changes the maps it renders, so they are never
+    shared.
+    """
+    heat_data, data = layers or map_layers(df)
     
     # Create dark theme base map
     m = folium.Map(
@@ -303,19 +449,8 @@ def create_advanced_flight_map(df):
         scrollWheelZoom=True
     )
     
-    # Enhanced status colors with gradients
-    status_colors = {
-        "On Time": "#00b09b",
-        "Delayed": "#ff9a00",
-        "Cancelled": "#ff4757",
-        "In Flight": "#5352ed",
-        "Boarding": "#3742fa",
-        "Landed": "#2ed573"
-    }
-    
     # Add flight heatmap layer
     from folium.plugins import HeatMap
-    heat_data = [[row["current_lat"], row["current_lon"]] for _, row in df.iterrows()]
     if heat_data:
         HeatMap(heat_data, radius=15, blur=10, gradient={
             .4: 'blue',
@@ -325,51 +460,8 @@ def create_advanced_flight_map(df):
             .9: 'red'
         }).add_to(m)
     
-    # Add each flight with enhanced visuals
-    for _, flight in df.iterrows():
-        color = status_colors.get(flight["status"], "#5352ed")
-        
-        # Animated flight path
-        folium.PolyLine(
-            locations=[flight["origin_coord"], flight["destination_coord"]],
-            color=color,
-            weight=3,
-            opacity=0.8,
-            dash_array="10, 5" if flight["status"] == "Delayed" else None,
-            popup=f"Flight {flight['flight_id']}"
-        ).add_to(m)
-        
-        # Smart aircraft marker with rotation
-        folium.Marker(
-            location=[flight["current_lat"], flight["current_lon"]],
-            popup=folium.Popup(f"""
-                <div style="width: 280px; font-family: Arial; color: #2c3e50;">
-                    <div style="background: linear-gradient(135deg, {color}, #2c3e50); padding: 15px; border-radius: 10px; color: white;">
-                        <h3 style="margin: 0;">✈️ {flight['flight_id']}</h3>
-                    </div>
-                    <div style="padding: 15px;">
-                        <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 10px;">
-                            <div><strong>🛫 Origin:</strong><br>{flight['origin']}</div>
-                            <div><strong>🛬 Destination:</strong><br>{flight['destination']}</div>
-                            <div><strong>📊 Status:</strong><br><span style="color: {color};">{flight['status']}</span></div>
-                            <div><strong>🎯 Phase:</strong><br>{flight.get('flight_phase', 'N/A')}</div>
-                            <div><strong>⏱️ Progress:</strong><br>{flight['progress']:.1%}</div>
-                            <div><strong>🕒 ETA:</strong><br>{flight.get('eta', 'N/A').strftime('%H:%M')}</div>
-                        </div>
-                    </div>
-                </div>
-            """, max_width=300),
-            icon=folium.DivIcon(html=f"""
-                <div style="background: {color}; 
-                           width: 20px; 
-                           height: 20px; 
-                           border-radius: 50%; 
-                           border: 3px solid white;
-                           box-shadow: 0 2px 10px rgba(0,0,0,0.3);
-                           transform: rotate(45deg);">
-                </div>
-            """)
-        ).add_to(m)
+    # Routes, airports and aircraft in one GeoJSON layer
+    FeatureLayer(data, templates={"aircraft": AIRCRAFT_POPUP}, icons=aircraft_icons(STATUS_COLORS)).add_to(m)
     
     return m
 
@@ -414,14 +506,23 @@ def create_advanced_metrics(df):
             """, unsafe_allow_html=True)
 
 # 🎯 Create Predictive Analytics
-def create_predictive_analytics(df):
+def create_predictive_analytics(df, now=None):
     """Create predictive analytics and trend analysis"""
     
     if df.empty:
         return
     
-    # Time-based analysis
-    df["hour"] = df["departure_datetime"].dt.hour
+    # Trend aggregates come from the Parquet lake when the pipeline writes
+    # one, so these scans stay off Postgres; the loaded fleet is the fallback
+    days = st.select_slider("📅 Analytics window", [1, 7, 30, 90], value=7,
+                            format_func=lambda d: f"{d} days", key="analytics_window")
+    now = datetime.now().timestamp() if now is None else now
+    summary, files = departure_summary(int(now - days * 86400) // 60 * 60, int(now + 86400) // 60 * 60)
+    if summary is not None and not summary.empty:
+        st.caption(f"🗄️ Parquet lake • {summary['flights'].sum()} flights from {files} files")
+    else:
+        summary = frame_summary(df)
+        st.caption(f"📦 Loaded fleet • {len(df)} flights")
     
     # Create analytics tabs
     tab1, tab2, tab3 = st.tabs(["📈 Trends", "🌍 Geo Analysis", "🔮 Predictions"])
@@ -431,7 +532,7 @@ def create_predictive_analytics(df):
         
         with col1:
             # Flight distribution by hour
-            hourly_counts = df["hour"].value_counts().sort_index()
+            hourly_counts = summary.groupby("hour")["flights"].sum().sort_index()
             fig_hourly = px.area(
                 x=hourly_counts.index,
                 y=hourly_counts.values,
@@ -443,7 +544,8 @@ def create_predictive_analytics(df):
         
         with col2:
             # Status trend over time
-            status_over_time = df.groupby([df["departure_datetime"].dt.date, "status"]).size().unstack(fill_value=0)
+            status_over_time = summary.pivot_table(index="date", columns="status", values="flights",
+                                                   aggfunc="sum", fill_value=0, observed=True)
             fig_status = px.line(
                 status_over_time,
                 title="Flight Status Trends",
@@ -464,8 +566,15 @@ def create_predictive_analytics(df):
         # Predictive insights
         st.subheader("Predictive Insights")
         
-        # Calculate delay probability
-        delay_prob = (len(df[df["status"] == "Delayed"]) / len(df)) * 100
+        # Mean of the per-flight predictions; the share of delayed flights
+        # until the pipeline has scored any
+        scored, mean_risk, high_risk = risk_summary(df)
+        if mean_risk is not None:
+            delay_prob = mean_risk * 100
+            st.caption(f"🔮 {scored} of {len(df)} flights scored • {high_risk} at high risk")
+        else:
+            by_status = summary.groupby("status", observed=True)["flights"].sum()
+            delay_prob = by_status.get("Delayed", 0) / max(1, by_status.sum()) * 100
         on_time_prob = 100 - delay_prob
         
         col1, col2 = st.columns(2)
@@ -475,7 +584,8 @@ def create_predictive_analytics(df):
             st.metric("⚠️ Delay Risk", f"{delay_prob:.1f}%")
 
 # 🎯 Enhanced Main Application
-def main():
+def render_page(profiler):
+    """Lay out the page; returns early when there is nothing to show."""
     # Modern Header with Animation
     st.markdown("""
     <div class="main-header">
@@ -505,15 +615,23 @@ def main():
         </div>
         """, unsafe_allow_html=True)
         
+        # Simulation clock: positions follow it instead of the wall clock
+        st.markdown('<div class="glass-card">', unsafe_allow_html=True)
+        clock = clock_controls()
+        if st.session_state.flight_data is not None:
+            with profiler.section("advance_clock"):
+                advance_fleet(st.session_state.flight_data, clock.now())
+        st.markdown('</div>', unsafe_allow_html=True)
+        
         # Data control section
         st.markdown('<div class="glass-card">', unsafe_allow_html=True)
         st.subheader("📡 Data Management")
         
         if st.button("🔄 Sync Live Data", type="primary", use_container_width=True):
             with st.spinner("🛰️ Syncing with satellite data..."):
-                raw_data = load_all_flights()
-                if not raw_data.empty:
-                    processed_data = process_flight_data(raw_data)
+                with profiler.section("load_fleet"):
+                    processed_data = load_fleet(now=clock.now(), force=True)
+                if not processed_data.empty:
                     st.session_state.flight_data = processed_data
                     st.session_state.last_update = datetime.now()
                     st.success("✅ Data synchronized!")
@@ -533,33 +651,48 @@ def main():
             status_filter = st.multiselect(
                 "Flight Status",
                 options=df["status"].unique(),
-                default=df["status"].unique()
+                default=df["status"].unique(),
+                key="status_filter"
             )
             
             phase_filter = st.multiselect(
                 "Flight Phase",
                 options=df["flight_phase"].unique(),
-                default=df["flight_phase"].unique()
+                default=df["flight_phase"].unique(),
+                key="phase_filter"
             )
             
             # Progress slider
             progress_range = st.slider(
                 "Flight Progress",
                 0.0, 1.0, (0.0, 1.0),
-                help="Filter flights by their journey progress"
+                help="Filter flights by their journey progress",
+                key="progress_filter"
             )
+            
+            # Delay risk, once the pipeline has scored some flights
+            if has_risk(df):
+                risk_range = st.slider(
+                    "Delay Risk",
+                    0.0, 1.0, (0.0, 1.0),
+                    help="Filter flights by their predicted delay risk; narrowing it hides unscored flights",
+                    key="risk_filter"
+                )
+                st.radio("Colour aircraft by", ["status", "risk"], horizontal=True,
+                         format_func={"status": "Status", "risk": "Delay risk"}.get, key="color_by")
         st.markdown('</div>', unsafe_allow_html=True)
     
     # Load initial data
     if st.session_state.flight_data is None:
         with st.spinner("🛰️ Initializing satellite connection..."):
-            raw_data = load_all_flights()
-            if not raw_data.empty:
-                processed_data = process_flight_data(raw_data)
+            with profiler.section("load_fleet"):
+                processed_data = load_fleet(now=clock.now(), force=False)
+            if not processed_data.empty:
                 st.session_state.flight_data = processed_data
                 st.session_state.last_update = datetime.now()
     
     df = st.session_state.flight_data
+    CACHED_ROWS.labels(dashboard="app").set(0 if df is None else len(df))
     
     if df is None or df.empty:
         st.error("🚨 No flight data available. Please check database connection.")
@@ -572,6 +705,27 @@ def main():
         df = df[df["flight_phase"].isin(phase_filter)]
     if 'progress_range' in locals():
         df = df[(df["progress"] >= progress_range[0]) & (df["progress"] <= progress_range[1])]
+    if 'risk_range' in locals():
+        df = df[risk_mask(df, risk_range)]
+    
+    # Figures of the open tab are built in the render pool while the metrics
+    # lay out, and only again when the fleet, the filters or the viewport change
+    views = ["🗺️ Live Map", "🌐 3D Globe", "📊 Analytics", "🎬 Time-lapse"]
+    open_view = st.session_state.get("app_view") or views[0]
+    builder = figure_builder()
+    filters = tuple(tuple(st.session_state.get(key) or ()) for key in ("status_filter", "phase_filter", "progress_filter", "risk_filter"))
+    color_by = st.session_state.get("color_by", "status")
+    if open_view == views[0]:
+        view = st.session_state.get("map_view")
+        bounds = bounds_from_folium(view, pad=0.25)
+        zoom = (view or {}).get("zoom", 2)
+        with profiler.section("spatial_index"):
+            index = update_spatial_index(df)
+            visible = df.iloc[index.in_bounds(*bounds)] if bounds else df
+        builder.submit("map", figure_key(st.session_state.flight_data, filters, bounds, zoom, color_by),
+                       map_layers, visible, bounds, zoom, color_by)
+    elif open_view == views[1]:
+        builder.submit("globe", figure_key(st.session_state.flight_data, filters), create_3d_globe, df)
     
     # Main Dashboard
     create_advanced_metrics(df)
@@ -583,25 +737,49 @@ def main():
     </div>
     """, unsafe_allow_html=True)
     
-    # Map and 3D Visualization Tabs
-    tab1, tab2, tab3 = st.tabs(["🗺️ Live Map", "🌐 3D Globe", "📊 Analytics"])
-    
-    with tab1:
-        st.markdown('<div class="glass-card">', unsafe_allow_html=True)
-        st.subheader("Real-time Flight Tracking")
-        flight_map = create_advanced_flight_map(df)
-        st_folium(flight_map, width=None, height=600)
-        st.markdown('</div>', unsafe_allow_html=True)
-    
-    with tab2:
-        st.markdown('<div class="glass-card">', unsafe_allow_html=True)
-        st.subheader("3D Flight Globe")
-        globe_fig = create_3d_globe(df)
-        st.plotly_chart(globe_fig, use_container_width=True)
-        st.markdown('</div>', unsafe_allow_html=True)
-    
-    with tab3:
-        create_predictive_analytics(df)
+    # Map and 3D Visualization Tabs; only the open tab is built and sent
+    tab1, tab2, tab3, tab4 = st.tabs(views, key="app_view", on_change="rerun")
+    
+    if tab1.open:
+        with tab1:
+            st.markdown('<div class="glass-card">', unsafe_allow_html=True)
+            st.subheader("Real-time Flight Tracking")
+            with profiler.section("create_advanced_flight_map"):
+                flight_map = create_advanced_flight_map(visible, layers=builder.result("map"))
+            with profiler.section("st_folium"):
+                st.session_state.map_view = st_folium(
+                    flight_map,
+                    width=None,
+                    height=600,
+                    center=center_from_folium(view),
+                    zoom=(view or {}).get("zoom"),
+                    key="live_map"
+                )
+            routes = get_route_cache().stats
+            st.caption(f"🗺️ {len(visible)} of {len(df)} flights in view • "
+                       f"🧭 {routes['routes']} routes cached, {routes['hit_rate']:.0%} hits • {cache_caption()}")
+            show_nearest_flights(df, index, st.session_state.map_view)
+            st.markdown('</div>', unsafe_allow_html=True)
+    
+    if tab2.open:
+        with tab2:
+            st.markdown('<div class="glass-card">', unsafe_allow_html=True)
+            st.subheader("3D Flight Globe")
+            with profiler.section("create_3d_globe"):
+                globe_fig = builder.result("globe")
+            with profiler.section("plotly_chart"):
+                st.plotly_chart(globe_fig, use_container_width=True)
+            st.markdown('</div>', unsafe_allow_html=True)
+    
+    if tab3.open:
+        with tab3:
+            with profiler.section("create_predictive_analytics"):
+                create_predictive_analytics(df, now=clock.now())
+    
+    if tab4.open:
+        with tab4:
+            with profiler.section("time_lapse"):
+                show_time_lapse(df, clock)
     
     # Flight Details Table with Enhanced UI
     st.markdown("""
@@ -612,7 +790,7 @@ def main():
     
     st.markdown('<div class="glass-card">', unsafe_allow_html=True)
     
-    # Enhanced data table
+    # Enhanced data table, paginated so only the visible page is formatted
     display_columns = {
         "flight_id": "Flight ID",
         "origin": "Origin",
@@ -622,29 +800,30 @@ def main():
         "progress": "Progress",
         "eta": "Estimated Arrival"
     }
-    
-    display_df = df[list(display_columns.keys())].copy()
-    display_df.columns = display_columns.values()
-    display_df["Progress"] = display_df["Progress"].apply(lambda x: f"{x:.1%}")
-    display_df["Estimated Arrival"] = display_df["Estimated Arrival"].dt.strftime("%H:%M")
-    
-    # Add progress bars
-    def style_progress_bar(val):
-        progress = float(val.strip('%')) / 100
-        color = "#00b09b" if progress > 0.7 else "#ff9a00" if progress > 0.3 else "#ff4757"
-        return f"""
-        <div class="progress-container">
-            <div class="progress-bar" style="width: {progress*100}%; background: {color};"></div>
-        </div>
-        {val}
-        """
-    
-    styled_df = display_df.style.format({
-        'Progress': style_progress_bar
-    })
-    
-    st.dataframe(styled_df, use_container_width=True, height=400)
+    if has_risk(st.session_state.flight_data):
+        display_columns[RISK_COLUMN] = "Delay Risk"
+    
+    with profiler.section("flight_table"):
+        show_flight_table(
+            df,
+            display_columns,
+            key="app_table",
+            fleet=st.session_state.flight_data,
+            conn=get_database_connection(),
+            process=process_flight_data
+        )
     st.markdown('</div>', unsafe_allow_html=True)
+
+
+def main():
+    start_metrics_server()
+    profiler = Profiler(enabled=profiling_requested())
+    profiler.start()
+    try:
+        render_page(profiler)
+    finally:
+        profiler.stop()
+    profiler.render_sidebar()
     
     # Footer
     st.markdown("---")
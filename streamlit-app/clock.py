@@ -0,0 +1,173 @@
+"""Simulation clock for replaying and animating the fleet.
+
+The dashboards compute progress and positions at ``clock.now()`` instead of
+the wall clock. A clock is anchored at a simulated instant and runs at
+``speed`` times real time, so it can follow live time (speed 1, anchored
+now), replay a past period, or fast-forward. Time-lapse playback is built as
+Plotly animation frames from the cached coordinate arrays, so the browser
+animates without a Streamlit rerun per frame.
+"""
+
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+import numpy as np
+import plotly.graph_objects as go
+import streamlit as st
+
+from fleet import progress_at
+
+SPEEDS = [1, 10, 60, 300, 900, 3600]
+
+
+@dataclass
+class SimulationClock:
+    anchor_sim: float = field(default_factory=time.time)
+    anchor_wall: float = field(default_factory=time.time)
+    speed: float = 1.0
+    paused: bool = False
+
+    def now(self, wall=None):
+        """Simulated epoch seconds at wall-clock time ``wall`` (default: now)."""
+        if self.paused:
+            return self.anchor_sim
+        wall = time.time() if wall is None else wall
+        return self.anchor_sim + (wall - self.anchor_wall) * self.speed
+
+    def _reanchor(self, sim=None):
+        wall = time.time()
+        self.anchor_sim = self.now(wall) if sim is None else sim
+        self.anchor_wall = wall
+
+    def set_speed(self, speed):
+        self._reanchor()
+        self.speed = speed
+
+    def seek(self, epoch):
+        self._reanchor(epoch)
+
+    def pause(self):
+        self._reanchor()
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+        self.anchor_wall = time.time()
+
+    def go_live(self):
+        self.anchor_sim = self.anchor_wall = time.time()
+        self.speed, self.paused = 1.0, False
+
+    @property
+    def is_live(self):
+        return not self.paused and self.speed == 1 and abs(self.now() - time.time()) < 1
+
+
+def clock_controls(key="clock"):
+    """Sidebar controls for the session's clock; returns the clock."""
+    if key not in st.session_state:
+        st.session_state[key] = SimulationClock()
+    clock = st.session_state[key]
+
+    st.subheader("⏱️ Simulation Clock")
+    mode = st.radio("Mode", ["Live", "Replay"], horizontal=True, key=f"{key}_mode")
+    if mode == "Live":
+        if not clock.is_live:
+            clock.go_live()
+    else:
+        current = datetime.fromtimestamp(clock.now(), tz=timezone.utc)
+        day = st.date_input("Date (UTC)", current.date(), key=f"{key}_date")
+        moment = st.time_input("Time (UTC)", current.time().replace(microsecond=0), key=f"{key}_time")
+        if st.button("⏮️ Jump", key=f"{key}_jump", use_container_width=True):
+            clock.seek(datetime.combine(day, moment, tzinfo=timezone.utc).timestamp())
+        speed = st.select_slider("Speed", SPEEDS, value=int(clock.speed) if clock.speed in SPEEDS else 1,
+                                 format_func=lambda s: f"{s}×", key=f"{key}_speed")
+        if speed != clock.speed:
+            clock.set_speed(speed)
+        if st.toggle("⏸️ Pause", value=clock.paused, key=f"{key}_pause") != clock.paused:
+            clock.resume() if clock.paused else clock.pause()
+
+    stamp = datetime.fromtimestamp(clock.now(), tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    st.caption(f"🕒 {stamp} UTC • {'live' if clock.is_live else f'{clock.speed:g}×'}")
+    return clock
+
+
+def animation_figure(df, start, speed, frames=30, fps=5, max_flights=20000):
+    """Time-lapse of ``df`` from ``start``: ``frames`` frames at ``fps``, ``speed``× real time.
+
+    Every frame is interpolated from the frame's cached coordinate and epoch
+    arrays; nothing is reloaded or re-parsed.
+    """
+    step = speed / fps
+    end = start + step * (frames - 1)
+    departure = df["departure_time"].to_numpy()
+    arrival = df["arrival_time"].to_numpy()
+    # Only flights that are airborne at some point in the window move
+    airborne = np.flatnonzero((departure < end) & (arrival > start))[:max_flights]
+    departure, arrival = departure[airborne], arrival[airborne]
+    origin_lat = df["origin_lat"].to_numpy()[airborne]
+    origin_lon = df["origin_lon"].to_numpy()[airborne]
+    delta_lat = df["dest_lat"].to_numpy()[airborne] - origin_lat
+    delta_lon = df["dest_lon"].to_numpy()[airborne] - origin_lon
+    ids = df["flight_id"].to_numpy()[airborne]
+
+    def positions(t):
+        progress = progress_at(departure, arrival, t)
+        return (np.round(origin_lat + delta_lat * progress, 3),
+                np.round(origin_lon + delta_lon * progress, 3))
+
+    def label(t):
+        return datetime.fromtimestamp(t, tz=timezone.utc).strftime("%H:%M:%S")
+
+    times = [start + i * step for i in range(frames)]
+    frame_positions = [positions(t) for t in times]
+    lat, lon = frame_positions[0]
+    marker = dict(size=4, color="#ff6b6b", opacity=0.8)
+    # WebGL scatter on lon/lat axes: SVG geo traces stutter beyond a few thousand points
+    fig = go.Figure(
+        data=[go.Scattergl(x=lon, y=lat, mode="markers", marker=marker, text=ids, hoverinfo="text")],
+        frames=[go.Frame(data=[go.Scattergl(x=lo, y=la)], name=str(i))
+                for i, (la, lo) in enumerate(frame_positions)],
+    )
+    duration = int(1000 / fps)
+    axis = dict(showgrid=True, gridcolor="rgba(255,255,255,0.08)", zeroline=False)
+    fig.update_layout(
+        xaxis=dict(range=[-180, 180], title="Longitude", **axis),
+        yaxis=dict(range=[-90, 90], title="Latitude", scaleanchor="x", **axis),
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="#1e2130",
+        margin=dict(l=0, r=0, t=30, b=0),
+        height=500,
+        updatemenus=[dict(
+            type="buttons",
+            showactive=False,
+            buttons=[
+                dict(label="▶️ Play", method="animate",
+                     args=[None, dict(frame=dict(duration=duration, redraw=True), transition=dict(duration=0),
+                                      fromcurrent=True)]),
+                dict(label="⏸️ Pause", method="animate",
+                     args=[[None], dict(frame=dict(duration=0, redraw=False), mode="immediate")]),
+            ],
+        )],
+        sliders=[dict(
+            currentvalue=dict(prefix="🕒 "),
+            steps=[dict(label=label(t), method="animate",
+                        args=[[str(i)], dict(frame=dict(duration=0, redraw=True), mode="immediate")])
+                   for i, t in enumerate(times)],
+        )],
+    )
+    return fig
+
+
+def show_time_lapse(df, clock, key="time_lapse"):
+    """Time-lapse panel starting at the clock's current instant."""
+    controls = st.columns(3)
+    speed = controls[0].select_slider("Playback speed", SPEEDS[1:], value=300,
+                                      format_func=lambda s: f"{s}×", key=f"{key}_speed")
+    fps = controls[1].slider("Frames per second", 2, 20, 5, key=f"{key}_fps")
+    frames = controls[2].slider("Frames", 10, 120, 30, key=f"{key}_frames")
+    fig = animation_figure(df, clock.now(), speed, frames=frames, fps=fps)
+    st.plotly_chart(fig, use_container_width=True)
+    st.caption(f"🎬 {len(fig.data[0].x)} moving flights • {frames / fps:.0f}s covers "
+               f"{frames * speed / fps / 60:.0f} simulated minutes")
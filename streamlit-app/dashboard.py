@@ -3,9 +3,21 @@ import pandas as pd
 import psycopg2
 import folium
 from streamlit_folium import st_folium
-import ast
 from datetime import datetime
 import plotly.express as px
+import numpy as np
+from loader import iter_frames, read_frame
+from metrics import CACHED_ROWS, ERRORS, QUERY_SECONDS, observe_load_latency, start_metrics_server
+from clock import clock_controls, show_time_lapse
+from fleet import Fleet, Lifecycle
+from profiling import Profiler, profiling_requested
+from render import cache_caption, figure_builder
+from risk import RISK_COLORS, RISK_COLUMN, UNSCORED_COLOR, has_risk, risk_band_colors, risk_mask, risk_values
+from routes import FeatureLayer, RouteCache, feature, feature_collection, point_geojson, route_features
+from snapshot import FleetSnapshot, snapshot_path
+from table import show_flight_table
+from spatial import GridIndex, bounds_from_folium, center_from_folium
+from streaming import summarize
 
 # 🎨 Ultra-Modern Page Configuration
 st.set_page_config(
@@ -180,16 +192,22 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # 🎯 Enhanced Database Connection
+def open_database_connection():
+    """Open a new database connection, owned by the caller"""
+    return psycopg2.connect(
+        dbname="flights_project",
+        user="admin",
+        password="admin",
+        host="postgres_general"
+    )
+
 @st.cache_resource
 def get_database_connection():
     """Create cached database connection"""
     try:
-        conn = psycopg2.connect(
-            dbname="flights_project",
-            user="admin",
-            password="admin",
-            host="postgres_general"
-        )
+        conn = open_database_connection()
+        # Shared across reruns and read-only, so never leave a transaction open
+        conn.autocommit = True
         return conn
     except Exception as e:
         st.error(f"🚨 Database connection failed: {str(e)}")
@@ -204,70 +222,201 @@ def load_all_flights():
         if conn:
             # Enhanced query with additional potential fields
             query = """
-            SELECT flight_id, origin, destination, status, departure_time, arrival_time 
+            SELECT flight_id, origin, destination, status, departure_time, arrival_time,
+                   produced_at, sunk_at, delay_risk
             FROM flights 
             ORDER BY departure_time DESC
             """
-            df = pd.read_sql(query, conn)
-            conn.close()
+            with QUERY_SECONDS.time():
+                # COPY into pyarrow instead of read_sql's per-cell conversion
+                df = read_frame(conn, query)
             
             if not df.empty:
                 st.sidebar.success(f"🎯 Loaded {len(df)} flights")
+                data_age = observe_load_latency(df)
+                if data_age is not None:
+                    st.sidebar.caption(f"⏱️ Median data age: {data_age:.0f}s since produced")
             return df
         return pd.DataFrame()
     except Exception as e:
+        ERRORS.labels(component="dashboard").inc()
         st.sidebar.error(f"🚨 Database error: {str(e)}")
         return pd.DataFrame()
 
 # 🎯 Advanced Data Processing
-def process_flight_data(df):
+def process_flight_data(df, now=None):
+    """Vectorized coordinates, progress, position, ETA and phase via ``Fleet``."""
     if df.empty:
         return df
     
     try:
-        # Convert coordinates from string to list
-        df["origin_coord"] = df["origin"].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) else x)
-        df["destination_coord"] = df["destination"].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) else x)
-        
-        # Convert timestamps to datetime
-        df["departure_datetime"] = df["departure_time"].apply(lambda x: datetime.fromtimestamp(x))
-        df["arrival_datetime"] = df["arrival_time"].apply(lambda x: datetime.fromtimestamp(x))
-        df["flight_duration"] = (df["arrival_datetime"] - df["departure_datetime"]).dt.total_seconds() / 3600
-        
-        # Enhanced progress calculation with flight phases
-        now = datetime.now()
-        df["progress"] = df.apply(lambda row: min(1.0, max(0.0, 
-            (now - row["departure_datetime"]).total_seconds() / 
-            max(1, (row["arrival_datetime"] - row["departure_datetime"]).total_seconds()))), axis=1)
-        
-        # Calculate current position coordinates
-        df["current_lat"] = df.apply(lambda row: 
-            row["origin_coord"][0] + (row["destination_coord"][0] - row["origin_coord"][0]) * row["progress"], axis=1)
-        df["current_lon"] = df.apply(lambda row: 
-            row["origin_coord"][1] + (row["destination_coord"][1] - row["origin_coord"][1]) * row["progress"], axis=1)
-        
-        # Add flight phase detection
-        def get_flight_phase(progress):
-            if progress < 0.1: return "Takeoff"
-            elif progress < 0.3: return "Climbing"
-            elif progress < 0.7: return "Cruising"
-            elif progress < 0.9: return "Descending"
-            else: return "Landing"
-        
-        df["flight_phase"] = df["progress"].apply(get_flight_phase)
-        
-        # Add estimated arrival time
-        df["eta"] = df.apply(lambda row: 
-            row["departure_datetime"] + (row["arrival_datetime"] - row["departure_datetime"]) * row["progress"], axis=1)
-        
-        return df
+        return Fleet.from_frame(df).to_frame(now)
     except Exception as e:
+        ERRORS.labels(component="dashboard").inc()
         st.error(f"🚨 Data processing error: {str(e)}")
         return df
 
+# 🎯 Snapshot-backed Fleet Loading
+@st.cache_resource
+def get_fleet_snapshot():
+    """One fleet snapshot per server process, shared by every session"""
+    return FleetSnapshot(snapshot_path("dashboard"))
+
+def load_fleet(now=None, force=False):
+    """Processed fleet from the memory-mapped snapshot plus rows sunk since it"""
+    try:
+        snapshot = get_fleet_snapshot()
+        df = snapshot.frame(get_database_connection(), load_all_flights, now=now, force=force)
+        if snapshot.stats:
+            stats = snapshot.stats
+            st.sidebar.caption(f"💾 {stats['source']} • {stats['changed']} changed rows • {stats['seconds']:.2f}s")
+        return df
+    except Exception as e:
+        ERRORS.labels(component="dashboard").inc()
+        st.error(f"🚨 Data loading error: {str(e)}")
+        return pd.DataFrame()
+
+# 🎯 Incremental Clock Ticks
+def advance_fleet(df, now):
+    """Move the session's fleet to ``now``, recomputing only flights in the air"""
+    lifecycle = st.session_state.get("lifecycle")
+    if lifecycle is None or not lifecycle.tracks(df):
+        lifecycle = st.session_state.lifecycle = Lifecycle(df)
+    return lifecycle.advance(df, now)
+
+# Clock resolution of figure keys in simulated seconds. A figure is reused
+# within its bucket, so what it shows lags the clock by up to one bucket;
+# phase counts move much slower than positions.
+POSITION_BUCKET_SECONDS = 30
+PHASE_BUCKET_SECONDS = 300
+
+def fleet_version(df, every=POSITION_BUCKET_SECONDS):
+    """Data version of the session's fleet frame (snapshot content and the
+    clock of its last change, in buckets of ``every`` seconds), or None
+    before its first clock tick"""
+    lifecycle = st.session_state.get("lifecycle")
+    snapshot = df.attrs.get("snapshot_version")
+    if lifecycle is None or not lifecycle.tracks(df) or snapshot is None or lifecycle.version is None:
+        return None
+    return snapshot, int(lifecycle.version // every)
+
+def figure_key(df, *parts, every=POSITION_BUCKET_SECONDS):
+    """Key of a figure built from ``df`` and ``parts`` (None: always rebuild)"""
+    version = fleet_version(df, every)
+    return None if version is None else (version, *parts)
+
+# 🎯 Viewport Queries
+def update_spatial_index(df):
+    """Keep a grid index over current positions in the session, updated in place."""
+    if "spatial_index" not in st.session_state:
+        st.session_state.spatial_index = GridIndex()
+    return st.session_state.spatial_index.update(df["current_lat"], df["current_lon"])
+
+def show_nearest_flights(df, index, map_data, k=5):
+    """List the flights closest to the last map click."""
+    clicked = (map_data or {}).get("last_clicked")
+    if not clicked:
+        return
+    rows, distances = index.nearest(clicked["lat"], clicked["lng"], k=k)
+    if not len(rows):
+        return
+    nearest = df.iloc[rows][["flight_id", "status", "flight_phase", "progress"]].copy()
+    nearest["distance_km"] = distances.round(0)
+    with st.expander(f"📍 Nearest flights to {clicked['lat']:.2f}, {clicked['lng']:.2f}", expanded=True):
+        st.dataframe(nearest, use_container_width=True, hide_index=True)
+
+# 🎯 Route Geometry Cache
+@st.cache_resource
+def get_route_cache():
+    """Route geometry shared by every session; rebuilt only for new routes"""
+    return RouteCache()
+
 # 🎯 Create Interactive Flight Map
-def create_interactive_flight_map(df):
-    """Create an enhanced interactive flight map"""
+STATUS_COLORS = {
+    "On Time": "#00b09b",
+    "Delayed": "#ff9a00", 
+    "Cancelled": "#ff4757",
+    "In Flight": "#5352ed"
+}
+
+# Aircraft popup, filled in the browser from each marker's fields
+AIRCRAFT_POPUP = """
+    <div style="width: 280px; font-family: Arial;">
+        <div style="background: linear-gradient(135deg, {color}, #2c3e50); padding: 15px; border-radius: 10px 10px 0 0; color: white;">
+            <h4 style="margin: 0;">✈️ {flight_id}</h4>
+        </div>
+        <div style="padding: 15px; background: white; border-radius: 0 0 10px 10px;">
+            <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 10px; margin-bottom: 10px;">
+                <div><strong>🛫 From:</strong><br>{origin}</div>
+                <div><strong>🛬 To:</strong><br>{destination}</div>
+            </div>
+            <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 10px;">
+                <div><strong>📊 Status:</strong><br><span style="color: {color}; font-weight: bold;">{status}</span></div>
+                <div><strong>🎯 Phase:</strong><br>{phase}</div>
+                <div><strong>⚠️ Delay Risk:</strong><br>{risk}</div>
+            </div>
+            <div style="margin-top: 10px;">
+                <strong>⏱️ Progress:</strong>
+                <div style="background: #f0f0f0; border-radius: 10px; height: 8px; margin: 5px 0;">
+                    <div style="background: {color}; width: {width}%; height: 100%; border-radius: 10px;"></div>
+                </div>
+                <div style="text-align: center; font-size: 0.9em;">{progress}</div>
+            </div>
+        </div>
+    </div>
+"""
+
+def aircraft_icons(status_colors):
+    """Smart aircraft marker icon per status and risk band colour"""
+    return {color: {"icon": "plane", "prefix": "fa", "markerColor": color, "iconColor": "white", "extraClasses": "fa-rotate-0"}
+            for color in dict.fromkeys([*status_colors.values(), *RISK_COLORS.values(), UNSCORED_COLOR, "#5352ed"])}
+
+def aircraft_features(df, status_colors, color_by="status"):
+    """One marker feature per flight at its current position, coloured by
+    status or by delay risk band"""
+    features = []
+    columns = ["flight_id", "origin", "destination", "status", "flight_phase", "progress", "current_lat", "current_lon"]
+    risks = risk_values(df)
+    if color_by == "risk":
+        colors = risk_band_colors(risks)
+    else:
+        colors = df["status"].map(status_colors).astype(object).fillna("#5352ed")
+    rows = zip(zip(*(df[c] for c in columns)), risks, colors)
+    for (flight_id, origin, destination, status, phase, progress, lat, lon), risk, color in rows:
+        if not (np.isfinite(lat) and np.isfinite(lon)):
+            continue
+        features.append(feature(point_geojson((lat, lon)), {
+            "icon": color,
+            "tooltip": f"✈️ {flight_id} • {status} • {phase}",
+            "template": "aircraft",
+            "fields": {"flight_id": str(flight_id), "origin": str(origin), "destination": str(destination),
+                       "status": str(status), "phase": str(phase), "color": color,
+                       "width": f"{progress * 100:.1f}", "progress": f"{progress:.1%}",
+                       "risk": "N/A" if np.isnan(risk) else f"{risk:.0%}"},
+            "popupOptions": {"maxWidth": 300},
+        }))
+    return features
+
+def map_layers(df, fit=True, color_by="status"):
+    """Routes, airports and aircraft of ``df`` as one GeoJSON string, and the
+    bounds to fit (None when not fitting); built in the render pool and cached"""
+    # Flight paths and airports: one feature per route and status, one per airport
+    features = route_features(df, get_route_cache(), STATUS_COLORS) + aircraft_features(df, STATUS_COLORS, color_by)
+    bounds = None
+    if fit and not df.empty:
+        lats = df[["origin_lat", "dest_lat", "current_lat"]].to_numpy()
+        lons = df[["origin_lon", "dest_lon", "current_lon"]].to_numpy()
+        bounds = [[float(np.nanmin(lats)), float(np.nanmin(lons))], [float(np.nanmax(lats)), float(np.nanmax(lons))]]
+    return feature_collection(features), bounds
+
+def create_interactive_flight_map(df, fit=True, layers=None):
+    """Create an enhanced interactive flight map
+
+    ``layers`` is ``map_layers(df, fit)``, possibly from the render cache.
+    The map itself is rebuilt on every call: ``st_folium`` changes the maps
+    it renders, so they are never shared.
+    """
+    data, bounds = layers or map_layers(df, fit)
     
     # Create advanced base map
     m = folium.Map(
@@ -278,91 +427,12 @@ def create_interactive_flight_map(df):
         scrollWheelZoom=True
     )
     
-    # Enhanced status colors
-    status_colors = {
-        "On Time": "#00b09b",
-        "Delayed": "#ff9a00", 
-        "Cancelled": "#ff4757",
-        "In Flight": "#5352ed"
-    }
-    
-    all_coordinates = []
-    
-    # Add each flight with enhanced visuals
-    for index, flight in df.iterrows():
-        color = status_colors.get(flight["status"], "#5352ed")
-        current_position = [flight["current_lat"], flight["current_lon"]]
-        
-        # Enhanced flight path with gradient effect
-        folium.PolyLine(
-            locations=[flight["origin_coord"], flight["destination_coord"]],
-            color=color,
-            weight=3,
-            opacity=0.8,
-            dash_array="10, 5" if flight["status"] == "Delayed" else None,
-            popup=f"Flight {flight['flight_id']} - {flight['status']}"
-        ).add_to(m)
-        
-        # Smart aircraft marker
-        folium.Marker(
-            location=current_position,
-            popup=folium.Popup(f"""
-                <div style="width: 280px; font-family: Arial;">
-                    <div style="background: linear-gradient(135deg, {color}, #2c3e50); padding: 15px; border-radius: 10px 10px 0 0; color: white;">
-                        <h4 style="margin: 0;">✈️ {flight['flight_id']}</h4>
-                    </div>
-                    <div style="padding: 15px; background: white; border-radius: 0 0 10px 10px;">
-                        <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 10px; margin-bottom: 10px;">
-                            <div><strong>🛫 From:</strong><br>{flight['origin']}</div>
-                            <div><strong>🛬 To:</strong><br>{flight['destination']}</div>
-                        </div>
-                        <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 10px;">
-                            <div><strong>📊 Status:</strong><br><span style="color: {color}; font-weight: bold;">{flight['status']}</span></div>
-                            <div><strong>🎯 Phase:</strong><br>{flight['flight_phase']}</div>
-                        </div>
-                        <div style="margin-top: 10px;">
-                            <strong>⏱️ Progress:</strong>
-                            <div style="background: #f0f0f0; border-radius: 10px; height: 8px; margin: 5px 0;">
-                                <div style="background: {color}; width: {flight['progress']*100}%; height: 100%; border-radius: 10px;"></div>
-                            </div>
-                            <div style="text-align: center; font-size: 0.9em;">{flight['progress']:.1%}</div>
-                        </div>
-                    </div>
-                </div>
-            """, max_width=300),
-            icon=folium.Icon(color=color, icon="plane", prefix="fa"),
-            tooltip=f"✈️ {flight['flight_id']} • {flight['status']} • {flight['flight_phase']}"
-        ).add_to(m)
-        
-        # Enhanced airport markers
-        folium.CircleMarker(
-            location=flight["origin_coord"],
-            radius=6,
-            popup=f"🛫 Origin: {flight['origin']}",
-            color="white",
-            fill=True,
-            fillColor="#00b09b",
-            fillOpacity=0.9,
-            weight=2
-        ).add_to(m)
-        
-        folium.CircleMarker(
-            location=flight["destination_coord"],
-            radius=6,
-            popup=f"🛬 Destination: {flight['destination']}",
-            color="white",
-            fill=True,
-            fillColor="#ff4757",
-            fillOpacity=0.9,
-            weight=2
-        ).add_to(m)
-        
-        # Collect coordinates for map bounds
-        all_coordinates.extend([flight["origin_coord"], flight["destination_coord"], current_position])
+    # Routes, airports and aircraft in one GeoJSON layer
+    FeatureLayer(data, templates={"aircraft": AIRCRAFT_POPUP}, icons=aircraft_icons(STATUS_COLORS)).add_to(m)
     
     # Fit map to show all flights
-    if all_coordinates:
-        m.fit_bounds(all_coordinates)
+    if bounds:
+        m.fit_bounds(bounds)
     
     return m
 
@@ -401,71 +471,79 @@ def create_advanced_statistics(df):
             """, unsafe_allow_html=True)
 
 # 🎯 Create Enhanced Charts
-def create_enhanced_charts(df):
-    if df.empty:
-        return
-        
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        # Enhanced status pie chart
-        status_counts = df["status"].value_counts()
-        fig_pie = px.pie(
-            values=status_counts.values,
-            names=status_counts.index,
-            title=f"🔄 Flight Status Distribution",
-            color_discrete_map={
-                "On Time": "#00b09b",
-                "Delayed": "#ff9a00", 
-                "Cancelled": "#ff4757",
-                "In Flight": "#5352ed"
-            },
-            hole=0.4
-        )
-        fig_pie.update_traces(textposition='inside', textinfo='percent+label')
-        fig_pie.update_layout(
-            font=dict(size=12),
-            showlegend=False,
-            margin=dict(t=50, b=20, l=20, r=20)
-        )
-        st.plotly_chart(fig_pie, use_container_width=True)
+def enhanced_chart_figures(df):
+    """Status and departure-hour figures; built in the render pool"""
+    # Enhanced status pie chart
+    status_counts = df["status"].value_counts()
+    fig_pie = px.pie(
+        values=status_counts.values,
+        names=status_counts.index,
+        title=f"🔄 Flight Status Distribution",
+        color_discrete_map={
+            "On Time": "#00b09b",
+            "Delayed": "#ff9a00", 
+            "Cancelled": "#ff4757",
+            "In Flight": "#5352ed"
+        },
+        hole=0.4
+    )
+    fig_pie.update_traces(textposition='inside', textinfo='percent+label')
+    fig_pie.update_layout(
+        font=dict(size=12),
+        showlegend=False,
+        margin=dict(t=50, b=20, l=20, r=20)
+    )
     
-    with col2:
-        # Enhanced flights by hour with phases
-        df["departure_hour"] = df["departure_datetime"].dt.hour
-        df["flight_phase_color"] = df["flight_phase"].map({
+    # Enhanced flights by hour with phases
+    departure_hour = df["departure_datetime"].dt.hour.rename("departure_hour")
+    hourly_phase_data = df.groupby([departure_hour, "flight_phase"], observed=True).size().reset_index(name="count")
+    
+    fig_bar = px.bar(
+        hourly_phase_data,
+        x="departure_hour", 
+        y="count",
+        color="flight_phase",
+        title="🕒 Flights by Departure Hour & Phase",
+        labels={"departure_hour": "Hour of Day", "count": "Number of Flights"},
+        color_discrete_map={
             "Takeoff": "#ff6b6b",
             "Climbing": "#4ecdc4", 
             "Cruising": "#45b7d1",
             "Descending": "#96ceb4",
             "Landing": "#feca57"
-        })
-        
-        hourly_phase_data = df.groupby(["departure_hour", "flight_phase"]).size().reset_index(name="count")
-        
-        fig_bar = px.bar(
-            hourly_phase_data,
-            x="departure_hour", 
-            y="count",
-            color="flight_phase",
-            title="🕒 Flights by Departure Hour & Phase",
-            labels={"departure_hour": "Hour of Day", "count": "Number of Flights"},
-            color_discrete_map={
-                "Takeoff": "#ff6b6b",
-                "Climbing": "#4ecdc4", 
-                "Cruising": "#45b7d1",
-                "Descending": "#96ceb4",
-                "Landing": "#feca57"
-            }
-        )
-        fig_bar.update_layout(
-            xaxis=dict(tickmode='linear', dtick=1),
-            bargap=0.1
-        )
+        }
+    )
+    fig_bar.update_layout(
+        xaxis=dict(tickmode='linear', dtick=1),
+        bargap=0.1
+    )
+    return fig_pie, fig_bar
+
+def create_enhanced_charts(figures):
+    fig_pie, fig_bar = figures
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.plotly_chart(fig_pie, use_container_width=True)
+    
+    with col2:
         st.plotly_chart(fig_bar, use_container_width=True)
 
 # 🎯 Create Flight Phase Visualization
-def create_flight_phase_analysis(df):
+def phase_figure(df):
+    """Phase counts and their bar chart; built in the render pool"""
+    phase_counts = df["flight_phase"].value_counts()
+    fig_phase = px.bar(
+        x=phase_counts.index,
+        y=phase_counts.values,
+        title="Current Flight Phase Distribution",
+        labels={"x": "Flight Phase", "y": "Number of Flights"},
+        color=phase_counts.index,
+        color_discrete_sequence=['#ff6b6b', '#4ecdc4', '#45b7d1', '#96ceb4', '#feca57']
+    )
+    return phase_counts, fig_phase
+
+def create_flight_phase_analysis(df, figure):
     """Create advanced flight phase analysis"""
     if df.empty:
         return
@@ -473,19 +551,11 @@ def create_flight_phase_analysis(df):
     st.markdown("### 🎯 Flight Phase Analysis")
     
     # Flight phase distribution
-    phase_counts = df["flight_phase"].value_counts()
+    phase_counts, fig_phase = figure
     
     col1, col2 = st.columns([2, 1])
     
     with col1:
-        fig_phase = px.bar(
-            x=phase_counts.index,
-            y=phase_counts.values,
-            title="Current Flight Phase Distribution",
-            labels={"x": "Flight Phase", "y": "Number of Flights"},
-            color=phase_counts.index,
-            color_discrete_sequence=['#ff6b6b', '#4ecdc4', '#45b7d1', '#96ceb4', '#feca57']
-        )
         st.plotly_chart(fig_phase, use_container_width=True)
     
     with col2:
@@ -501,8 +571,69 @@ def create_flight_phase_analysis(df):
         
         st.markdown('</div>', unsafe_allow_html=True)
 
+# 🎯 Full History Summary
+@st.cache_data(ttl=600, show_spinner="📚 Streaming the flight history...")
+def summarize_history(now):
+    """Fold the whole flights table into a ``FleetSummary`` chunk by chunk"""
+    # The stream holds a transaction open for its whole length, so it gets a
+    # connection of its own rather than the one every session shares
+    conn = open_database_connection()
+    try:
+        query = "SELECT flight_id, origin, destination, status, departure_time, arrival_time FROM flights"
+        return summarize(iter_frames(conn, query), now)
+    finally:
+        conn.close()
+
+def create_history_summary(now):
+    """Summarize every stored flight in bounded memory"""
+    try:
+        summary = summarize_history(now)
+    except Exception as e:
+        ERRORS.labels(component="dashboard").inc()
+        st.error(f"🚨 History summary error: {str(e)}")
+        return
+    if summary is None or not summary.rows:
+        st.info("No flight history available.")
+        return
+    
+    cols = st.columns(4)
+    cols[0].metric("📚 Flights", f"{summary.rows:,}")
+    cols[1].metric("🕒 Avg Duration", f"{summary.mean_duration:.1f}h")
+    cols[2].metric("⏳ Longest", f"{summary.duration_max:.1f}h")
+    cols[3].metric("📦 Chunks", summary.chunks)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        fig_hourly = px.bar(
+            x=np.arange(24),
+            y=summary.hourly,
+            title="🕒 All Flights by Departure Hour (UTC)",
+            labels={"x": "Hour of Day", "y": "Number of Flights"},
+            color_discrete_sequence=["#667eea"]
+        )
+        fig_hourly.update_layout(xaxis=dict(tickmode='linear', dtick=1), bargap=0.1)
+        st.plotly_chart(fig_hourly, use_container_width=True)
+    with col2:
+        lat, lon, counts = summary.density()
+        fig_density = px.scatter_geo(
+            lat=lat,
+            lon=lon,
+            size=counts,
+            title="🌍 Position Density",
+            color_discrete_sequence=["#ff6b6b"]
+        )
+        fig_density.update_layout(margin=dict(t=50, b=0, l=0, r=0))
+        st.plotly_chart(fig_density, use_container_width=True)
+    
+    st.dataframe(
+        summary.route_counts().rename("Flights").rename_axis("Route").reset_index(),
+        use_container_width=True,
+        hide_index=True
+    )
+
 # 🎯 Enhanced Main Application
-def main():
+def render_page(profiler):
+    """Lay out the page; returns early when there is nothing to show."""
     # Ultra-Modern Header
     st.markdown("""
     <div class="main-header">
@@ -530,15 +661,23 @@ def main():
         </div>
         """, unsafe_allow_html=True)
         
+        # Simulation clock: positions follow it instead of the wall clock
+        st.markdown('<div class="glass-card">', unsafe_allow_html=True)
+        clock = clock_controls()
+        if st.session_state.flight_data is not None:
+            with profiler.section("advance_clock"):
+                advance_fleet(st.session_state.flight_data, clock.now())
+        st.markdown('</div>', unsafe_allow_html=True)
+        
         # Data control in glass card
         st.markdown('<div class="glass-card">', unsafe_allow_html=True)
         st.subheader("📡 Data Management")
         
         if st.button("🔄 Sync Live Data", type="primary"):
             with st.spinner("🛰️ Syncing with satellite data..."):
-                raw_data = load_all_flights()
-                if not raw_data.empty:
-                    processed_data = process_flight_data(raw_data)
+                with profiler.section("load_fleet"):
+                    processed_data = load_fleet(now=clock.now(), force=True)
+                if not processed_data.empty:
                     st.session_state.flight_data = processed_data
                     st.session_state.last_update = datetime.now()
                     st.session_state.data_loaded = True
@@ -580,20 +719,32 @@ def main():
                 0.0, 1.0, (0.0, 1.0),
                 key="progress_filter"
             )
+            
+            # Delay risk, once the pipeline has scored some flights
+            if has_risk(df):
+                risk_range = st.slider(
+                    "Delay Risk Range:",
+                    0.0, 1.0, (0.0, 1.0),
+                    help="Narrowing the range hides flights without a prediction",
+                    key="risk_filter"
+                )
+                st.radio("Colour aircraft by:", ["status", "risk"], horizontal=True,
+                         format_func={"status": "Status", "risk": "Delay risk"}.get, key="color_by")
         st.markdown('</div>', unsafe_allow_html=True)
     
     # Auto-load data on first run
     if not st.session_state.data_loaded:
         with st.spinner("🛰️ Initializing satellite connection..."):
-            raw_data = load_all_flights()
-            if not raw_data.empty:
-                processed_data = process_flight_data(raw_data)
+            with profiler.section("load_fleet"):
+                processed_data = load_fleet(now=clock.now(), force=False)
+            if not processed_data.empty:
                 st.session_state.flight_data = processed_data
                 st.session_state.last_update = datetime.now()
                 st.session_state.data_loaded = True
     
     # Get data
     df = st.session_state.flight_data
+    CACHED_ROWS.labels(dashboard="dashboard").set(0 if df is None else len(df))
     
     if df is None or df.empty:
         st.error("🚨 No flight data available. Please check database connection.")
@@ -610,6 +761,8 @@ def main():
             (filtered_df["progress"] >= progress_range[0]) & 
             (filtered_df["progress"] <= progress_range[1])
         ]
+    if 'risk_range' in locals():
+        filtered_df = filtered_df[risk_mask(filtered_df, risk_range)]
     
     # Show filtered count
     st.sidebar.info(f"📊 Displaying: {len(filtered_df)} / {len(df)} flights")
@@ -618,35 +771,88 @@ def main():
         st.warning("⚠️ No flights match your filter criteria.")
         return
     
+    # Figures of the open tab are built in the render pool while the page lays
+    # out, and only again when the fleet, the filters or the viewport change
+    views = ["🗺️ Live Map", "📊 Analytics", "🎯 Flight Phases"]
+    open_view = st.session_state.get("dashboard_view") or views[0]
+    builder = figure_builder()
+    filters = tuple(tuple(st.session_state.get(key) or ()) for key in ("status_filter", "phase_filter", "progress_filter", "risk_filter"))
+    color_by = st.session_state.get("color_by", "status")
+    if open_view == views[0]:
+        view = st.session_state.get("map_view")
+        bounds = bounds_from_folium(view, pad=0.25)
+        with profiler.section("spatial_index"):
+            index = update_spatial_index(filtered_df)
+            visible_df = filtered_df.iloc[index.in_bounds(*bounds)] if bounds else filtered_df
+        # Only fit to the fleet before the user has a viewport of their own
+        fit = view is None
+        builder.submit("map", figure_key(df, filters, bounds, fit, color_by), map_layers, visible_df, fit=fit,
+                       color_by=color_by)
+    elif open_view == views[1]:
+        builder.submit("charts", figure_key(df, filters, every=PHASE_BUCKET_SECONDS), enhanced_chart_figures, filtered_df)
+    elif open_view == views[2]:
+        builder.submit("phases", figure_key(df, filters, every=PHASE_BUCKET_SECONDS), phase_figure, filtered_df)
+    
     # Enhanced Statistics
     create_advanced_statistics(filtered_df)
     
-    # Interactive Map Section
+    # Interactive Map and Analytics Section
     st.markdown("""
     <div style="margin: 2rem 0;">
         <h2>🌍 Live Flight Tracking</h2>
     </div>
     """, unsafe_allow_html=True)
     
-    st.markdown('<div class="glass-card">', unsafe_allow_html=True)
-    flight_map = create_interactive_flight_map(filtered_df)
-    map_data = st_folium(
-        flight_map, 
-        width=None, 
-        height=600,
-        key=f"enhanced_map_{len(filtered_df)}"
-    )
-    st.markdown('</div>', unsafe_allow_html=True)
-    
-    # Analytics Section
-    st.markdown("""
-    <div style="margin: 2rem 0;">
-        <h2>📊 Advanced Analytics</h2>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    create_enhanced_charts(filtered_df)
-    create_flight_phase_analysis(filtered_df)
+    # Only the open tab is built and sent
+    tab1, tab2, tab3 = st.tabs(views, key="dashboard_view", on_change="rerun")
+    
+    if tab1.open:
+        with tab1:
+            st.markdown('<div class="glass-card">', unsafe_allow_html=True)
+            with profiler.section("create_interactive_flight_map"):
+                flight_map = create_interactive_flight_map(visible_df, layers=builder.result("map"))
+            with profiler.section("st_folium"):
+                # A stable key keeps the component (and the user's viewport) across reruns
+                map_data = st_folium(
+                    flight_map, 
+                    width=None, 
+                    height=600,
+                    center=center_from_folium(view),
+                    zoom=(view or {}).get("zoom"),
+                    key="enhanced_map"
+                )
+            st.session_state.map_view = map_data
+            routes = get_route_cache().stats
+            st.caption(f"🗺️ {len(visible_df)} of {len(filtered_df)} flights in view • "
+                       f"🧭 {routes['routes']} routes cached, {routes['hit_rate']:.0%} hits • {cache_caption()}")
+            show_nearest_flights(filtered_df, index, map_data)
+            
+            # Lazy: the animation frames are only built while the expander is open
+            time_lapse = st.expander("🎬 Time-lapse", expanded=False, key="time_lapse_view", on_change="rerun")
+            if time_lapse.open:
+                with time_lapse, profiler.section("time_lapse"):
+                    show_time_lapse(filtered_df, clock)
+            st.markdown('</div>', unsafe_allow_html=True)
+    
+    if tab2.open:
+        with tab2:
+            with profiler.section("create_enhanced_charts"):
+                create_enhanced_charts(builder.result("charts"))
+    
+    if tab3.open:
+        with tab3:
+            with profiler.section("create_flight_phase_analysis"):
+                create_flight_phase_analysis(filtered_df, builder.result("phases"))
+    
+    # Whole-table summary, streamed through a server-side cursor on request
+    history = st.expander("📚 Full History Summary", expanded=False, key="history_view", on_change="rerun")
+    if history.open:
+        with history:
+            if st.button("📥 Summarize full history", key="history_summary"):
+                st.session_state.history_requested = True
+            if st.session_state.get("history_requested"):
+                with profiler.section("history_summary"):
+                    create_history_summary(int(clock.now()) // 600 * 600)
     
     # Enhanced Flight Details
     st.markdown("""
@@ -657,30 +863,43 @@ def main():
     
     st.markdown('<div class="glass-card">', unsafe_allow_html=True)
     
-    # Prepare enhanced table data
-    table_data = filtered_df[[
-        "flight_id", "origin", "destination", "status", "flight_phase",
-        "departure_datetime", "arrival_datetime", "flight_duration", "progress", "eta"
-    ]].copy()
-    
-    table_data["departure_datetime"] = table_data["departure_datetime"].dt.strftime("%Y-%m-%d %H:%M")
-    table_data["arrival_datetime"] = table_data["arrival_datetime"].dt.strftime("%Y-%m-%d %H:%M")
-    table_data["eta"] = table_data["eta"].dt.strftime("%H:%M")
-    table_data["flight_duration"] = table_data["flight_duration"].apply(lambda x: f"{x:.1f}h")
-    
-    # Rename columns
-    table_data.columns = [
-        "Flight ID", "Origin", "Destination", "Status", "Phase",
-        "Departure", "Arrival", "Duration", "Progress", "ETA"
-    ]
-    
-    # Display enhanced table
-    st.dataframe(
-        table_data,
-        use_container_width=True,
-        height=400
-    )
+    # Paginated table: only the visible page is sliced and formatted
+    table_columns = {
+        "flight_id": "Flight ID",
+        "origin": "Origin",
+        "destination": "Destination",
+        "status": "Status",
+        "flight_phase": "Phase",
+        "departure_datetime": "Departure",
+        "arrival_datetime": "Arrival",
+        "flight_duration": "Duration",
+        "progress": "Progress",
+        "eta": "ETA"
+    }
+    if has_risk(df):
+        table_columns[RISK_COLUMN] = "Delay Risk"
+    
+    with profiler.section("flight_table"):
+        show_flight_table(
+            filtered_df,
+            table_columns,
+            key="dashboard_table",
+            fleet=df,
+            conn=get_database_connection(),
+            process=process_flight_data
+        )
     st.markdown('</div>', unsafe_allow_html=True)
+
+
+def main():
+    start_metrics_server()
+    profiler = Profiler(enabled=profiling_requested())
+    profiler.start()
+    try:
+        render_page(profiler)
+    finally:
+        profiler.stop()
+    profiler.render_sidebar()
     
     # Modern Footer
     st.markdown("---")
@@ -0,0 +1,51 @@
+"""Synthetic flight frames for benchmarks and headless profiling.
+
+``synthetic_flights`` returns a frame shaped like ``load_all_flights`` output,
+so the dashboards' processing and rendering functions can run without
+Postgres.
+"""
+
+import numpy as np
+import pandas as pd
+
+STATUSES = ["On Time", "Delayed", "Boarding", "In Air", "Arrived", "Cancelled"]
+STATUS_WEIGHTS = [0.35, 0.15, 0.1, 0.3, 0.08, 0.02]
+
+
+def _coord_strings(lat, lon):
+    return pd.Series(
+        np.char.add(np.char.add(np.char.add("[", np.round(lat, 4).astype(str)), ", "),
+                    np.char.add(np.round(lon, 4).astype(str), "]"))
+    )
+
+
+def synthetic_flights(n, seed=0, now=None):
+    """Return ``n`` random flights spread around ``now`` (epoch seconds)."""
+    rng = np.random.default_rng(seed)
+    now = int(now if now is not None else pd.Timestamp.now().timestamp())
+
+    origin_lat = rng.uniform(-50, 65, n)
+    origin_lon = rng.uniform(-160, 170, n)
+    dest_lat = rng.uniform(-50, 65, n)
+    dest_lon = rng.uniform(-160, 170, n)
+
+    departure = now + rng.integers(-12 * 3600, 6 * 3600, n)
+    arrival = departure + rng.integers(3600, 14 * 3600, n)
+    produced_at = (now - rng.integers(0, 600, n)) * 1000
+
+    return pd.DataFrame({
+        "flight_id": np.char.add("FL", np.arange(n).astype(str)),
+        "origin": _coord_strings(origin_lat, origin_lon),
+        "destination": _coord_strings(dest_lat, dest_lon),
+        "status": rng.choice(STATUSES, n, p=STATUS_WEIGHTS),
+        "departure_time": departure,
+        "arrival_time": arrival,
+        "airline": rng.choice(["SkyJet", "AeroLine", "BlueWing", "Nimbus"], n),
+        "aircraft_type": rng.choice(["A320", "B737", "B787", "A350"], n),
+        "speed": rng.integers(400, 950, n),
+        "altitude": rng.integers(0, 41000, n),
+        "produced_at": produced_at,
+        "sunk_at": produced_at + rng.integers(50, 3000, n),
+        # Most flights scored by the prediction join, the rest still unscored
+        "delay_risk": np.where(rng.random(n) < 0.8, rng.beta(2, 5, n), np.nan),
+    })
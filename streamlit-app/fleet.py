@@ -0,0 +1,327 @@
+"""Compact columnar representation of the fleet.
+
+``process_flight_data`` used to keep ``origin_coord``/``destination_coord`` as
+Python lists per row, statuses and phases as object strings, and computed
+progress, position and ETA row by row with ``df.apply``. ``Fleet`` keeps the
+same information as flat NumPy arrays instead:
+
+* coordinates as float64 (or float32) arrays
+* status, phase and the raw origin/destination strings as categorical codes
+* departure/arrival times as int64 epoch seconds
+
+Derived columns are computed vectorized for a given ``now``. ``to_frame``
+produces the DataFrame the dashboards render from and ``advance`` moves an
+existing frame to a new ``now`` in place; ``arrow=True`` backs the string
+columns with Arrow instead of Python objects. ``Lifecycle`` does the same
+incrementally, recomputing only the flights in the air on each tick.
+"""
+
+import time
+import weakref
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+PHASES = ["Takeoff", "Climbing", "Cruising", "Descending", "Landing"]
+PHASE_EDGES = np.array([0.1, 0.3, 0.7, 0.9])
+
+# Columns that are part of the compact core; anything else in the source frame
+# (airline, altitude, tracing timestamps, ...) is carried along as-is.
+CORE_COLUMNS = ["flight_id", "origin", "destination", "status", "departure_time", "arrival_time"]
+
+
+def parse_coordinates(values, dtype=np.float64):
+    """Parse ``"[lat, lon]"`` strings into two float arrays.
+
+    Routes repeat, so only the distinct strings are parsed and the result is
+    broadcast back through the categorical codes. Returns
+    ``(lat, lon, categorical)``; unparseable values become NaN.
+    """
+    categorical = pd.Categorical(values)
+    parts = pd.Series(categorical.categories, dtype=object).str.strip("[]() ").str.split(",", n=1, expand=True)
+    if parts.shape[1] < 2:
+        parts[1] = None
+    # A trailing NaN slot catches the -1 code of missing values
+    lat = np.append(pd.to_numeric(parts[0], errors="coerce").to_numpy(dtype), np.nan)
+    lon = np.append(pd.to_numeric(parts[1], errors="coerce").to_numpy(dtype), np.nan)
+    codes = np.where(categorical.codes < 0, len(lat) - 1, categorical.codes)
+    return lat[codes].astype(dtype), lon[codes].astype(dtype), categorical
+
+
+def progress_at(departure_time, arrival_time, now):
+    """Fraction of each flight completed at ``now`` (epoch seconds), as float32."""
+    duration = np.maximum(1, arrival_time - departure_time)
+    return np.clip((now - departure_time) / duration, 0.0, 1.0).astype(np.float32)
+
+
+def phase_codes(progress):
+    return np.searchsorted(PHASE_EDGES, progress, side="right").astype(np.int8)
+
+
+def advance(frame, now=None):
+    """Recompute progress, position, ETA and phase of a ``to_frame`` frame in place.
+
+    Only the time-dependent columns are rewritten, from the coordinate and
+    epoch arrays already in the frame, so a clock tick never re-parses or
+    reloads anything.
+    """
+    now = time.time() if now is None else now
+    departure = frame["departure_time"].to_numpy()
+    arrival = frame["arrival_time"].to_numpy()
+    progress = progress_at(departure, arrival, now)
+    origin_lat, origin_lon = frame["origin_lat"].to_numpy(), frame["origin_lon"].to_numpy()
+
+    frame["progress"] = progress
+    frame["current_lat"] = origin_lat + (frame["dest_lat"].to_numpy() - origin_lat) * progress
+    frame["current_lon"] = origin_lon + (frame["dest_lon"].to_numpy() - origin_lon) * progress
+    frame["eta"] = (departure + ((arrival - departure) * progress).astype(np.int64)).astype("datetime64[s]")
+    frame["flight_phase"] = phase_categorical(phase_codes(progress))
+    return frame
+
+
+def phase_categorical(codes):
+    """``flight_phase`` column of phase codes, without unused phases."""
+    used = np.bincount(codes, minlength=len(PHASES)) > 0
+    if not used.all():
+        codes = (np.cumsum(used) - 1).astype(np.int8)[codes]
+    return pd.Categorical.from_codes(codes, np.array(PHASES, dtype=object)[used], validate=False)
+
+
+class Lifecycle:
+    """Incremental ``advance`` for one ``to_frame`` frame.
+
+    Progress, position, ETA and phase only change while a flight is in the
+    air (progress strictly between 0 and 1); scheduled and landed flights
+    are stable. Departures and arrivals are kept as time-ordered transition
+    queues (row indices sorted by time), so a tick finds every flight that
+    crossed a transition since the previous tick with two binary searches
+    per queue, in either direction of time. Only those flights and the ones
+    already in the air are recomputed; the airborne set is then rebuilt from
+    them. The derived arrays are owned here and written back as whole
+    columns.
+
+    ``version`` is the clock time of the last tick that changed the frame.
+    Frames of the same snapshot with the same version hold the same
+    columns, so it can key anything derived from them across sessions.
+    """
+
+    def __init__(self, frame):
+        self.frame = weakref.ref(frame)
+        self.departure = frame["departure_time"].to_numpy()
+        self.arrival = frame["arrival_time"].to_numpy()
+        # progress_at reaches 1 at departure + max(1, duration)
+        end = self.departure + np.maximum(1, self.arrival - self.departure)
+        self.departures = np.argsort(self.departure)
+        self.departure_queue = self.departure[self.departures]
+        self.arrivals = np.argsort(end)
+        self.arrival_queue = end[self.arrivals]
+        self.origin_lat, self.origin_lon = frame["origin_lat"].to_numpy(), frame["origin_lon"].to_numpy()
+        self.dest_lat, self.dest_lon = frame["dest_lat"].to_numpy(), frame["dest_lon"].to_numpy()
+
+        n = len(frame)
+        self.progress = np.zeros(n, np.float32)
+        self.current_lat = np.zeros(n, self.origin_lat.dtype)
+        self.current_lon = np.zeros(n, self.origin_lon.dtype)
+        self.eta = np.zeros(n, np.int64)
+        self.phase = np.zeros(n, np.int8)
+        self.airborne = np.empty(0, np.intp)
+        self.now = None
+        self.recomputed = 0
+        self.changed_at = None
+
+    @property
+    def version(self):
+        return self.changed_at
+
+    def tracks(self, frame):
+        """Whether this lifecycle belongs to ``frame``."""
+        return self.frame() is frame
+
+    def _crossing(self, rows, queue, low, high):
+        return rows[np.searchsorted(queue, low, side="left"):np.searchsorted(queue, high, side="right")]
+
+    def changed_rows(self, now):
+        """Rows whose derived columns can differ between the last tick and ``now``."""
+        n = len(self.progress)
+        if self.now is None:
+            return np.arange(n)
+        # Integer bounds: a float key would cast the whole queue on every search
+        low, high = int(np.floor(min(self.now, now))), int(np.ceil(max(self.now, now)))
+        changed = np.zeros(n, dtype=bool)
+        changed[self.airborne] = True
+        changed[self._crossing(self.departures, self.departure_queue, low, high)] = True
+        changed[self._crossing(self.arrivals, self.arrival_queue, low, high)] = True
+        return np.flatnonzero(changed)
+
+    def advance(self, frame, now=None):
+        """Move ``frame`` to ``now`` in place, like ``advance``."""
+        now = time.time() if now is None else now
+        rows = self.changed_rows(now)
+        departure, arrival = self.departure[rows], self.arrival[rows]
+        progress = progress_at(departure, arrival, now)
+        origin_lat, origin_lon = self.origin_lat[rows], self.origin_lon[rows]
+        self.progress[rows] = progress
+        self.current_lat[rows] = origin_lat + (self.dest_lat[rows] - origin_lat) * progress
+        self.current_lon[rows] = origin_lon + (self.dest_lon[rows] - origin_lon) * progress
+        self.eta[rows] = departure + ((arrival - departure) * progress).astype(np.int64)
+        self.phase[rows] = phase_codes(progress)
+        self.airborne = rows[(progress > 0) & (progress < 1)]
+        if len(rows):
+            self.changed_at = now
+        self.now = now
+        self.recomputed = len(rows)
+
+        frame["progress"] = self.progress.copy()
+        frame["current_lat"] = self.current_lat.copy()
+        frame["current_lon"] = self.current_lon.copy()
+        frame["eta"] = self.eta.astype("datetime64[s]")
+        frame["flight_phase"] = phase_categorical(self.phase)
+        return frame
+
+
+@dataclass
+class Fleet:
+    flight_id: object
+    origin: pd.Categorical
+    destination: pd.Categorical
+    origin_lat: np.ndarray
+    origin_lon: np.ndarray
+    dest_lat: np.ndarray
+    dest_lon: np.ndarray
+    status: pd.Categorical
+    departure_time: np.ndarray
+    arrival_time: np.ndarray
+    extras: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_frame(cls, df, coord_dtype=np.float64, arrow=False):
+        """Build a fleet from raw ``flights`` rows (as returned by ``load_all_flights``)."""
+        origin_lat, origin_lon, origin = parse_coordinates(df["origin"], coord_dtype)
+        dest_lat, dest_lon, destination = parse_coordinates(df["destination"], coord_dtype)
+
+        flight_id = df["flight_id"]
+        if arrow:
+            flight_id = flight_id.astype("string[pyarrow]").array
+        else:
+            flight_id = flight_id.to_numpy(dtype=object)
+
+        return cls(
+            flight_id=flight_id,
+            origin=origin,
+            destination=destination,
+            origin_lat=origin_lat,
+            origin_lon=origin_lon,
+            dest_lat=dest_lat,
+            dest_lon=dest_lon,
+            status=pd.Categorical(df["status"]),
+            departure_time=df["departure_time"].to_numpy(np.int64),
+            arrival_time=df["arrival_time"].to_numpy(np.int64),
+            extras={c: df[c].to_numpy() for c in df.columns if c not in CORE_COLUMNS},
+        )
+
+    def __len__(self):
+        return len(self.departure_time)
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the fleet arrays."""
+        total = 0
+        for value in (self.origin_lat, self.origin_lon, self.dest_lat, self.dest_lon,
+                      self.departure_time, self.arrival_time):
+            total += value.nbytes
+        for cat in (self.origin, self.destination, self.status):
+            total += cat.codes.nbytes + pd.Series(cat.categories).memory_usage(deep=True)
+        total += pd.Series(self.flight_id).memory_usage(deep=True, index=False)
+        total += sum(pd.Series(v).memory_usage(deep=True, index=False) for v in self.extras.values())
+        return int(total)
+
+    def to_frame(self, now=None):
+        """Render-ready DataFrame with the derived columns for ``now``."""
+        frame = pd.DataFrame({
+            "flight_id": self.flight_id,
+            "origin": self.origin,
+            "destination": self.destination,
+            "status": self.status.remove_unused_categories(),
+            "departure_time": self.departure_time,
+            "arrival_time": self.arrival_time,
+            **self.extras,
+            "origin_lat": self.origin_lat,
+            "origin_lon": self.origin_lon,
+            "dest_lat": self.dest_lat,
+            "dest_lon": self.dest_lon,
+            "departure_datetime": pd.to_datetime(self.departure_time, unit="s"),
+            "arrival_datetime": pd.to_datetime(self.arrival_time, unit="s"),
+            "flight_duration": ((self.arrival_time - self.departure_time) / 3600).astype(np.float32),
+        })
+        return advance(frame, now)
+
+    def to_arrow(self):
+        """The fleet as a ``pyarrow.Table`` (status/origin/destination dictionary-encoded).
+
+        Dictionary columns always use int32 indices, so tables built from
+        different frames share a schema and can be concatenated.
+        """
+        import pyarrow as pa
+
+        def dictionary(cat):
+            return pa.DictionaryArray.from_pandas(cat).cast(pa.dictionary(pa.int32(), pa.string()))
+
+        columns = {
+            "flight_id": pa.array(self.flight_id, type=pa.string()),
+            "origin": dictionary(self.origin),
+            "destination": dictionary(self.destination),
+            "origin_lat": self.origin_lat,
+            "origin_lon": self.origin_lon,
+            "dest_lat": self.dest_lat,
+            "dest_lon": self.dest_lon,
+            "status": dictionary(self.status),
+            "departure_time": self.departure_time,
+            "arrival_time": self.arrival_time,
+        }
+        for name, values in self.extras.items():
+            columns[name] = pa.array(values)
+        return pa.table(columns)
+
+    @classmethod
+    def from_arrow(cls, table):
+        """Inverse of ``to_arrow``.
+
+        Numeric columns and dictionary indices are zero-copy views when the
+        table has one chunk and no nulls, and strings stay Arrow-backed, so
+        a memory-mapped table is not copied into Python objects.
+        """
+        import pyarrow as pa
+
+        def categorical(name):
+            column = table.column(name)
+            array = column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+            if not isinstance(array, pa.DictionaryArray):
+                return pd.Categorical(array.to_pandas())
+            codes = array.indices.fill_null(-1).to_numpy()
+            return pd.Categorical.from_codes(codes, pd.Index(array.dictionary.to_pandas()))
+
+        def numeric(name):
+            return table.column(name).to_numpy()
+
+        def values(name):
+            column = table.column(name)
+            if pa.types.is_integer(column.type) or pa.types.is_floating(column.type):
+                return column.to_numpy()
+            return column.to_pandas().array
+
+        core = {"flight_id", "origin", "destination", "origin_lat", "origin_lon", "dest_lat",
+                "dest_lon", "status", "departure_time", "arrival_time"}
+        return cls(
+            flight_id=values("flight_id"),
+            origin=categorical("origin"),
+            destination=categorical("destination"),
+            origin_lat=numeric("origin_lat"),
+            origin_lon=numeric("origin_lon"),
+            dest_lat=numeric("dest_lat"),
+            dest_lon=numeric("dest_lon"),
+            status=categorical("status"),
+            departure_time=numeric("departure_time"),
+            arrival_time=numeric("arrival_time"),
+            extras={name: values(name) for name in table.column_names if name not in core},
+        )
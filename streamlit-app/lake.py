@@ -0,0 +1,74 @@
+"""Analytical scans over the flights Parquet lake.
+
+The Spark sink appends validated events to a lake partitioned by departure
+``date``/``hour`` (see ``scripts/lake.py``). Queries here go through
+``pyarrow.dataset``: the date range prunes partition directories, the
+``departure_time`` filter is pushed down to Parquet row-group statistics,
+and only the columns an aggregate needs are decoded. Trend queries therefore
+never touch the ``flights`` table in Postgres.
+"""
+
+import os
+from datetime import datetime, timezone
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import streamlit as st
+
+LAKE_DIR = os.environ.get("FLIGHTS_LAKE_DIR", "/app/shared_data/lake/flights")
+
+PARTITIONING = ds.partitioning(pa.schema([("date", pa.string()), ("hour", pa.int32())]), flavor="hive")
+
+
+def open_lake(root=LAKE_DIR):
+    """The lake as a ``pyarrow`` dataset, or None if nothing was written yet."""
+    if not os.path.isdir(root):
+        return None
+    dataset = ds.dataset(root, format="parquet", partitioning=PARTITIONING)
+    return dataset if dataset.files else None
+
+
+def window_filter(start, end):
+    """Filter for departures in ``[start, end)`` (epoch seconds)."""
+    def day(t):
+        return datetime.fromtimestamp(t, tz=timezone.utc).strftime("%Y-%m-%d")
+
+    return ((ds.field("date") >= day(start)) & (ds.field("date") <= day(end))
+            & (ds.field("departure_time") >= int(start)) & (ds.field("departure_time") < int(end)))
+
+
+def scan_latest(dataset, start, end, columns):
+    """Latest event per flight departing in the window, with ``columns`` only.
+
+    Streaming appends keep every status change of a flight until the
+    partition is compacted, so rows are deduplicated by ``flight_id``.
+    """
+    needed = list(dict.fromkeys(["flight_id", "produced_at", "sunk_at", *columns]))
+    frame = dataset.to_table(columns=needed, filter=window_filter(start, end)).to_pandas()
+    frame = frame.sort_values(["produced_at", "sunk_at"], kind="stable", na_position="first")
+    return frame.drop_duplicates("flight_id", keep="last")[list(columns)]
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def departure_summary(start, end, root=LAKE_DIR):
+    """Flights per departure date, hour and latest status in ``[start, end)``.
+
+    Returns ``(summary, files_scanned)``, or ``(None, 0)`` without a lake.
+    """
+    dataset = open_lake(root)
+    if dataset is None:
+        return None, 0
+    files = sum(1 for _ in dataset.get_fragments(filter=window_filter(start, end)))
+    latest = scan_latest(dataset, start, end, ["date", "hour", "status"])
+    summary = latest.groupby(["date", "hour", "status"]).size().rename("flights").reset_index()
+    summary["date"] = pd.to_datetime(summary["date"]).dt.date
+    return summary, files
+
+
+def frame_summary(df):
+    """The same summary as ``departure_summary`` over a processed fleet frame."""
+    departure = df["departure_datetime"]
+    summary = df.groupby([departure.dt.date.rename("date"), departure.dt.hour.rename("hour"), "status"],
+                         observed=True).size()
+    return summary.rename("flights").reset_index()
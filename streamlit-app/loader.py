@@ -0,0 +1,99 @@
+"""Bulk read paths from Postgres that skip per-cell Python conversion.
+
+``pd.read_sql`` on a psycopg2 connection fetches row tuples and converts
+every cell to a Python object before pandas sees it. ``read_frame`` has the
+server run ``COPY (query) TO STDOUT`` as CSV instead. A writer thread feeds
+the stream through a pipe into ``pyarrow.csv``, which parses it into typed
+columns on several threads, so Python objects only appear for the columns
+pandas keeps as objects. CSV rather than binary COPY: pyarrow parses it
+natively, and its NULL/empty-string rules can be matched exactly.
+
+``iter_frames`` streams a query through a named (server-side) cursor in
+fixed-size chunks, for callers that fold results instead of holding the
+whole table.
+"""
+
+import os
+import threading
+import uuid
+
+import pandas as pd
+import pyarrow.csv as pacsv
+
+
+def copy_query(cur, query, params=None):
+    """``COPY`` statement for ``query`` with ``params`` bound client-side (COPY takes none)."""
+    if params:
+        query = cur.mogrify(query, params).decode()
+    return f"COPY ({query.strip().rstrip(';')}) TO STDOUT WITH (FORMAT csv, HEADER true)"
+
+
+def read_table(conn, query, params=None, column_types=None):
+    """Run ``query`` through ``COPY ... TO STDOUT`` and parse it into a ``pyarrow.Table``."""
+    read_fd, write_fd = os.pipe()
+    errors = []
+
+    with conn.cursor() as cur:
+        statement = copy_query(cur, query, params)
+
+        def copy_out():
+            try:
+                with os.fdopen(write_fd, "wb") as sink:
+                    cur.copy_expert(statement, sink)
+            except Exception as e:  # re-raised in the reading thread
+                errors.append(e)
+
+        writer = threading.Thread(target=copy_out, daemon=True)
+        writer.start()
+        try:
+            with os.fdopen(read_fd, "rb") as source:
+                table = pacsv.read_csv(
+                    source,
+                    convert_options=pacsv.ConvertOptions(
+                        column_types=column_types or {},
+                        # COPY writes NULL as an empty field and '' as "". Values
+                        # such as NA or null are data, unlike pyarrow's defaults
+                        null_values=[""],
+                        strings_can_be_null=True,
+                        quoted_strings_can_be_null=False,
+                    ),
+                )
+        except Exception:
+            if errors:
+                raise errors[0]
+            raise
+        finally:
+            writer.join()
+    if errors:
+        raise errors[0]
+    return table
+
+
+def read_frame(conn, query, params=None, column_types=None):
+    """``read_table`` as a pandas DataFrame, a drop-in for ``pd.read_sql``."""
+    return read_table(conn, query, params, column_types).to_pandas()
+
+
+def iter_frames(conn, query, params=None, chunk_rows=100_000):
+    """Yield ``query`` results as DataFrames of up to ``chunk_rows`` rows.
+
+    Rows come from a named server-side cursor, so only one chunk is held on
+    either side. Named cursors need a transaction; on an autocommit
+    connection one is opened for the duration and rolled back afterwards.
+    Pass a connection nothing else uses meanwhile: the transaction and the
+    autocommit switch are visible to every user of ``conn``.
+    """
+    autocommit = conn.autocommit
+    conn.autocommit = False
+    try:
+        with conn.cursor(name=f"stream_{uuid.uuid4().hex[:12]}") as cur:
+            cur.itersize = chunk_rows
+            cur.execute(query, params)
+            while True:
+                rows = cur.fetchmany(chunk_rows)
+                if not rows:
+                    break
+                yield pd.DataFrame(rows, columns=[d.name for d in cur.description])
+    finally:
+        conn.rollback()
+        conn.autocommit = autocommit
@@ -0,0 +1,71 @@
+"""Prometheus metrics for the Streamlit dashboards.
+
+Served on ``$METRICS_PORT`` (default 1239), next to the pipeline exporters.
+"""
+
+import os
+import time
+
+import streamlit as st
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+DASHBOARD_PORT = 1239
+
+STAGE_LATENCY = Histogram(
+    "flights_stage_latency_seconds",
+    "Latency of flight events per pipeline stage",
+    ["stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+             30, 60, 120, 300, 600, 1800, 3600),
+)
+
+ERRORS = Counter("flights_errors", "Errors raised while handling events", ["component"])
+
+QUERY_SECONDS = Histogram(
+    "flights_operation_seconds",
+    "Time spent per operation",
+    ["component", "operation"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+).labels(component="dashboard", operation="query")
+
+CACHED_ROWS = Gauge("flights_cached_rows", "Flight rows held by the dashboard", ["dashboard"])
+
+ROUTE_CACHE = Counter("flights_route_cache_lookups", "Route geometry cache lookups", ["result"])
+
+FIGURE_BUILDS = Counter("flights_figure_builds", "Figure requests served from the render cache or built", ["result"])
+
+RENDER_CACHE_BYTES = Gauge("flights_render_cache_bytes", "Approximate size of the figures in the render cache")
+
+
+@st.cache_resource
+def start_metrics_server():
+    """Start the metrics endpoint once per Streamlit process."""
+    port = int(os.environ.get("METRICS_PORT", DASHBOARD_PORT))
+    try:
+        start_http_server(port)
+    except OSError:
+        # Another dashboard process on this host already serves the port
+        return None
+    return port
+
+
+def observe_load_latency(df, limit=1000):
+    """Record Postgres->UI and end-to-end latency for freshly loaded rows.
+
+    Returns the median age of the loaded rows in seconds (``None`` when the
+    table has no tracing columns yet).
+    """
+    if df.empty or "sunk_at" not in df.columns:
+        return None
+
+    now = time.time()
+    step = max(1, len(df) // limit)
+    sample = df.iloc[::step]
+    for stage, column in (("postgres_to_ui", "sunk_at"), ("end_to_end", "produced_at")):
+        ages = now - sample[column].dropna() / 1000
+        histogram = STAGE_LATENCY.labels(stage=stage)
+        for age in ages.clip(lower=0):
+            histogram.observe(age)
+
+    produced_at = df["produced_at"].dropna()
+    return float((now - produced_at / 1000).median()) if not produced_at.empty else None
@@ -0,0 +1,91 @@
+"""Run a dashboard's render pipeline headlessly and profile it.
+
+Loads a fixture (CSV/Parquet export of the ``flights`` table, or a synthetic
+frame), then runs the same steps the dashboard does on each rerun, including
+serializing the folium map the way ``st_folium`` does and the Plotly globe the
+way ``st.plotly_chart`` does.
+
+    python profile_render.py --app app --rows 20000 --output /tmp/render
+    python profile_render.py --app dashboard --fixture flights.parquet
+"""
+
+import argparse
+import importlib
+import logging
+import os
+import warnings
+
+import pandas as pd
+
+from fixtures import synthetic_flights
+from profiling import Profiler
+
+MAP_BUILDERS = {
+    "app": "create_advanced_flight_map",
+    "dashboard": "create_interactive_flight_map",
+}
+
+
+def load_fixture(path, rows, seed):
+    if path is None:
+        return synthetic_flights(rows, seed=seed)
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def render(module, app, raw, profiler):
+    """Run the dashboard's render steps under ``profiler``."""
+    with profiler.section("load_all_flights"):
+        df = raw.copy()
+    with profiler.section("process_flight_data"):
+        df = module.process_flight_data(df)
+
+    builder = MAP_BUILDERS[app]
+    with profiler.section(builder):
+        flight_map = getattr(module, builder)(df)
+    with profiler.section("st_folium"):
+        flight_map.get_root().render()
+
+    if hasattr(module, "create_3d_globe"):
+        with profiler.section("create_3d_globe"):
+            globe = module.create_3d_globe(df)
+        with profiler.section("plotly_chart"):
+            globe.to_json()
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", choices=sorted(MAP_BUILDERS), default="app")
+    parser.add_argument("--fixture", help="CSV or Parquet file with flights table rows")
+    parser.add_argument("--rows", type=int, default=5000, help="synthetic rows when no fixture is given")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="render", help="prefix for .prof and .folded outputs")
+    args = parser.parse_args()
+
+    # Importing the app runs its st.* calls in bare mode, which only log warnings
+    logging.disable(logging.WARNING)
+    warnings.filterwarnings("ignore", category=UserWarning)
+    module = importlib.import_module(args.app)
+
+    raw = load_fixture(args.fixture, args.rows, args.seed)
+    profiler = Profiler(enabled=True)
+    profiler.start()
+    render(module, args.app, raw, profiler)
+    profiler.stop()
+
+    print(profiler.timings().to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    print()
+    print(profiler.top_functions())
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(f"{args.output}.prof", "wb") as f:
+        f.write(profiler.stats_dump())
+    with open(f"{args.output}.folded", "w") as f:
+        f.write(profiler.folded())
+    print(f"wrote {args.output}.prof and {args.output}.folded")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Opt-in profiling for the dashboards.
+
+Enable with ``?profile=1`` in the dashboard URL or ``FLIGHTS_PROFILE=1`` in the
+environment. Each instrumented section records wall time and the change in
+resident memory; the sidebar shows a timing panel with downloads for a
+cProfile dump (open with ``snakeviz`` or ``flameprof``) and the section
+timings in folded-stack format for ``flamegraph.pl``.
+"""
+
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import resource
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss_mb():
+    """Resident set size of this process in MB."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / 2**20
+    except OSError:
+        # Not Linux: fall back to the peak, which is the best portable number
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Profiler:
+    """Per-section timers plus an optional cProfile run."""
+
+    def __init__(self, enabled=False, cprofile=True):
+        self.enabled = enabled
+        self.sections = []
+        self._stack = []
+        self._profile = cProfile.Profile() if enabled and cprofile else None
+
+    def start(self):
+        if self._profile:
+            self._profile.enable()
+
+    def stop(self):
+        if self._profile:
+            self._profile.disable()
+
+    @contextmanager
+    def section(self, name):
+        if not self.enabled:
+            yield
+            return
+        self._stack.append(name)
+        rss_before = current_rss_mb()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sections.append({
+                "section": ";".join(self._stack),
+                "seconds": time.perf_counter() - start,
+                "memory_delta_mb": current_rss_mb() - rss_before,
+            })
+            self._stack.pop()
+
+    def timings(self):
+        return pd.DataFrame(self.sections, columns=["section", "seconds", "memory_delta_mb"])
+
+    def folded(self):
+        """Section timings as folded stacks (microseconds), one line per section."""
+        return "\n".join(f"render;{s['section']} {int(s['seconds'] * 1e6)}" for s in self.sections) + "\n"
+
+    def stats_dump(self):
+        """The cProfile data in the ``pstats`` dump format, as bytes."""
+        if not self._profile:
+            return b""
+        self._profile.create_stats()
+        return marshal.dumps(self._profile.stats)
+
+    def top_functions(self, limit=15):
+        if not self._profile:
+            return ""
+        out = io.StringIO()
+        pstats.Stats(self._profile, stream=out).sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+
+    def render_sidebar(self):
+        """Show the timing panel and export buttons in the sidebar."""
+        if not self.enabled:
+            return
+        with st.sidebar.expander("⏱️ Render Profile", expanded=True):
+            timings = self.timings()
+            st.dataframe(
+                timings.style.format({"seconds": "{:.3f}", "memory_delta_mb": "{:+.1f}"}),
+                use_container_width=True,
+                hide_index=True,
+            )
+            st.caption(f"Total instrumented: {timings['seconds'].sum():.3f}s • RSS {current_rss_mb():.0f} MB")
+            st.download_button("💾 Folded stacks", self.folded(), file_name="render.folded")
+            if self._profile:
+                st.download_button("💾 cProfile dump", self.stats_dump(), file_name="render.prof")
+
+
+def profiling_requested():
+    """True when profiling was enabled through the URL or the environment."""
+    if os.environ.get("FLIGHTS_PROFILE", "") not in ("", "0"):
+        return True
+    try:
+        return st.query_params.get("profile", "0") not in ("", "0")
+    except Exception:
+        return False
@@ -0,0 +1,189 @@
+"""Figure building off the script thread, and a render cache shared by sessions.
+
+Plotly figures and map layers are built from the fleet frame without
+touching Streamlit, so they can be built while the script thread keeps
+emitting elements. ``FigureBuilder`` submits the builders of a rerun to a
+thread pool shared by all sessions, early in the script, and the sections
+collect the results where they render them. pandas and NumPy release the
+GIL for most aggregation work, so independent builds overlap.
+
+Built figures are kept in a ``RenderCache`` shared by every session of the
+server, keyed by the figure's name and the key it was submitted with: the
+fleet's data version (snapshot content and clock bucket) plus the filters
+and viewport it depends on. An unchanged view, in this session or another
+one looking at the same data, is served without building anything. The
+cache is an LRU bounded by the approximate size of its figures
+(``$FLIGHTS_RENDER_CACHE_MB``, default 256).
+
+Builders run with the session's script context attached, so they may call
+``st.cache_data``/``st.cache_resource`` functions. They must not emit
+elements; only the script thread lays out the page. Cached values are
+shared, so builders return values nobody mutates afterwards: plotly
+figures (``st.plotly_chart`` serializes a copy) and map layers as strings,
+never folium maps, which ``st_folium`` changes while rendering them.
+"""
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from metrics import FIGURE_BUILDS, RENDER_CACHE_BYTES
+
+RENDER_CACHE_MB = int(os.environ.get("FLIGHTS_RENDER_CACHE_MB", "256"))
+
+
+@st.cache_resource
+def render_pool(workers=4):
+    """Thread pool for figure builds, one per server process."""
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="render")
+
+
+@st.cache_resource
+def render_cache(max_mb=RENDER_CACHE_MB):
+    """Render cache shared by every session of the server."""
+    return RenderCache(max_mb * 2**20)
+
+
+def with_script_context(fn):
+    """Wrap ``fn`` to run with the calling session's script context."""
+    ctx = get_script_run_ctx(suppress_warning=True)
+
+    def run(*args, **kwargs):
+        thread = threading.current_thread()
+        add_script_run_ctx(thread, ctx)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            add_script_run_ctx(thread, None)
+
+    return run
+
+
+def figure_nbytes(value):
+    """Approximate size of a built figure in bytes."""
+    if isinstance(value, (tuple, list)):
+        return sum(figure_nbytes(v) for v in value)
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if hasattr(value, "to_plotly_json"):
+        import plotly.io
+
+        # What st.plotly_chart sends for it
+        return len(plotly.io.to_json(value, validate=False))
+    if hasattr(value, "memory_usage"):
+        return int(np.sum(value.memory_usage(deep=True)))
+    return sys.getsizeof(value)
+
+
+class RenderCache:
+    """LRU of built figures bounded by their approximate size in bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """``(True, figure)`` when ``key`` is cached, else ``(False, None)``."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def put(self, key, value):
+        """Cache ``value`` under ``key``, evicting the least recently used figures."""
+        nbytes = figure_nbytes(value)
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            # A figure larger than the whole cache would only flush it
+            if nbytes <= self.max_bytes:
+                self.entries[key] = (value, nbytes)
+                self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.nbytes -= evicted
+                self.evictions += 1
+            RENDER_CACHE_BYTES.set(self.nbytes)
+        return value
+
+    @property
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"figures": len(self.entries), "bytes": self.nbytes, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
+
+
+class FigureBuilder:
+    """The latest build of each named figure of one session, with its key."""
+
+    def __init__(self, pool, cache):
+        self.pool = pool
+        self.cache = cache
+        self.builds = {}
+
+    def submit(self, name, key, fn, *args, **kwargs):
+        """Start building ``name`` unless it is cached or already building under ``key``.
+
+        A ``None`` key is never cached, and a build that failed is not cached.
+        """
+        building = self.builds.get(name)
+        if key is not None and building is not None and building[0] == key and not building[1].done():
+            FIGURE_BUILDS.labels(result="hit").inc()
+            return building[1]
+        if key is not None:
+            found, value = self.cache.get((name, key))
+            if found:
+                FIGURE_BUILDS.labels(result="hit").inc()
+                future = Future()
+                future.set_result(value)
+                self.builds[name] = (key, future)
+                return future
+
+        FIGURE_BUILDS.labels(result="build").inc()
+        build = with_script_context(fn)
+
+        def run():
+            value = build(*args, **kwargs)
+            return value if key is None else self.cache.put((name, key), value)
+
+        future = self.pool.submit(run)
+        self.builds[name] = (key, future)
+        return future
+
+    def result(self, name):
+        """Wait for and return the figure ``name``."""
+        return self.builds[name][1].result()
+
+
+def figure_builder(key="figure_builder"):
+    """The session's ``FigureBuilder``."""
+    if key not in st.session_state:
+        st.session_state[key] = FigureBuilder(render_pool(), render_cache())
+    return st.session_state[key]
+
+
+def cache_caption():
+    """One-line summary of the render cache for the dashboards' captions."""
+    stats = render_cache().stats
+    return (f"🎨 {stats['figures']} figures cached ({stats['bytes'] / 2**20:.1f} MiB), "
+            f"{stats['hit_rate']:.0%} hits")
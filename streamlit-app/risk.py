@@ -0,0 +1,63 @@
+"""Per-flight delay risk, as written to ``flights.delay_risk`` by the pipeline.
+
+The Spark job joins the prediction consumer's scores back onto the flights
+(``scripts/flight_risk.py``), so the risk arrives with the rows the
+dashboards already load. Flights that were not scored yet have no risk
+(NaN). Risk is shown in three bands, which colour the aircraft markers.
+"""
+
+import numpy as np
+
+RISK_COLUMN = "delay_risk"
+
+# Upper bound, label and colour of each band
+RISK_BANDS = [
+    (0.3, "Low", "#2ed573"),
+    (0.6, "Elevated", "#ff9a00"),
+    (np.inf, "High", "#ff4757"),
+]
+UNSCORED_COLOR = "#747d8c"
+RISK_COLORS = {label: color for _, label, color in RISK_BANDS}
+
+
+def has_risk(df):
+    """Whether any flight of ``df`` has been scored."""
+    return RISK_COLUMN in df.columns and bool(df[RISK_COLUMN].notna().any())
+
+
+def risk_values(df):
+    """Risk of every flight of ``df`` as float64, NaN where unscored."""
+    if RISK_COLUMN not in df.columns:
+        return np.full(len(df), np.nan)
+    # Rows fetched through a cursor hold None rather than NaN
+    return df[RISK_COLUMN].to_numpy(np.float64, na_value=np.nan)
+
+
+def risk_band_colors(risk):
+    """Band colour per flight, grey for flights without a score."""
+    risk = np.asarray(risk, dtype=np.float64)
+    edges = np.array([upper for upper, _, _ in RISK_BANDS[:-1]])
+    colors = np.array([color for _, _, color in RISK_BANDS] + [UNSCORED_COLOR], dtype=object)
+    bands = np.where(np.isnan(risk), len(RISK_BANDS), np.searchsorted(edges, risk, side="right"))
+    return colors[bands]
+
+
+def risk_mask(df, risk_range):
+    """Rows of ``df`` whose risk lies in ``risk_range``.
+
+    The full range keeps unscored flights; any narrower one drops them.
+    """
+    low, high = risk_range
+    if not has_risk(df) or (low <= 0.0 and high >= 1.0):
+        return np.ones(len(df), dtype=bool)
+    risk = risk_values(df)
+    return (risk >= low) & (risk <= high)
+
+
+def risk_summary(df):
+    """``(scored flights, mean risk, high-risk flights)`` of ``df``."""
+    risk = risk_values(df)
+    scored = risk[~np.isnan(risk)]
+    if not len(scored):
+        return 0, None, 0
+    return len(scored), float(scored.mean()), int((scored >= RISK_BANDS[-2][0]).sum())
@@ -0,0 +1,229 @@
+"""Memoized route geometry for the flight maps.
+
+Origin/destination pairs repeat across flights and across refreshes, so the
+geometry of a route is built once and kept in an LRU-bounded ``RouteCache``
+keyed by the raw ``(origin, destination)`` strings: parsed coordinates,
+great-circle distance, the densified path and its pre-serialized GeoJSON.
+Misses are parsed in one vectorized batch, so per-refresh geometry cost
+scales with new routes only.
+
+The path follows the dashboards' position model (linear in latitude and
+longitude), densified so the aircraft markers sit on the drawn line in Web
+Mercator instead of drifting off a straight two-point segment.
+
+Maps draw every visible route as one Leaflet GeoJSON layer concatenated from
+the cached strings (``FeatureLayer``): one line per route and status instead
+of one polyline per flight, and one circle marker per airport instead of two
+per flight. The dashboards add their aircraft markers to the same layer, so
+a map is a handful of folium elements whatever the number of flights, and
+its layer is a plain string that the render cache can keep.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+from branca.element import MacroElement
+from folium.template import Template
+
+from fleet import parse_coordinates
+from metrics import ROUTE_CACHE
+from spatial import haversine_km
+
+DEFAULT_COLOR = "#5352ed"
+
+
+@dataclass(frozen=True)
+class Route:
+    origin: str
+    destination: str
+    origin_point: tuple
+    destination_point: tuple
+    distance_km: float
+    path: np.ndarray
+    geojson: str
+
+
+def densify(origin_lat, origin_lon, dest_lat, dest_lon, step_deg=2.0, max_points=64):
+    """``(n, 2)`` lat/lon points along a route, at most ``step_deg`` apart."""
+    span = max(abs(dest_lat - origin_lat), abs(dest_lon - origin_lon))
+    points = int(min(max_points, max(2, np.ceil(span / step_deg) + 1)))
+    t = np.linspace(0.0, 1.0, points)
+    return np.column_stack((origin_lat + (dest_lat - origin_lat) * t, origin_lon + (dest_lon - origin_lon) * t))
+
+
+def line_geojson(path):
+    """GeoJSON ``LineString`` of a lat/lon path (GeoJSON is lon/lat)."""
+    return json.dumps({"type": "LineString", "coordinates": np.round(path[:, ::-1], 4).tolist()},
+                      separators=(",", ":"))
+
+
+class RouteCache:
+    """LRU cache of ``Route`` geometry keyed by ``(origin, destination)``.
+
+    Shared by every session and used from the render pool, so lookups hold
+    a lock.
+    """
+
+    def __init__(self, maxsize=20000, step_deg=2.0):
+        self.maxsize = maxsize
+        self.step_deg = step_deg
+        self.routes = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.routes)
+
+    def get_many(self, pairs):
+        """``Route`` (or None when unparseable) for each ``(origin, destination)`` pair."""
+        pairs = list(pairs)
+        with self.lock:
+            return self._get_many(pairs)
+
+    def _get_many(self, pairs):
+        found = {}
+        missing = {}
+        for key in pairs:
+            if key in found or key in missing:
+                continue
+            route = self.routes.get(key)
+            if route is None and key not in self.routes:
+                missing[key] = None
+                continue
+            self.routes.move_to_end(key)
+            found[key] = route
+        self.hits += len(found)
+        self.misses += len(missing)
+        ROUTE_CACHE.labels(result="hit").inc(len(found))
+        ROUTE_CACHE.labels(result="miss").inc(len(missing))
+
+        if missing:
+            missing = list(missing)
+            origin_lat, origin_lon, _ = parse_coordinates([o for o, _ in missing])
+            dest_lat, dest_lon, _ = parse_coordinates([d for _, d in missing])
+            distance = haversine_km(origin_lat, origin_lon, dest_lat, dest_lon)
+            for i, key in enumerate(missing):
+                found[key] = self._build(key, origin_lat[i], origin_lon[i], dest_lat[i], dest_lon[i], distance[i])
+        while len(self.routes) > self.maxsize:
+            self.routes.popitem(last=False)
+        return [found[key] for key in pairs]
+
+    def _build(self, key, origin_lat, origin_lon, dest_lat, dest_lon, distance):
+        route = None
+        if np.isfinite([origin_lat, origin_lon, dest_lat, dest_lon]).all():
+            path = densify(origin_lat, origin_lon, dest_lat, dest_lon, self.step_deg)
+            route = Route(key[0], key[1], (float(origin_lat), float(origin_lon)),
+                          (float(dest_lat), float(dest_lon)), float(distance), path, line_geojson(path))
+        # Unparseable routes are cached too, so they are not re-parsed every refresh
+        self.routes[key] = route
+        return route
+
+    @property
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"routes": len(self.routes), "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
+
+
+class FeatureLayer(MacroElement):
+    """One Leaflet GeoJSON layer from a ``feature_collection`` string.
+
+    Every feature carries its Leaflet ``style``, ``tooltip``, ``popup`` and
+    ``popupOptions`` in its properties. A feature with a ``template`` takes
+    its popup from ``templates[template]``, with ``{name}`` placeholders
+    filled in the browser from its ``fields``, so repeated popup markup is
+    sent once per layer instead of once per flight. Points with an ``icon``
+    (options, or a name in ``icons``) become markers: ``L.divIcon`` when the
+    icon has ``html``, an awesome-markers icon otherwise. Other points
+    become circle markers.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        var {{ this.get_name() }}_templates = {{ this.templates }};
+        var {{ this.get_name() }}_icons = {{ this.icons }};
+        var {{ this.get_name() }} = L.geoJson({{ this.data }}, {
+            style: function(feature) { return feature.properties.style; },
+            pointToLayer: function(feature, latlng) {
+                var icon = feature.properties.icon;
+                if (typeof icon === "string") { icon = {{ this.get_name() }}_icons[icon]; }
+                if (!icon) { return L.circleMarker(latlng, feature.properties.style); }
+                return L.marker(latlng, {icon: icon.html !== undefined ? L.divIcon(icon) : L.AwesomeMarkers.icon(icon)});
+            },
+            onEachFeature: function(feature, layer) {
+                var p = feature.properties;
+                if (p.tooltip) { layer.bindTooltip(p.tooltip); }
+                var popup = p.popup;
+                if (p.template) {
+                    popup = {{ this.get_name() }}_templates[p.template].replace(/\\{(\\w+)\\}/g, function(match, name) {
+                        return name in p.fields ? p.fields[name] : match;
+                    });
+                }
+                layer.bindPopup(popup, p.popupOptions || {});
+            }
+        }).addTo({{ this._parent.get_name() }});
+        {% endmacro %}
+    """)
+
+    def __init__(self, data, templates=None, icons=None):
+        super().__init__()
+        self._name = "FeatureLayer"
+        self.data = data
+        self.templates = _inline_json(templates or {})
+        self.icons = _inline_json(icons or {})
+
+
+def _inline_json(value):
+    # Keep "</script>" in popups from closing the page's script block
+    return json.dumps(value).replace("</", "<\\/")
+
+
+def feature_collection(features):
+    """GeoJSON ``FeatureCollection`` of pre-serialized features, safe to inline in a page."""
+    return ('{"type":"FeatureCollection","features":[' + ",".join(features) + "]}").replace("</", "<\\/")
+
+
+def feature(geometry, properties):
+    return f'{{"type":"Feature","geometry":{geometry},"properties":{json.dumps(properties)}}}'
+
+
+def point_geojson(point):
+    return f'{{"type":"Point","coordinates":[{point[1]:.4f},{point[0]:.4f}]}}'
+
+
+def route_features(df, cache, colors, max_ids=10):
+    """Features of ``df``'s routes: one line per (route, status), coloured by
+    ``colors[status]``, and one marker per origin and destination airport."""
+    groups = df.groupby(["origin", "destination", "status"], observed=True, sort=False)["flight_id"]
+    groups = list(groups)
+    routes = cache.get_many((origin, destination) for (origin, destination, _), _ in groups)
+    features = []
+    origins, destinations = {}, {}
+    for ((_, _, status), ids), route in zip(groups, routes):
+        if route is None:
+            continue
+        origins.setdefault(route.origin, route.origin_point)
+        destinations.setdefault(route.destination, route.destination_point)
+        shown = ", ".join(map(str, ids.iloc[:max_ids]))
+        more = f" +{len(ids) - max_ids} more" if len(ids) > max_ids else ""
+        features.append(feature(route.geojson, {
+            "style": {"color": colors.get(status, DEFAULT_COLOR), "weight": 3, "opacity": 0.8,
+                      "dashArray": "10, 5" if status == "Delayed" else None},
+            "tooltip": f"{route.distance_km:,.0f} km • {len(ids)} {status}",
+            "popup": f"Flight {shown}{more} - {status}",
+        }))
+
+    for airports, label, fill in ((origins, "🛫 Origin", "#00b09b"), (destinations, "🛬 Destination", "#ff4757")):
+        style = {"radius": 6, "color": "white", "fill": True, "fillColor": fill, "fillOpacity": 0.9, "weight": 2}
+        for name, point in airports.items():
+            features.append(feature(point_geojson(point), {"style": style, "popup": f"{label}: {name}"}))
+    return features
+
+
+def route_layer(df, cache, colors, max_ids=10):
+    """``FeatureLayer`` of ``df``'s routes and airports."""
+    return FeatureLayer(feature_collection(route_features(df, cache, colors, max_ids)))
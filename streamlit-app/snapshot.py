@@ -0,0 +1,175 @@
+"""Memory-mapped fleet snapshot for fast dashboard cold starts.
+
+Reading the whole ``flights`` table with ``pd.read_sql`` builds Python
+objects row by row, and parsing the coordinate strings of a million rows
+costs seconds more. ``FleetSnapshot`` keeps the parsed fleet as an Arrow
+table (``Fleet.to_arrow``) and periodically writes it to an uncompressed
+Arrow IPC file. A new process maps that file (zero-copy) and then only asks
+Postgres for rows whose ``sunk_at`` is newer than the snapshot's watermark.
+Those rows replace their flights in the table.
+
+A full reload still happens when there is no usable snapshot, when the
+table has no ``sunk_at`` column, or every ``max_age`` seconds, which also
+drops flights deleted from Postgres.
+
+Each app keeps its own file (``snapshot_path``), since they load different
+columns.
+"""
+
+import os
+import threading
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from fleet import Fleet
+
+SNAPSHOT_PATH = os.environ.get("FLIGHTS_SNAPSHOT", "/app/shared_data/fleet_snapshot.arrow")
+
+
+def snapshot_path(app, path=SNAPSHOT_PATH):
+    """Snapshot file of ``app``: ``path`` with the app's name before the extension.
+
+    The apps load different column sets, so a shared file would be rewritten
+    by each in turn and fail the other's schema on every cold start.
+    """
+    root, ext = os.path.splitext(path)
+    return f"{root}.{app}{ext}"
+
+# Arrow-side columns of ``Fleet.to_arrow`` that are parsed from ``origin``/``destination``
+DERIVED_COLUMNS = {"origin_lat", "origin_lon", "dest_lat", "dest_lon"}
+
+
+def write_snapshot(table, path, watermark, full_at):
+    """Write ``table`` as an uncompressed (mappable) Arrow IPC file, atomically."""
+    metadata = {"watermark": str(watermark), "full_at": str(full_at), "written_at": str(time.time())}
+    table = table.unify_dictionaries().combine_chunks().replace_schema_metadata(metadata)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, path)
+
+
+def read_snapshot(path):
+    """``(table, watermark, full_at)`` from a snapshot file, memory-mapped; None if missing."""
+    if not os.path.exists(path):
+        return None
+    with pa.memory_map(path) as source:
+        table = pa.ipc.open_file(source).read_all()
+    metadata = {k.decode(): v.decode() for k, v in (table.schema.metadata or {}).items()}
+    watermark = metadata.get("watermark")
+    watermark = int(watermark) if watermark not in (None, "None") else None
+    return table, watermark, float(metadata.get("full_at", 0))
+
+
+def max_sunk_at(table):
+    if "sunk_at" not in table.column_names:
+        return None
+    value = pc.max(table.column("sunk_at")).as_py()
+    return None if value is None else int(value)
+
+
+def fetch_delta(conn, watermark, columns):
+    """Raw ``flights`` rows sunk after ``watermark`` (epoch ms)."""
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT {', '.join(columns)} FROM flights WHERE sunk_at > %s", (watermark,))
+        rows = cur.fetchall()
+    return pd.DataFrame(rows, columns=columns)
+
+
+def merge(table, delta):
+    """Replace the flights of ``delta`` in ``table`` and append new ones."""
+    kept = table.filter(pc.invert(pc.is_in(table.column("flight_id"), value_set=delta.column("flight_id"))))
+    return pa.concat_tables([kept, delta.select(kept.column_names)], promote_options="permissive")
+
+
+class FleetSnapshot:
+    """Process-wide fleet table kept current from a snapshot file plus deltas."""
+
+    def __init__(self, path=SNAPSHOT_PATH, refresh_every=60, write_every=300, max_age=3600):
+        self.path = path
+        self.refresh_every = refresh_every
+        self.write_every = write_every
+        self.max_age = max_age
+        self.table = None
+        self.watermark = None
+        self.full_at = 0.0
+        self.refreshed_at = 0.0
+        self.written_at = 0.0
+        self.stats = {}
+        self.lock = threading.Lock()
+
+    @property
+    def version(self):
+        """Content version of the table: its newest ``sunk_at`` and row count.
+
+        Equal in every process that holds the same rows. Tables without
+        ``sunk_at`` are reloaded in full each refresh and fall back to the load
+        time.
+        """
+        if self.table is None:
+            return None
+        return (self.watermark if self.watermark is not None else self.full_at), self.table.num_rows
+
+    def raw_columns(self):
+        return [c for c in self.table.column_names if c not in DERIVED_COLUMNS]
+
+    def refresh(self, conn, load_full, force=False):
+        """Bring the table up to date and return it.
+
+        ``load_full`` returns the raw ``flights`` frame (the dashboard's
+        ``load_all_flights``); it is only called when no snapshot can be
+        extended. Within ``refresh_every`` seconds of the last refresh the
+        current table is returned as is, unless ``force``.
+        """
+        with self.lock:
+            now = time.time()
+            if self.table is not None and not force and now - self.refreshed_at < self.refresh_every:
+                return self.table
+
+            started = time.perf_counter()
+            source = "memory"
+            if self.table is None:
+                snapshot = read_snapshot(self.path)
+                if snapshot is not None:
+                    self.table, self.watermark, self.full_at = snapshot
+                    self.written_at = now
+                    source = "snapshot"
+
+            changed = 0
+            if self.table is None or self.watermark is None or now - self.full_at > self.max_age:
+                raw = load_full()
+                if raw.empty:
+                    return self.table
+                self.table = Fleet.from_frame(raw).to_arrow()
+                self.full_at = now
+                changed = len(raw)
+                source = "postgres"
+            elif conn is not None:
+                delta = fetch_delta(conn, self.watermark, self.raw_columns())
+                if not delta.empty:
+                    self.table = merge(self.table, Fleet.from_frame(delta).to_arrow())
+                changed = len(delta)
+                source += "+delta"
+
+            self.watermark = max_sunk_at(self.table)
+            self.refreshed_at = now
+            if changed:
+                if now - self.written_at >= self.write_every or source == "postgres":
+                    write_snapshot(self.table, self.path, self.watermark, self.full_at)
+                    self.written_at = now
+            self.stats = {"source": source, "rows": self.table.num_rows, "changed": changed,
+                          "seconds": time.perf_counter() - started}
+            return self.table
+
+    def frame(self, conn, load_full, now=None, force=False):
+        """Render-ready frame (``Fleet.to_frame``) of the refreshed table."""
+        table = self.refresh(conn, load_full, force)
+        if table is None:
+            return pd.DataFrame()
+        frame = Fleet.from_arrow(table).to_frame(now)
+        # Lets the dashboards key figures by the data they were built from
+        frame.attrs["snapshot_version"] = self.version
+        return frame
@@ -0,0 +1,215 @@
+"""Grid index over current flight positions for viewport and click queries.
+
+Positions are bucketed into a uniform lat/lon grid (1° cells by default, so
+cell ids fit in ``uint16``) and stored CSR-style: ``order`` holds row
+positions sorted by cell, ``offsets[c]:offsets[c + 1]`` is the slice for cell
+``c``. Grid rows are contiguous in cell-id order, so a bounding box is at most
+two slices per grid row. ``update`` only re-sorts when some flight changed
+cell.
+"""
+
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+TILE_PX = 256
+WORLD_BOUNDS = (-85.0, -180.0, 85.0, 180.0)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = (np.radians(v) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def bounds_from_folium(map_data, pad=0.0):
+    """``(south, west, north, east)`` from an ``st_folium`` return value, or None.
+
+    ``pad`` grows the box by that fraction on each side so flights just off
+    screen are already on the map when the user pans.
+    """
+    bounds = (map_data or {}).get("bounds") or {}
+    sw, ne = bounds.get("_southWest") or {}, bounds.get("_northEast") or {}
+    values = (sw.get("lat"), sw.get("lng"), ne.get("lat"), ne.get("lng"))
+    if any(v is None for v in values):
+        return None
+    south, west, north, east = values
+    dlat, dlon = (north - south) * pad, (east - west) * pad
+    return max(-90.0, south - dlat), west - dlon, min(90.0, north + dlat), east + dlon
+
+
+def center_from_folium(map_data):
+    """``(lat, lon)`` of the map centre from an ``st_folium`` return value, or None."""
+    center = (map_data or {}).get("center") or {}
+    if center.get("lat") is None or center.get("lng") is None:
+        return None
+    return center["lat"], center["lng"]
+
+
+def heat_bins(lat, lon, bounds=None, zoom=2, radius_px=15, max_bins=128, weights=None):
+    """Bin positions for a ``HeatMap`` layer at the current zoom.
+
+    Bins are about one heat radius wide on screen, so the rendered heat looks
+    the same as one point per flight. Only non-empty bins are returned, as
+    ``[lat, lon, weight]`` rows with weights scaled to 0..1, which caps the
+    payload at ``max_bins ** 2`` points whatever the fleet size.
+    """
+    south, west, north, east = bounds or WORLD_BOUNDS
+    width = east - west
+    if width < 0:
+        width += 360
+    width = min(width, 360.0)
+    height = max(north - south, 1e-6)
+
+    bin_deg = 360.0 / 2 ** (zoom or 0) / TILE_PX * radius_px
+    nx = int(min(max_bins, max(1, math.ceil(width / bin_deg))))
+    ny = int(min(max_bins, max(1, math.ceil(height / bin_deg))))
+
+    # Same bins as np.histogram2d, but integer bin ids plus bincount is several
+    # times faster on large inputs.
+    lat = np.asarray(lat, dtype=np.float64)
+    # Unwrap longitudes so boxes across the antimeridian bin contiguously
+    lon = np.mod(np.asarray(lon, dtype=np.float64) - west, 360.0)
+    iy = np.floor((lat - south) * (ny / height))
+    ix = np.floor(lon * (nx / width))
+    inside = (iy >= 0) & (iy < ny) & (ix < nx)
+    bins = iy[inside].astype(np.intp) * nx + ix[inside].astype(np.intp)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=np.float64)[inside]
+    counts = np.bincount(bins, weights=weights, minlength=nx * ny)
+
+    cells = np.flatnonzero(counts)
+    if not len(cells):
+        return []
+    values = counts[cells]
+    lat_centres = south + (cells // nx + 0.5) * (height / ny)
+    lon_centres = np.mod(west + (cells % nx + 0.5) * (width / nx) + 180.0, 360.0) - 180.0
+    return np.column_stack((lat_centres, lon_centres, values / values.max())).tolist()
+
+
+class GridIndex:
+    """Uniform grid over (lat, lon) points with CSR cell lists."""
+
+    def __init__(self, cell_deg=1.0):
+        self.cell_deg = cell_deg
+        self.rows = int(math.ceil(180 / cell_deg))
+        self.cols = int(math.ceil(360 / cell_deg))
+        self.n_cells = self.rows * self.cols
+        # One extra id collects points without a usable position
+        self.dtype = np.uint16 if self.n_cells < np.iinfo(np.uint16).max else np.uint32
+        self.lat = np.empty(0)
+        self.lon = np.empty(0)
+        self.cells = np.empty(0, self.dtype)
+        self.order = np.empty(0, np.intp)
+        self.offsets = np.zeros(self.n_cells + 2, np.int64)
+        self.rebuilds = 0
+
+    def __len__(self):
+        return len(self.cells)
+
+    def _row(self, lat):
+        return np.clip(np.floor_divide(np.add(lat, 90.0), self.cell_deg), 0, self.rows - 1)
+
+    def _col(self, lon):
+        return np.mod(np.floor_divide(np.add(lon, 180.0), self.cell_deg), self.cols)
+
+    def cell_ids(self, lat, lon):
+        cells = self._row(lat) * self.cols + self._col(lon)
+        return np.where(np.isfinite(cells), cells, self.n_cells).astype(self.dtype)
+
+    def update(self, lat, lon):
+        """Index new positions; the CSR layout is rebuilt only if any cell changed."""
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        cells = self.cell_ids(lat, lon)
+        if len(cells) != len(self.cells) or not np.array_equal(cells, self.cells):
+            # Stable sort on small unsigned ints is a radix sort in NumPy
+            self.order = np.argsort(cells, kind="stable")
+            counts = np.bincount(cells, minlength=self.n_cells + 1)
+            self.offsets = np.concatenate(([0], np.cumsum(counts)))
+            self.cells = cells
+            self.rebuilds += 1
+        self.lat, self.lon = lat, lon
+        return self
+
+    def _col_ranges(self, first, last):
+        """Inclusive column ranges from ``first`` to ``last``, wrapping at the antimeridian."""
+        if last - first + 1 >= self.cols:
+            return [(0, self.cols - 1)]
+        c0, c1 = int(first % self.cols), int(last % self.cols)
+        return [(c0, c1)] if c0 <= c1 else [(c0, self.cols - 1), (0, c1)]
+
+    def _gather(self, row0, row1, col_ranges):
+        slices = []
+        for row in range(int(row0), int(row1) + 1):
+            base = row * self.cols
+            for c0, c1 in col_ranges:
+                start, stop = self.offsets[base + c0], self.offsets[base + c1 + 1]
+                if stop > start:
+                    slices.append(self.order[start:stop])
+        return np.concatenate(slices) if slices else np.empty(0, np.intp)
+
+    def in_bounds(self, south, west, north, east):
+        """Row positions of points inside the box (``west > east`` or lon past 180 wraps)."""
+        if not len(self.cells):
+            return np.empty(0, np.intp)
+        width = east - west
+        if width < 0:
+            width += 360
+        first = math.floor((west + 180.0) / self.cell_deg)
+        last = first + math.floor(width / self.cell_deg) + 1
+        candidates = self._gather(self._row(south), self._row(north), self._col_ranges(first, last))
+
+        lat, lon = self.lat[candidates], self.lon[candidates]
+        inside = (lat >= south) & (lat <= north)
+        if width < 360:
+            inside &= np.mod(lon - west, 360.0) <= width
+        return candidates[inside]
+
+    def nearest(self, lat, lon, k=5):
+        """Row positions of the ``k`` points nearest to ``(lat, lon)`` and their distance in km.
+
+        Rings of cells around the click are searched with doubling radius until
+        the k-th candidate is closer than anything outside the searched box
+        could be (equirectangular distance, scaled at the click latitude).
+        """
+        if not len(self.cells):
+            return np.empty(0, np.intp), np.empty(0)
+        row0, col0 = int(self._row(lat)), int(self._col(lon))
+        coslat = max(math.cos(math.radians(lat)), 0.01)
+        ring = 1
+        while True:
+            covers_all = ring >= self.rows and 2 * ring + 1 >= self.cols
+            candidates = self._gather(max(0, row0 - ring), min(self.rows - 1, row0 + ring),
+                                      self._col_ranges(col0 - ring, col0 + ring))
+            if len(candidates) >= k or covers_all:
+                dlat = self.lat[candidates] - lat
+                dlon = (np.mod(self.lon[candidates] - lon + 180.0, 360.0) - 180.0) * coslat
+                planar = np.hypot(dlat, dlon)
+                if len(candidates) > k:
+                    keep = np.argpartition(planar, k - 1)[:k]
+                    candidates, planar = candidates[keep], planar[keep]
+                ranked = np.argsort(planar)
+                candidates, planar = candidates[ranked], planar[ranked]
+                if covers_all or planar[-1] <= ring * self.cell_deg * coslat:
+                    break
+            ring *= 2
+        distance = haversine_km(lat, lon, self.lat[candidates], self.lon[candidates])
+        ranked = np.argsort(distance, kind="stable")
+        return candidates[ranked], distance[ranked]
+
+    def density(self, bounds=None):
+        """``(lat, lon, count)`` at the centre of every non-empty cell, optionally within ``bounds``."""
+        counts = np.diff(self.offsets)[:self.n_cells]
+        cells = np.flatnonzero(counts)
+        lat = (cells // self.cols + 0.5) * self.cell_deg - 90.0
+        lon = (cells % self.cols + 0.5) * self.cell_deg - 180.0
+        if bounds is not None:
+            south, west, north, east = bounds
+            width = (east - west) % 360 if east - west < 360 else 360
+            keep = (lat >= south - self.cell_deg) & (lat <= north + self.cell_deg)
+            if width < 360:
+                keep &= np.mod(lon - west + self.cell_deg, 360.0) <= width + 2 * self.cell_deg
+            cells, lat, lon = cells[keep], lat[keep], lon[keep]
+        return lat, lon, counts[cells]
@@ -0,0 +1,134 @@
+"""Bounded-memory summaries of the full flights history.
+
+``load_all_flights`` plus ``process_flight_data`` hold the whole table and
+about ten derived columns at once. Here rows arrive in chunks (from
+``loader.iter_frames`` or any iterable of raw frames). Each chunk is parsed
+and projected to ``now`` with the same vectorized helpers as ``fleet.py``,
+folded into running aggregates and then dropped. Memory stays proportional
+to the chunk size, the grid and the sample, however long the history is.
+
+``FleetSummary`` keeps what the history view renders:
+
+* counts by status, phase, departure hour and route
+* duration totals
+* position counts per grid cell, for density and heat layers
+* a fixed-size uniform sample of flights for the map (bottom-k of a random key)
+"""
+
+import numpy as np
+import pandas as pd
+
+from fleet import PHASES, Fleet, phase_codes, progress_at
+from spatial import GridIndex
+
+
+class FleetSummary:
+    """Running aggregates over raw ``flights`` chunks."""
+
+    SAMPLE_COLUMNS = ["flight_id", "status", "current_lat", "current_lon", "progress"]
+
+    def __init__(self, now, cell_deg=1.0, sample_size=5000, top_routes=20, seed=0):
+        self.now = now
+        self.grid = GridIndex(cell_deg)
+        self.sample_size = sample_size
+        self.top_routes = top_routes
+        self.rng = np.random.default_rng(seed)
+        self.rows = 0
+        self.chunks = 0
+        self.status = pd.Series(dtype=np.int64)
+        self.routes = pd.Series(dtype=np.int64)
+        self.phases = np.zeros(len(PHASES), np.int64)
+        self.hourly = np.zeros(24, np.int64)
+        self.cells = np.zeros(self.grid.n_cells + 1, np.int64)
+        self.duration_sum = 0.0
+        self.duration_max = 0.0
+        self.sample = pd.DataFrame(columns=self.SAMPLE_COLUMNS + ["_key"])
+
+    def update(self, raw):
+        """Fold one chunk of raw ``flights`` rows into the summary."""
+        if raw.empty:
+            return self
+        fleet = Fleet.from_frame(raw)
+        departure, arrival = fleet.departure_time, fleet.arrival_time
+        progress = progress_at(departure, arrival, self.now)
+        lat = fleet.origin_lat + (fleet.dest_lat - fleet.origin_lat) * progress
+        lon = fleet.origin_lon + (fleet.dest_lon - fleet.origin_lon) * progress
+
+        self.rows += len(raw)
+        self.chunks += 1
+        self.status = self.status.add(pd.Series(fleet.status).value_counts(), fill_value=0)
+        self.routes = self.routes.add(self._chunk_routes(fleet), fill_value=0).nlargest(self.top_routes * 10)
+        self.phases += np.bincount(phase_codes(progress), minlength=len(PHASES))
+        self.hourly += np.bincount(departure // 3600 % 24, minlength=24)
+        self.cells += np.bincount(self.grid.cell_ids(lat, lon), minlength=len(self.cells))
+        duration = (arrival - departure) / 3600
+        self.duration_sum += float(duration.sum())
+        self.duration_max = max(self.duration_max, float(duration.max()))
+
+        # Bottom-k sampling: the k smallest random keys seen so far are a uniform sample
+        keys = self.rng.random(len(raw))
+        threshold = self.sample["_key"].max() if len(self.sample) >= self.sample_size else 1.0
+        keep = np.flatnonzero(keys < threshold)
+        candidates = pd.DataFrame({
+            "flight_id": raw["flight_id"].to_numpy()[keep],
+            "status": np.asarray(fleet.status)[keep],
+            "current_lat": lat[keep],
+            "current_lon": lon[keep],
+            "progress": progress[keep],
+            "_key": keys[keep],
+        })
+        frames = [f for f in (self.sample, candidates) if len(f)]
+        self.sample = pd.concat(frames, ignore_index=True).nsmallest(self.sample_size, "_key")
+        return self
+
+    def _chunk_routes(self, fleet):
+        """Leading routes of one chunk, counted on category codes; only those get labels.
+
+        Keeping just the leaders of each chunk bounds the route table.
+        """
+        origin, destination = fleet.origin, fleet.destination
+        known = (origin.codes >= 0) & (destination.codes >= 0)
+        pairs = origin.codes[known].astype(np.int64) * len(destination.categories) + destination.codes[known]
+        pairs, counts = np.unique(pairs, return_counts=True)
+        top = np.argsort(counts)[::-1][:self.top_routes * 10]
+        labels = (np.asarray(origin.categories[pairs[top] // len(destination.categories)], dtype=object) + " → "
+                  + np.asarray(destination.categories[pairs[top] % len(destination.categories)], dtype=object))
+        return pd.Series(counts[top], index=labels)
+
+    @property
+    def mean_duration(self):
+        return self.duration_sum / self.rows if self.rows else 0.0
+
+    def status_counts(self):
+        return self.status.astype(np.int64).sort_values(ascending=False)
+
+    def phase_counts(self):
+        return pd.Series(self.phases, index=PHASES)
+
+    def route_counts(self):
+        return self.routes.astype(np.int64).nlargest(self.top_routes)
+
+    def density(self):
+        """``(lat, lon, count)`` at the centre of every non-empty grid cell."""
+        cells = np.flatnonzero(self.cells[:self.grid.n_cells])
+        lat = (cells // self.grid.cols + 0.5) * self.grid.cell_deg - 90.0
+        lon = (cells % self.grid.cols + 0.5) * self.grid.cell_deg - 180.0
+        return lat, lon, self.cells[cells]
+
+    def heat(self):
+        """``[lat, lon, weight]`` rows for a ``HeatMap`` layer, weights scaled to 0..1."""
+        lat, lon, counts = self.density()
+        if not len(counts):
+            return []
+        return np.column_stack((lat, lon, counts / counts.max())).tolist()
+
+    def sample_frame(self):
+        return self.sample.drop(columns="_key").reset_index(drop=True)
+
+
+def summarize(chunks, now, **kwargs):
+    """Fold an iterable of raw ``flights`` frames into a ``FleetSummary``."""
+    summary = FleetSummary(now, **kwargs)
+    for chunk in chunks:
+        summary.update(chunk)
+    return summary
@@ -0,0 +1,201 @@
+"""Paginated flight details table.
+
+Only the visible page is sliced out of the fleet and sent to the browser;
+progress, times and durations are formatted client-side through
+``st.column_config`` instead of per-row Python formatting. Sorting selects
+just the rows up to the end of the requested page with ``np.partition`` and
+search is a flight-id prefix lookup in a sorted index, so a page costs the
+same whether the fleet has 1k or 1M rows. With a database connection the
+same page can be fetched straight from Postgres with ``ORDER BY``/``LIMIT``.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+FLIGHT_COLUMNS = [
+    "flight_id", "origin", "destination", "status", "departure_time", "arrival_time",
+    "airline", "aircraft_type", "speed", "altitude", "produced_at", "sunk_at", "delay_risk",
+]
+
+# Sort keys that can be pushed down to SQL, keyed by display column
+SQL_SORT_EXPRESSIONS = {
+    "flight_id": "flight_id",
+    "origin": "origin",
+    "destination": "destination",
+    "status": "status",
+    "departure_datetime": "departure_time",
+    "arrival_datetime": "arrival_time",
+    "flight_duration": "arrival_time - departure_time",
+    "progress": "LEAST(1.0, GREATEST(0.0, (%(now)s - departure_time)::float"
+                " / GREATEST(1, arrival_time - departure_time)))",
+    "delay_risk": "delay_risk",
+}
+
+COLUMN_CONFIG = {
+    "progress": lambda label: st.column_config.ProgressColumn(label, min_value=0.0, max_value=1.0, format="percent"),
+    "eta": lambda label: st.column_config.DatetimeColumn(label, format="HH:mm"),
+    "departure_datetime": lambda label: st.column_config.DatetimeColumn(label, format="YYYY-MM-DD HH:mm"),
+    "arrival_datetime": lambda label: st.column_config.DatetimeColumn(label, format="YYYY-MM-DD HH:mm"),
+    "flight_duration": lambda label: st.column_config.NumberColumn(label, format="%.1fh"),
+    "delay_risk": lambda label: st.column_config.ProgressColumn(label, min_value=0.0, max_value=1.0, format="percent"),
+}
+
+
+# Rewritten in place by ``fleet.Lifecycle.advance`` on every clock tick
+TIME_DEPENDENT = {"progress", "eta", "flight_phase", "current_lat", "current_lon"}
+
+
+class FlightTable:
+    """Sort keys and a flight-id index over one processed fleet frame."""
+
+    def __init__(self, frame):
+        self.frame = frame
+        self._keys = {}
+        self._ids = None
+
+    def _id_index(self):
+        if self._ids is None:
+            codes, uniques = pd.factorize(self.frame["flight_id"], sort=True)
+            self._ids = codes, np.asarray(uniques, dtype=str)
+        return self._ids
+
+    def sort_key(self, column):
+        """Numeric key per row whose order matches ``column``; cached per frame."""
+        if column not in self._keys or column in TIME_DEPENDENT:
+            series = self.frame[column]
+            if column == "flight_id":
+                key = self._id_index()[0].astype(np.float64)
+            elif isinstance(series.dtype, pd.CategoricalDtype):
+                key = series.cat.codes.to_numpy(np.float64)
+            elif pd.api.types.is_datetime64_any_dtype(series):
+                key = series.to_numpy().astype("datetime64[s]").astype(np.int64).astype(np.float64)
+            elif pd.api.types.is_numeric_dtype(series):
+                key = series.to_numpy(np.float64)
+            else:
+                key = pd.factorize(series, sort=True)[0].astype(np.float64)
+            self._keys[column] = np.where(np.isnan(key), np.inf, key)
+        return self._keys[column]
+
+    def matches(self, search=""):
+        """Row positions whose flight id starts with ``search``."""
+        search = (search or "").strip()
+        if not search:
+            return np.arange(len(self.frame))
+        codes, uniques = self._id_index()
+        lo = np.searchsorted(uniques, search, side="left")
+        hi = np.searchsorted(uniques, search + "\uffff", side="left")
+        return np.flatnonzero((codes >= lo) & (codes < hi))
+
+    def page(self, positions, sort_by, ascending=True, page=0, page_size=50):
+        """Rows of ``page`` among ``positions`` ordered by ``sort_by`` (ties by position)."""
+        start = page * page_size
+        stop = min(len(positions), start + page_size)
+        if start >= stop:
+            return self.frame.iloc[[]]
+
+        keys = self.sort_key(sort_by)[positions]
+        if not ascending:
+            keys = -keys
+        if stop < len(keys):
+            # Everything strictly below the stop-th key, then the first ties
+            kth = np.partition(keys, stop - 1)[stop - 1]
+            below = np.flatnonzero(keys < kth)
+            ties = np.flatnonzero(keys == kth)[:stop - len(below)]
+            selected = np.concatenate((below, ties))
+        else:
+            selected = np.arange(len(keys))
+        ordered = selected[np.lexsort((selected, keys[selected]))]
+        return self.frame.iloc[positions[ordered[start:stop]]]
+
+
+def query_page(conn, sort_by, ascending=True, page=0, page_size=50, search="", now=None):
+    """Fetch one page of raw ``flights`` rows from Postgres and the matching row count."""
+    params = {
+        "now": int(now if now is not None else time.time()),
+        "limit": page_size,
+        "offset": page * page_size,
+    }
+    where = ""
+    search = (search or "").strip()
+    if search:
+        escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        params["pattern"] = escaped + "%"
+        where = "WHERE flight_id LIKE %(pattern)s"
+    order = f"{SQL_SORT_EXPRESSIONS[sort_by]} {'ASC' if ascending else 'DESC'}, flight_id"
+
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT count(*) FROM flights {where}", params)
+        total = cur.fetchone()[0]
+        cur.execute(
+            f"SELECT {', '.join(FLIGHT_COLUMNS)} FROM flights {where} "
+            f"ORDER BY {order} LIMIT %(limit)s OFFSET %(offset)s",
+            params,
+        )
+        rows = cur.fetchall()
+    return pd.DataFrame(rows, columns=FLIGHT_COLUMNS), total
+
+
+def show_flight_table(df, columns, key, fleet=None, conn=None, process=None, height=400):
+    """Render the paginated table for ``df``.
+
+    ``columns`` maps frame columns to labels. ``fleet`` is the unfiltered
+    frame ``df`` was selected from (with a ``RangeIndex``); the sort keys and
+    id index are built on it once and reused across filter changes. With
+    ``conn`` and ``process`` (the dashboard's ``process_flight_data``) the
+    user can page through the database instead of the loaded fleet.
+    """
+    controls = st.columns([3, 2, 1, 1])
+    search = controls[0].text_input("🔎 Flight ID starts with", key=f"{key}_search")
+    source = "Loaded fleet"
+    if conn is not None and process is not None:
+        source = controls[0].radio("Source", ["Loaded fleet", "Database"], horizontal=True, key=f"{key}_source")
+    sortable = [c for c in columns if source == "Loaded fleet" or c in SQL_SORT_EXPRESSIONS]
+    sort_by = controls[1].selectbox("Sort by", sortable, format_func=columns.get, key=f"{key}_sort")
+    descending = controls[2].toggle("Descending", key=f"{key}_desc")
+    page_size = controls[3].selectbox("Rows", PAGE_SIZES, index=1, key=f"{key}_size")
+
+    page_key = f"{key}_page"
+    if source == "Database":
+        # A page past the end comes back empty and is clamped below for the next run
+        page = st.session_state.get(page_key, 1) - 1
+        try:
+            raw, total = query_page(conn, sort_by, not descending, page, page_size, search)
+        except Exception as e:
+            st.error(f"🚨 Database error: {str(e)}")
+            return
+        page_df = process(raw) if not raw.empty else raw
+    else:
+        fleet = df if fleet is None else fleet
+        table = st.session_state.get(f"{key}_table")
+        if table is None or table.frame is not fleet:
+            table = st.session_state[f"{key}_table"] = FlightTable(fleet)
+        positions = table.matches(search)
+        if df is not fleet:
+            keep = np.zeros(len(fleet), dtype=bool)
+            keep[df.index.to_numpy()] = True
+            positions = positions[keep[positions]]
+        total = len(positions)
+        page = min(st.session_state.get(page_key, 1), max(1, -(-total // page_size))) - 1
+        page_df = table.page(positions, sort_by, not descending, page, page_size)
+
+    pages = max(1, -(-total // page_size))
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages
+    if page_df.empty:
+        st.info("No flights match the search.")
+    else:
+        st.dataframe(
+            page_df[list(columns)],
+            column_config={c: COLUMN_CONFIG[c](label) if c in COLUMN_CONFIG else label for c, label in columns.items()},
+            use_container_width=True,
+            hide_index=True,
+            height=height,
+        )
+    footer = st.columns([1, 3])
+    footer[0].number_input("Page", min_value=1, max_value=pages, step=1, key=page_key)
+    footer[1].caption(f"Page {page + 1} of {pages} • {total} flights")
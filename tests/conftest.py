@@ -0,0 +1,7 @@
+"""Put the pipeline scripts on the import path, as the containers run them."""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
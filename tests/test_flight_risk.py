@@ -0,0 +1,146 @@
+"""Risk scores: newest per flight, applied only to the event they scored."""
+
+import json
+import os
+import shutil
+
+import pytest
+
+import flight_risk
+from flight_risk import PendingScores, latest_risk, make_risk_batch, parse_predictions, update_risk
+
+NOW = 1_700_000_000
+
+
+def score(flight_id, produced_at, risk=0.5, scored=NOW):
+    return (flight_id, risk, produced_at, scored * 1000)
+
+
+def prediction(flight_id, produced_at, risk, timestamp=NOW):
+    message = {"flight_id": flight_id, "prediction": risk, "timestamp": timestamp}
+    if produced_at is not None:
+        message["produced_at"] = produced_at
+    return (json.dumps(message),)
+
+
+def test_pending_scores_keep_the_newest_event_of_each_flight():
+    pending = PendingScores()
+    pending.add([score("FL1000", 3, 0.3), score("FL1000", 1, 0.1), score("FL1001", 2)])
+
+    assert len(pending) == 2
+    assert sorted(pending.rows(99)) == [("FL1000", 0.3, 3, NOW * 1000, 99), ("FL1001", 0.5, 2, NOW * 1000, 99)]
+
+
+def test_pending_scores_expire_after_wait():
+    pending = PendingScores(wait=60)
+    pending.add([score("FL1000", 1, scored=NOW - 61), score("FL1001", 1, scored=NOW - 59)])
+
+    assert pending.expire(NOW) == 1
+    assert [row[0] for row in pending.rows(0)] == ["FL1001"]
+
+
+def test_settled_scores_are_not_retried():
+    pending = PendingScores()
+    pending.add([score("FL1000", 1), score("FL1001", 1)])
+
+    assert pending.settle({"FL1000", "FL2000"}) == [score("FL1000", 1)]
+    assert [row[0] for row in pending.rows(0)] == ["FL1001"]
+
+
+class Batch:
+    """Stands in for a micro-batch of predictions already reduced by ``latest_risk``."""
+
+    def __init__(self, scores):
+        self.scores = scores
+
+    def collect(self):
+        return self.scores
+
+
+class Connection:
+    def close(self):
+        pass
+
+
+def test_unmatched_scores_wait_for_the_next_batch(monkeypatch):
+    matched = [set(), {"FL1000"}, {"FL1001"}]
+    written = []
+
+    def fake_update(conn, rows):
+        written.append(sorted(row[:3] for row in rows))
+        return matched.pop(0)
+
+    monkeypatch.setattr(flight_risk, "latest_risk", lambda df: df)
+    monkeypatch.setattr(flight_risk.psycopg2, "connect", lambda dsn: Connection())
+    monkeypatch.setattr(flight_risk, "update_risk", fake_update)
+    monkeypatch.setattr(flight_risk.time, "time", lambda: NOW)
+
+    foreach_batch = make_risk_batch("dbname=test")
+    foreach_batch(Batch([score("FL1000", 1, 0.1)]), 0)
+    foreach_batch(Batch([score("FL1001", 1, 0.2)]), 1)
+    foreach_batch(Batch([]), 2)
+    foreach_batch(Batch([]), 3)
+
+    assert written == [
+        [("FL1000", 0.1, 1)],
+        [("FL1000", 0.1, 1), ("FL1001", 0.2, 1)],
+        [("FL1001", 0.2, 1)],
+    ]
+
+
+def java_available():
+    return bool(os.environ.get("JAVA_HOME") or shutil.which("java"))
+
+
+@pytest.fixture(scope="module")
+def spark():
+    pyspark = pytest.importorskip("pyspark")
+    if not java_available():
+        pytest.skip("Spark needs a Java runtime")
+    session = pyspark.sql.SparkSession.builder \
+        .master("local[1]") \
+        .config("spark.ui.enabled", "false") \
+        .config("spark.sql.shuffle.partitions", "2") \
+        .getOrCreate()
+    yield session
+    session.stop()
+
+
+def test_latest_risk_keeps_the_score_of_the_newest_event(spark):
+    raw = spark.createDataFrame([
+        prediction("FL1000", 2, 0.2, timestamp=NOW + 5),
+        prediction("FL1000", 3, 0.3, timestamp=NOW),
+        prediction("FL1000", 1, 0.1, timestamp=NOW + 9),
+        prediction("FL1001", None, 0.9),
+        prediction("FL1002", 7, 0.7),
+    ], ["value"])
+
+    rows = {row.flight_id: row for row in latest_risk(parse_predictions(raw)).collect()}
+
+    assert sorted(rows) == ["FL1000", "FL1002"]
+    assert (rows["FL1000"].delay_risk, rows["FL1000"].produced_at, rows["FL1000"].risk_at) == (0.3, 3, NOW * 1000)
+    assert tuple(rows["FL1002"]) == ("FL1002", 0.7, 7, NOW * 1000)
+
+
+@pytest.mark.skipif(not os.environ.get("FLIGHTS_TEST_DSN"), reason="set FLIGHTS_TEST_DSN to a Postgres DSN")
+def test_risk_lands_only_on_the_scored_event():
+    psycopg2 = pytest.importorskip("psycopg2")
+    conn = psycopg2.connect(os.environ["FLIGHTS_TEST_DSN"])
+    try:
+        with conn, conn.cursor() as cur:
+            # A temporary table shadows the real ``flights`` for this session only
+            cur.execute("""
+                CREATE TEMP TABLE flights (
+                    flight_id TEXT PRIMARY KEY, produced_at BIGINT, sunk_at BIGINT,
+                    delay_risk REAL, risk_at BIGINT
+                )
+            """)
+            cur.execute("INSERT INTO flights (flight_id, produced_at, sunk_at) VALUES ('FL1000', 4, 1), ('FL1001', 5, 1)")
+        matched = update_risk(conn, [("FL1000", 0.25, 4, 7000, 99), ("FL1001", 0.75, 3, 7000, 99)])
+
+        assert matched == {"FL1000"}
+        with conn.cursor() as cur:
+            cur.execute("SELECT flight_id, delay_risk, risk_at, sunk_at FROM flights ORDER BY flight_id")
+            assert cur.fetchall() == [("FL1000", 0.25, 7000, 99), ("FL1001", None, None, 1)]
+    finally:
+        conn.close()
@@ -0,0 +1,60 @@
+"""Sink rows for the one-statement Postgres upsert."""
+
+import os
+from collections import namedtuple
+
+import pytest
+
+from pipeline import UPSERT_SQL, sink_rows, upsert_flights
+
+Event = namedtuple("Event", "flight_id origin destination status departure_time arrival_time produced_at")
+
+
+def event(flight_id, status, produced_at):
+    return Event(flight_id, [40.6, -73.8], [51.5, -0.5], status, 1000, 8200, produced_at)
+
+
+def batch_with_repeated_ids():
+    return [
+        event("FL1000", "On Time", 1),
+        event("FL1001", "Boarding", 2),
+        event("FL1000", "Delayed", 3),
+        event("FL1000", "Boarding", 4),
+        event("FL1001", "In Air", 5),
+    ]
+
+
+def test_sink_rows_keep_the_last_event_of_each_flight():
+    rows = sink_rows(batch_with_repeated_ids(), sunk_at=99)
+
+    assert sorted(row[0] for row in rows) == ["FL1000", "FL1001"]
+    latest = {row[0]: row for row in rows}
+    assert latest["FL1000"][3:] == ("Boarding", 1000, 8200, 4, 99)
+    assert latest["FL1001"][3] == "In Air"
+    assert latest["FL1000"][1] == "[40.6, -73.8]"
+
+
+def test_sink_rows_match_the_upsert_columns():
+    columns = UPSERT_SQL.split("(", 2)[1].split(")")[0]
+    assert len(sink_rows(batch_with_repeated_ids(), 0)[0]) == len(columns.split(","))
+
+
+@pytest.mark.skipif(not os.environ.get("FLIGHTS_TEST_DSN"), reason="set FLIGHTS_TEST_DSN to a Postgres DSN")
+def test_upsert_of_a_batch_with_repeated_ids():
+    psycopg2 = pytest.importorskip("psycopg2")
+    conn = psycopg2.connect(os.environ["FLIGHTS_TEST_DSN"])
+    try:
+        with conn, conn.cursor() as cur:
+            # A temporary table shadows the real ``flights`` for this session only
+            cur.execute("""
+                CREATE TEMP TABLE flights (
+                    flight_id TEXT PRIMARY KEY, origin TEXT, destination TEXT, status TEXT,
+                    departure_time BIGINT, arrival_time BIGINT, produced_at BIGINT, sunk_at BIGINT
+                )
+            """)
+        upsert_flights(conn, sink_rows(batch_with_repeated_ids(), 99))
+        with conn.cursor() as cur:
+            cur.execute("SELECT flight_id, status, produced_at FROM flights ORDER BY flight_id")
+            assert cur.fetchall() == [("FL1000", "Boarding", 4), ("FL1001", "In Air", 5)]
+    finally:
+        conn.close()